@@ -7,641 +7,5650 @@
 版本：1.0
 """
 
+import io
+import os
+import re
 import sys
+import bz2
+import codecs
+import gzip
 import json
+import lzma
+import math
+import time
+import zlib
+import zipfile
+import argparse
+import hashlib
+import heapq
+import multiprocessing
+import random
+import shutil
+import tempfile
+import logging
+import cProfile
+import pstats
+import platform
+import threading
+import traceback
+import tracemalloc
 import xml.etree.ElementTree as ET
 import xml.dom.minidom as minidom
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from functools import lru_cache
+from json.encoder import encode_basestring as encode_json_string
+from itertools import accumulate, repeat
+from operator import add
+from logging.handlers import RotatingFileHandler
 from xml.parsers.expat import ExpatError
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QTextEdit, QPushButton, QLabel, QMessageBox, QSplitter,
     QFrame, QStatusBar, QTabWidget, QSpinBox,
     QFormLayout, QGroupBox, QLineEdit, QCheckBox, QShortcut,
-    QTreeWidget, QTreeWidgetItem, QHeaderView, QAbstractItemView,
-    QComboBox
+    QTreeView, QHeaderView, QAbstractItemView,
+    QComboBox, QDialog, QDialogButtonBox, QFileDialog, QProgressBar, QMenu, QTabBar,
+    QTableView, QTableWidget, QTableWidgetItem, QInputDialog, QTreeWidgetItem
+)
+from PyQt5.QtCore import (
+    Qt, QTimer, QSettings, QStandardPaths, QUrl, QObject, QRunnable, QThreadPool, pyqtSignal,
+    QAbstractItemModel, QAbstractTableModel, QModelIndex, QFileSystemWatcher
+)
+from PyQt5.QtGui import (
+    QFont, QKeySequence, QTextCursor, QTextCharFormat, QColor, QTextDocument,
+    QDesktopServices
 )
-from PyQt5.QtCore import Qt, QTimer, QSettings
-from PyQt5.QtGui import QFont, QKeySequence, QTextCursor, QTextCharFormat, QColor, QTextDocument
 
 
-class JSONTreeWidget(QTreeWidget):
+def get_app_data_dir():
     """
-    自定义JSON树形视图组件
+    获取应用程序本地数据目录（日志、缓存等），不存在时自动创建
     """
+    data_dir = QStandardPaths.writableLocation(QStandardPaths.AppLocalDataLocation)
+    if not data_dir:
+        data_dir = os.path.join(os.path.expanduser('~'), '.json_formatter')
+    os.makedirs(data_dir, exist_ok=True)
+    return data_dir
 
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setup_tree()
 
-    def setup_tree(self):
+def format_size(num_bytes):
+    """
+    将字节数格式化为易读的字符串
+    """
+    size = float(num_bytes)
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            if unit == 'B':
+                return f'{int(size)}{unit}'
+            return f'{size:.1f}{unit}'
+        size /= 1024
+
+
+class TaskSignals(QObject):
+    """
+    后台任务的信号（在 GUI 线程中接收结果）
+    """
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    progress = pyqtSignal(object)
+
+
+class BackgroundTask(QRunnable):
+    """
+    在共享线程池中执行的后台任务，完成后通过信号把结果送回 GUI 线程
+    """
+
+    def __init__(self, func, *args, **kwargs):
+        super().__init__()
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = TaskSignals()
+
+    def run(self):
         """
-        设置树形视图的基本属性
+        执行任务并发送结果信号
         """
-        # 设置列标题
-        self.setHeaderLabels(["键/索引", "值", "类型"])
+        try:
+            result = self.func(*self.args, **self.kwargs)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.finished.emit(result)
 
-        # 设置列宽
-        header = self.header()
-        header.setStretchLastSection(False)
-        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(1, QHeaderView.Stretch)
-        header.setSectionResizeMode(2, QHeaderView.ResizeToContents)
 
-        # 设置选择模式
-        self.setSelectionMode(QAbstractItemView.SingleSelection)
+# 会话快照文件头（用于识别格式版本）
+SNAPSHOT_MAGIC = b'OFSNAP3\n'
 
-        # 设置样式
-        self.setStyleSheet("""
-            QTreeWidget {
-                border: 2px solid #bdc3c7;
-                border-radius: 5px;
-                background-color: white;
-                font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
-                font-size: 24px;
-                alternate-background-color: #f8f9fa;
-            }
-            QTreeWidget::item {
-                padding: 6px;
-                border-bottom: 1px solid #ecf0f1;
-                height: 24px;
-            }
-            QTreeWidget::item:selected {
-                background-color: #3498db;
-                color: white;
-            }
-            QTreeWidget::item:hover {
-                background-color: #e8f4fd;
-            }
-            QTreeWidget::branch:has-children:!has-siblings:closed,
-            QTreeWidget::branch:closed:has-children:has-siblings {
-                border-image: none;
-                image: none;
-                background-color: #27ae60;
-                width: 18px;
-                height: 18px;
-                border-radius: 9px;
-                margin: 1px;
-                border: 2px solid #2ecc71;
-            }
-            QTreeWidget::branch:open:has-children:!has-siblings,
-            QTreeWidget::branch:open:has-children:has-siblings {
-                border-image: none;
-                image: none;
-                background-color: #e74c3c;
-                width: 18px;
-                height: 18px;
-                border-radius: 9px;
-                margin: 1px;
-                border: 2px solid #c0392b;
-            }
-            QTreeWidget::branch:has-children:!has-siblings:closed:hover,
-            QTreeWidget::branch:closed:has-children:has-siblings:hover {
-                background-color: #229954;
-                border: 2px solid #27ae60;
-            }
-            QTreeWidget::branch:open:has-children:!has-siblings:hover,
-            QTreeWidget::branch:open:has-children:has-siblings:hover {
-                background-color: #cb4335;
-                border: 2px solid #e74c3c;
-            }
-        """)
+session_logger = logging.getLogger('json_formatter.session')
 
-        # 启用交替行颜色
-        self.setAlternatingRowColors(True)
 
-        # 设置根节点装饰
-        self.setRootIsDecorated(True)
+def write_session_snapshot(path, state):
+    """
+    写入会话快照（先写临时文件再替换），返回写入的字节数
+    文件头之后是压缩的数据：8 字节描述长度、JSON 描述（每个文档的标题、格式、输入、输出和上次的操作）、节点表的二进制数组。
+    文档的 'tree' 为节点表或解析结果，在这里（后台线程）展开；无法保存的解析结果连同输出一起省略，恢复时重新解析
+    """
+    documents = []
+    blobs = []
+    offset = 0
+    for saved in state['documents']:
+        saved = dict(saved)
+        source = saved.pop('tree', None)
+        if source is not None:
+            try:
+                if not isinstance(source, NodeTable):
+                    source = NodeTable.from_json(source) if saved['format'] == 'JSON' else NodeTable.from_xml(source)
+                info, arrays = source.to_snapshot()
+            except ValueError:
+                saved['output'] = None
+            else:
+                info['blobs'] = []
+                for blob in arrays:
+                    info['blobs'].append([offset, len(blob)])
+                    blobs.append(blob)
+                    offset += len(blob)
+                saved['tree'] = info
+        documents.append(saved)
+    header = json.dumps(dict(state, documents=documents), ensure_ascii=False).encode('utf-8')
+
+    compressor = zlib.compressobj(1)
+    with atomic_output_path(path) as temp_path:
+        with open(temp_path, 'wb') as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(compressor.compress(len(header).to_bytes(8, 'big')))
+            f.write(compressor.compress(header))
+            del header
+            for blob in blobs:
+                f.write(compressor.compress(blob))
+            f.write(compressor.flush())
+    return os.path.getsize(path)
+
+
+def read_session_snapshot(path):
+    """
+    读取并解压会话快照，返回保存时的状态字典；保存了节点表的文档在这里（后台线程）重建为 NodeTable，
+    损坏的节点表连同输出一起丢弃，恢复时重新解析
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+            raise ValueError('会话快照格式不正确或版本过旧')
+        payload = zlib.decompress(f.read())
+    header_size = int.from_bytes(payload[:8], 'big')
+    state = json.loads(payload[8:8 + header_size].decode('utf-8'))
+    base = 8 + header_size
+    view = memoryview(payload)
+    for saved in state.get('documents') or []:
+        info = saved.get('tree') if isinstance(saved, dict) else None
+        if info is None:
+            continue
+        try:
+            blobs = [view[base + start:base + start + size] for start, size in info['blobs']]
+            saved['tree'] = NodeTable.from_snapshot(info, blobs)
+        except (ValueError, TypeError, KeyError, IndexError, OverflowError) as e:
+            session_logger.warning('会话快照中的解析结果无法恢复：%s', e)
+            saved['tree'] = None
+            saved['output'] = None
+    return state
 
-        # 设置动画效果
-        self.setAnimated(True)
 
-    def populate_tree(self, json_data):
+class Document:
+    """
+    一个打开的文档
+    原始输入始终保留；解析结果和输出属于缓存，超出内存预算时可被释放，需要时重新解析
+    """
+
+    # 解析后的 Python 对象相对原始文本的膨胀倍数（粗略估计）
+    PARSED_SIZE_FACTOR = 8
+
+    # output_revision 的特殊值：结果对应尚未载入输入视图的 pending_input
+    RESULT_OF_PENDING_INPUT = -1
+
+    _next_id = 1
+
+    def __init__(self, title, format_type='JSON'):
+        self.doc_id = Document._next_id
+        Document._next_id += 1
+        self.title = title
+        self.format = format_type
+        self.input_document = None
+        self.pending_input = None
+        self.output_document = None
+        self.output = ''
+        self.data = None
+        # 解析结果对应的节点表（树形视图直接使用，不必再次展开）
+        self.table = None
+        # 输出和解析结果对应的输入修订号；None 表示结果不完整或来源未知，载入完成前见 RESULT_OF_PENDING_INPUT
+        self.output_revision = None
+        self.last_operation = None
+        self.evicted = False
+        # 输入文本的行首位置索引（随编辑修补）
+        self.line_index = None
+        # 正在后台完整处理（快速预览之后）的任务标记
+        self.quick_look_task = None
+        # 上次保存快照时的输入文本及其对应的文档修订号，未修改的文档无需再次取出文本
+        self.snapshot_input = ''
+        self.snapshot_revision = None
+
+    def input_size(self):
+        """
+        原始输入的字符数
+        """
+        if self.pending_input is not None:
+            return len(self.pending_input)
+        if self.input_document is not None:
+            return self.input_document.characterCount() - 1
+        return 0
+
+    def has_cache(self):
+        """
+        是否持有可释放的缓存
+        """
+        return bool(self.output) or self.data is not None or self.output_document is not None
+
+    def cache_size(self):
+        """
+        估算缓存（解析结果、输出字符串及其渲染文档）占用的字节数
+        """
+        size = 0
+        if self.output:
+            size += sys.getsizeof(self.output)
+        if self.output_document is not None:
+            # UTF-16 文本加上排版信息，按每字符 4 字节估算
+            size += self.output_document.characterCount() * 4
+        if self.data is not None:
+            size += self.input_size() * self.PARSED_SIZE_FACTOR
+        return size
+
+    def evict(self):
+        """
+        释放缓存，只保留原始输入；之后激活时按上次的操作重新生成
+        """
+        self.data = None
+        self.table = None
+        self.output = ''
+        self.output_document = None
+        self.output_revision = None
+        self.evicted = self.last_operation is not None
+
+
+class DocumentLRU:
+    """
+    按最近使用顺序管理文档缓存，总占用超过预算时释放最久未使用文档的缓存
+    """
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self._order = OrderedDict()
+
+    def add(self, document):
         """
-        填充树形视图数据
+        加入文档（视为最近使用）
         """
-        self.clear()
-
-        if json_data is None:
-            return
+        self._order[document.doc_id] = document
 
-        # 创建根节点
-        if isinstance(json_data, dict):
-            root_item = QTreeWidgetItem(["JSON Object", f"{len(json_data)} 项", "Object"])
-            self.addTopLevelItem(root_item)
-            self._add_dict_items(root_item, json_data)
-        elif isinstance(json_data, list):
-            root_item = QTreeWidgetItem(["JSON Array", f"{len(json_data)} 项", "Array"])
-            self.addTopLevelItem(root_item)
-            self._add_list_items(root_item, json_data)
-        else:
-            # 单个值
-            root_item = QTreeWidgetItem(["JSON Value", str(json_data), type(json_data).__name__])
-            self.addTopLevelItem(root_item)
-
-        # 展开根节点
-        self.expandToDepth(0)
-
-    def _add_dict_items(self, parent_item, data_dict):
-        """
-        添加字典项到树中
-        """
-        for key, value in data_dict.items():
-            if isinstance(value, dict):
-                item = QTreeWidgetItem([str(key), f"{len(value)} 项", "Object"])
-                parent_item.addChild(item)
-                self._add_dict_items(item, value)
-            elif isinstance(value, list):
-                item = QTreeWidgetItem([str(key), f"{len(value)} 项", "Array"])
-                parent_item.addChild(item)
-                self._add_list_items(item, value)
-            else:
-                # 处理值的显示
-                value_str = self._format_value(value)
-                value_type = type(value).__name__
-                item = QTreeWidgetItem([str(key), value_str, value_type])
-                parent_item.addChild(item)
-
-    def _add_list_items(self, parent_item, data_list):
-        """
-        添加列表项到树中
-        """
-        for index, value in enumerate(data_list):
-            if isinstance(value, dict):
-                item = QTreeWidgetItem([f"[{index}]", f"{len(value)} 项", "Object"])
-                parent_item.addChild(item)
-                self._add_dict_items(item, value)
-            elif isinstance(value, list):
-                item = QTreeWidgetItem([f"[{index}]", f"{len(value)} 项", "Array"])
-                parent_item.addChild(item)
-                self._add_list_items(item, value)
-            else:
-                # 处理值的显示
-                value_str = self._format_value(value)
-                value_type = type(value).__name__
-                item = QTreeWidgetItem([f"[{index}]", value_str, value_type])
-                parent_item.addChild(item)
-
-    def _format_value(self, value):
-        """
-        格式化值的显示
-        """
-        if value is None:
-            return "null"
-        elif isinstance(value, bool):
-            return "true" if value else "false"
-        elif isinstance(value, str):
-            # 限制字符串长度显示
-            if len(value) > 100:
-                return f'"{value[:97]}..."'
-            return f'"{value}"'
-        else:
-            return str(value)
+    def remove(self, document):
+        """
+        移除文档
+        """
+        self._order.pop(document.doc_id, None)
 
-    def get_selected_path(self):
+    def touch(self, document):
         """
-        获取选中项的路径
+        标记文档为最近使用
         """
-        current_item = self.currentItem()
-        if not current_item:
-            return []
+        if document.doc_id in self._order:
+            self._order.move_to_end(document.doc_id)
 
-        path = []
-        item = current_item
-        while item and item.parent():
-            path.insert(0, item.text(0))
-            item = item.parent()
+    def total_size(self):
+        """
+        所有文档缓存的估算总大小
+        """
+        return sum(document.cache_size() for document in self._order.values())
 
-        return path
+    def enforce(self, active_document):
+        """
+        超出预算时从最久未使用的文档开始释放缓存（当前文档除外），返回被释放的文档
+        """
+        evicted = []
+        total = self.total_size()
+        for document in list(self._order.values()):
+            if total <= self.budget_bytes:
+                break
+            if document is active_document or not document.has_cache():
+                continue
+            total -= document.cache_size()
+            document.evict()
+            evicted.append(document)
+        return evicted
 
 
-class XMLTreeWidget(QTreeWidget):
+class OperationProfiler:
     """
-    自定义XML树形视图组件
+    操作性能记录器
+    记录每个操作各阶段（解析、序列化、树填充、文本渲染、搜索、替换）的耗时、
+    峰值内存（tracemalloc）以及输入/输出大小，并写入滚动日志
     """
 
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setup_tree()
+    # 阶段名称对应的显示文本
+    STAGE_LABELS = {
+        'parse': '解析',
+        'serialize': '序列化',
+        'populate': '树填充',
+        'render': '渲染',
+        'search': '搜索',
+        'replace': '替换',
+        'infer': '推断',
+    }
+
+    def __init__(self, log_dir=None, track_memory=False):
+        self.track_memory = track_memory
+        self.profile_next = False
+        self.history = deque(maxlen=200)
+        self.on_finished = None
+        self._current = None
+        self.log_dir = log_dir
+        self.log_path = None
+        self._logger = None
+        if log_dir:
+            self._setup_logger(log_dir)
+
+    def _setup_logger(self, log_dir):
+        """
+        初始化滚动日志（单个文件 1MB，保留 3 个备份）
+        """
+        self.log_path = os.path.join(log_dir, 'operations.log')
+        logger = logging.getLogger('json_formatter.operations')
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        if not logger.handlers:
+            try:
+                handler = RotatingFileHandler(self.log_path, maxBytes=1024 * 1024,
+                                              backupCount=3, encoding='utf-8')
+                handler.setFormatter(logging.Formatter('%(message)s'))
+                logger.addHandler(handler)
+            except OSError:
+                # 日志目录不可写时仅在内存中保留记录
+                self.log_path = None
+                return
+        self._logger = logger
+
+    @contextmanager
+    def operation(self, name):
+        """
+        记录一次完整操作；嵌套调用时并入外层操作
+        """
+        if self._current is not None:
+            yield self._current
+            return
 
-    def setup_tree(self):
+        record = {
+            'operation': name,
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'stages': [],
+            'wall_ms': 0.0,
+            'peak_bytes': 0,
+            'input_size': 0,
+            'output_size': 0,
+        }
+
+        started_tracing = False
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started_tracing = True
+
+        profiler = None
+        if self.profile_next:
+            self.profile_next = False
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+        self._current = record
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['wall_ms'] = (time.perf_counter() - start) * 1000 - record.pop('paused_ms', 0.0)
+            if profiler is not None:
+                profiler.disable()
+                record['profile'] = self._dump_profile(profiler, name)
+            if tracemalloc.is_tracing():
+                record['peak_bytes'] = max(record['peak_bytes'], tracemalloc.get_traced_memory()[1])
+                if started_tracing:
+                    tracemalloc.stop()
+            if record['stages']:
+                record['input_size'] = record['input_size'] or record['stages'][0]['input_size']
+                record['output_size'] = record['output_size'] or next(
+                    (stage['output_size'] for stage in reversed(record['stages']) if stage['output_size']), 0)
+            self._current = None
+            self.history.append(record)
+            self._write_log(record)
+            if self.on_finished is not None:
+                self.on_finished(record)
+
+    @contextmanager
+    def stage(self, name, input_size=0):
+        """
+        记录操作中的一个阶段，调用方可在返回的字典中填写 output_size
+        """
+        with self.operation(self.STAGE_LABELS.get(name, name)) as record:
+            stage = {'name': name, 'input_size': input_size, 'output_size': 0,
+                     'wall_ms': 0.0, 'peak_bytes': 0}
+            tracing = tracemalloc.is_tracing()
+            base_memory = 0
+            if tracing:
+                # 记录本阶段前的峰值，再重置以单独统计本阶段
+                record['peak_bytes'] = max(record['peak_bytes'], tracemalloc.get_traced_memory()[1])
+                if hasattr(tracemalloc, 'reset_peak'):
+                    tracemalloc.reset_peak()
+                base_memory = tracemalloc.get_traced_memory()[0]
+            start = time.perf_counter()
+            try:
+                yield stage
+            finally:
+                stage['wall_ms'] = (time.perf_counter() - start) * 1000
+                if tracing and tracemalloc.is_tracing():
+                    peak = tracemalloc.get_traced_memory()[1]
+                    stage['peak_bytes'] = max(0, peak - base_memory)
+                    record['peak_bytes'] = max(record['peak_bytes'], peak)
+                record['stages'].append(stage)
+
+    def current_operation(self):
         """
-        设置树形视图的基本属性
+        当前正在进行的操作名称（可在其他线程读取）
         """
-        # 设置列标题
-        self.setHeaderLabels(["元素/属性", "值", "类型"])
+        record = self._current
+        return record['operation'] if record is not None else None
 
-        # 设置列宽
-        header = self.header()
-        header.setStretchLastSection(False)
-        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(1, QHeaderView.Stretch)
-        header.setSectionResizeMode(2, QHeaderView.ResizeToContents)
+    @contextmanager
+    def suspended(self):
+        """
+        暂停计时（例如等待用户关闭对话框），暂停期间不计入操作耗时
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self._current is not None:
+                paused = (time.perf_counter() - start) * 1000
+                self._current['paused_ms'] = self._current.get('paused_ms', 0.0) + paused
 
-        # 设置选择模式
-        self.setSelectionMode(QAbstractItemView.SingleSelection)
+    def _dump_profile(self, profiler, name):
+        """
+        保存 cProfile 结果到日志目录，返回文件路径
+        """
+        if not self.log_dir:
+            return None
+        path = os.path.join(self.log_dir, f"profile_{time.strftime('%Y%m%d_%H%M%S')}.prof")
+        try:
+            profiler.dump_stats(path)
+            # 同时生成可直接阅读的文本报告
+            with open(path[:-5] + '.txt', 'w', encoding='utf-8') as report:
+                report.write(f'操作：{name}\n\n')
+                stats = pstats.Stats(profiler, stream=report)
+                stats.sort_stats('cumulative').print_stats(40)
+        except OSError:
+            return None
+        return path
 
-        # 设置样式（与JSON树形视图相同）
-        self.setStyleSheet("""
-            QTreeWidget {
-                border: 2px solid #bdc3c7;
-                border-radius: 5px;
-                background-color: white;
-                font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
-                font-size: 24px;
-                alternate-background-color: #f8f9fa;
-            }
-            QTreeWidget::item {
-                padding: 6px;
-                border-bottom: 1px solid #ecf0f1;
-                height: 24px;
-            }
-            QTreeWidget::item:selected {
-                background-color: #3498db;
-                color: white;
-            }
-            QTreeWidget::item:hover {
-                background-color: #e8f4fd;
-            }
-            QTreeWidget::branch:has-children:!has-siblings:closed,
-            QTreeWidget::branch:closed:has-children:has-siblings {
-                border-image: none;
-                image: none;
-                background-color: #27ae60;
-                width: 18px;
-                height: 18px;
-                border-radius: 9px;
-                margin: 1px;
-                border: 2px solid #2ecc71;
-            }
-            QTreeWidget::branch:open:has-children:!has-siblings,
-            QTreeWidget::branch:open:has-children:has-siblings {
-                border-image: none;
-                image: none;
-                background-color: #e74c3c;
-                width: 18px;
-                height: 18px;
-                border-radius: 9px;
-                margin: 1px;
-                border: 2px solid #c0392b;
-            }
-            QTreeWidget::branch:has-children:!has-siblings:closed:hover,
-            QTreeWidget::branch:closed:has-children:has-siblings:hover {
-                background-color: #229954;
-                border: 2px solid #27ae60;
-            }
-            QTreeWidget::branch:open:has-children:!has-siblings:hover,
-            QTreeWidget::branch:open:has-children:has-siblings:hover {
-                background-color: #cb4335;
-                border: 2px solid #e74c3c;
-            }
-        """)
+    def _write_log(self, record):
+        """
+        以 JSON 行的形式写入滚动日志
+        """
+        if self._logger is None:
+            return
+        try:
+            self._logger.info(json.dumps(record, ensure_ascii=False))
+        except Exception:
+            # 日志写入失败不影响正常操作
+            pass
 
-        # 启用交替行颜色
-        self.setAlternatingRowColors(True)
+    def summarize(self, record):
+        """
+        生成适合状态栏显示的简短摘要
+        """
+        parts = [f"{self.STAGE_LABELS.get(stage['name'], stage['name'])} {stage['wall_ms']:.0f}ms"
+                 for stage in record['stages']]
+        summary = f"⏱ {record['operation']}：{record['wall_ms']:.0f}ms"
+        if parts:
+            summary += f"（{'，'.join(parts)}）"
+        if record['peak_bytes']:
+            summary += f" | 峰值 {format_size(record['peak_bytes'])}"
+        if record['input_size'] or record['output_size']:
+            summary += f" | {format_size(record['input_size'])} → {format_size(record['output_size'])}"
+        return summary
 
-        # 设置根节点装饰
-        self.setRootIsDecorated(True)
 
-        # 设置动画效果
-        self.setAnimated(True)
+class UIStallWatchdog:
+    """
+    界面卡顿监测器
+    GUI 线程通过定时器更新心跳，后台线程发现心跳超时后抓取 GUI 线程的 Python 调用栈
+    """
 
-    def populate_tree(self, xml_root):
+    # 卡顿时长直方图的分组边界（毫秒）
+    HISTOGRAM_EDGES = (200, 500, 1000, 2000, 5000)
+    # 单次卡顿最多保留的调用栈采样数
+    MAX_STACK_SAMPLES = 5
+
+    def __init__(self, threshold_ms=200, interval_ms=50, max_stalls=100):
+        self.threshold_ms = threshold_ms
+        self.interval_ms = interval_ms
+        self.operation_provider = None
+        self.stalls = deque(maxlen=max_stalls)
+        self.histogram = [0] * len(self.HISTOGRAM_EDGES)
+        self._gui_thread_id = threading.get_ident()
+        self._lock = threading.Lock()
+        self._last_beat = time.monotonic()
+        self._pending = None
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._timer = QTimer()
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self._beat)
+
+    def is_running(self):
         """
-        填充XML树形视图数据
+        监测线程是否正在运行
         """
-        self.clear()
+        return self._thread is not None and self._thread.is_alive()
 
-        if xml_root is None:
+    def start(self):
+        """
+        启动心跳定时器和监测线程
+        """
+        if self.is_running():
             return
+        self._last_beat = time.monotonic()
+        self._stop_event.clear()
+        self._timer.start()
+        self._thread = threading.Thread(target=self._run, name='UIStallWatchdog', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        停止监测
+        """
+        self._timer.stop()
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+        with self._lock:
+            self._pending = None
+
+    def clear(self):
+        """
+        清空卡顿记录和直方图
+        """
+        with self._lock:
+            self.stalls.clear()
+            self.histogram = [0] * len(self.HISTOGRAM_EDGES)
+
+    def _beat(self):
+        """
+        GUI 线程心跳；若刚从卡顿中恢复则记录本次卡顿
+        """
+        now = time.monotonic()
+        with self._lock:
+            pending = self._pending
+            self._pending = None
+            self._last_beat = now
+            if pending is None:
+                return
+            pending['duration_ms'] = round((now - pending.pop('_start')) * 1000, 1)
+            self.histogram[self._bucket_index(pending['duration_ms'])] += 1
+            self.stalls.append(pending)
+
+    def _bucket_index(self, duration_ms):
+        """
+        计算卡顿时长所属的直方图分组
+        """
+        index = 0
+        for i, edge in enumerate(self.HISTOGRAM_EDGES):
+            if duration_ms >= edge:
+                index = i
+        return index
+
+    def _run(self):
+        """
+        监测线程：检查心跳间隔，超过阈值时抓取 GUI 线程调用栈
+        """
+        while not self._stop_event.wait(self.interval_ms / 1000):
+            now = time.monotonic()
+            with self._lock:
+                blocked_ms = (now - self._last_beat) * 1000
+                if blocked_ms < self.threshold_ms:
+                    continue
+                pending = self._pending
+                if pending is None:
+                    operation = self.operation_provider() if self.operation_provider else None
+                    pending = {
+                        'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+                        'operation': operation,
+                        'stacks': [],
+                        '_start': self._last_beat,
+                    }
+                    self._pending = pending
+                # 卡顿期间按阈值间隔多次采样，便于判断时间消耗在哪个调用
+                samples = len(pending['stacks'])
+                if samples >= self.MAX_STACK_SAMPLES or blocked_ms < self.threshold_ms * (samples + 1):
+                    continue
+                frame = sys._current_frames().get(self._gui_thread_id)
+                if frame is not None:
+                    pending['stacks'].append({
+                        'blocked_ms': round(blocked_ms, 1),
+                        'stack': traceback.format_stack(frame),
+                    })
+
+    def histogram_labels(self):
+        """
+        直方图各分组的显示名称
+        """
+        labels = []
+        for i, edge in enumerate(self.HISTOGRAM_EDGES):
+            if i + 1 < len(self.HISTOGRAM_EDGES):
+                labels.append(f'{edge}-{self.HISTOGRAM_EDGES[i + 1]}ms')
+            else:
+                labels.append(f'≥{edge}ms')
+        # 阈值低于第一个分组边界时，第一个分组包含所有更短的卡顿
+        labels[0] = f'<{self.HISTOGRAM_EDGES[1]}ms'
+        return labels
+
+    def format_report(self):
+        """
+        生成可读的卡顿报告文本
+        """
+        with self._lock:
+            histogram = list(self.histogram)
+            stalls = list(self.stalls)
+        lines = [f'卡顿阈值：{self.threshold_ms}ms    已记录卡顿：{sum(histogram)} 次', '', '卡顿时长分布：']
+        peak = max(histogram) or 1
+        for label, count in zip(self.histogram_labels(), histogram):
+            lines.append(f'  {label:>12}  {"█" * round(count * 30 / peak):<30} {count}')
+        for stall in reversed(stalls):
+            lines.append('')
+            lines.append(f"[{stall['time']}] 卡顿 {stall['duration_ms']}ms"
+                         f"  操作：{stall['operation'] or '未知'}")
+            if stall['stacks']:
+                sample = stall['stacks'][-1]
+                lines.append(f"  调用栈（阻塞 {sample['blocked_ms']}ms 时）：")
+                lines.extend('  ' + line.rstrip('\n') for line in sample['stack'])
+        return '\n'.join(lines)
+
+    def export_report(self, path):
+        """
+        导出卡顿报告为 JSON 文件，便于附在问题反馈中
+        """
+        with self._lock:
+            report = {
+                'generated': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'python': sys.version,
+                'platform': platform.platform(),
+                'threshold_ms': self.threshold_ms,
+                'histogram': dict(zip(self.histogram_labels(), self.histogram)),
+                'stalls': list(self.stalls),
+            }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=4)
 
-        # 创建根节点
-        root_item = QTreeWidgetItem([xml_root.tag, xml_root.text or "", "Element"])
-        self.addTopLevelItem(root_item)
 
-        # 添加根元素的属性
-        if xml_root.attrib:
-            for attr_name, attr_value in xml_root.attrib.items():
-                attr_item = QTreeWidgetItem([f"@{attr_name}", attr_value, "Attribute"])
-                root_item.addChild(attr_item)
+class TreeExpandJob:
+    """
+    分批展开树形视图的任务
+    按广度优先顺序展开节点，每批之间让出事件循环，达到节点预算或深度上限时停止
+    """
 
-        # 递归添加子元素
-        self._add_xml_elements(root_item, xml_root)
+    def __init__(self, view, node_budget=100000, max_depth=0, slice_ms=30):
+        self.view = view
+        self.model = view.model()
+        self.node_budget = node_budget
+        self.max_depth = max_depth
+        self.slice_ms = slice_ms
+        self.on_progress = None
+        self.on_finished = None
+        self.revealed = 0
+        self.stop_reason = None
+        self._queue = deque()
+        self._timer = QTimer()
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._step)
+        # 树内容被重建时，已排队的索引失效，直接取消任务
+        self.model.modelAboutToBeReset.connect(self.cancel)
 
-        # 展开根节点
-        self.expandToDepth(0)
+    def is_running(self):
+        """
+        任务是否仍在进行
+        """
+        return self._timer.isActive()
 
-    def _add_xml_elements(self, parent_item, xml_element):
+    def start(self):
         """
-        递归添加XML元素到树中
+        从顶层节点开始展开
         """
-        for child in xml_element:
-            # 创建子元素节点
-            child_text = child.text.strip() if child.text else ""
-            child_item = QTreeWidgetItem([child.tag, child_text, "Element"])
-            parent_item.addChild(child_item)
+        for row in range(self.model.rowCount()):
+            self._queue.append((self.model.index(row, 0), 0))
+        self.revealed = self.model.rowCount()
+        self._timer.start()
 
-            # 添加子元素的属性
-            if child.attrib:
-                for attr_name, attr_value in child.attrib.items():
-                    attr_item = QTreeWidgetItem([f"@{attr_name}", attr_value, "Attribute"])
-                    child_item.addChild(attr_item)
+    def cancel(self):
+        """
+        取消展开任务
+        """
+        if not self._timer.isActive():
+            return
+        self._finish('cancelled')
 
-            # 递归处理子元素的子元素
-            if len(child) > 0:
-                self._add_xml_elements(child_item, child)
+    def _finish(self, reason):
+        """
+        结束任务并通知调用方
+        """
+        self._timer.stop()
+        self._queue.clear()
+        self.stop_reason = reason
+        try:
+            self.model.modelAboutToBeReset.disconnect(self.cancel)
+        except TypeError:
+            pass
+        if self.on_finished is not None:
+            self.on_finished(self)
 
-    def get_selected_path(self):
+    def _step(self):
         """
-        获取选中项的路径
+        在一个时间片内展开一批节点
         """
-        current_item = self.currentItem()
-        if not current_item:
-            return []
+        model = self.model
+        view = self.view
+        queue = self._queue
+        deadline = time.perf_counter() + self.slice_ms / 1000
+        reason = None
 
-        path = []
-        item = current_item
-        while item and item.parent():
-            path.insert(0, item.text(0))
-            item = item.parent()
+        # 延迟布局：本批次内的展开只记录状态，批次结束时统一布局一次
+        view.setUpdatesEnabled(False)
+        view.scheduleDelayedItemsLayout()
+        try:
+            while queue and time.perf_counter() < deadline:
+                index, depth = queue.popleft()
+                if depth >= (self.max_depth or MAX_VIEW_DEPTH):
+                    reason = 'depth'
+                    continue
+                if model.canFetchMore(index):
+                    model.fetchMore(index)
+                rows = model.rowCount(index)
+                if rows == 0:
+                    continue
+                if self.revealed + rows > self.node_budget:
+                    reason = 'budget'
+                    queue.clear()
+                    break
+                view.setExpanded(index, True)
+                self.revealed += rows
+                for row in range(rows):
+                    child = model.index(row, 0, index)
+                    if model.hasChildren(child):
+                        queue.append((child, depth + 1))
+        finally:
+            view.executeDelayedItemsLayout()
+            view.setUpdatesEnabled(True)
 
-        return path
+        if reason is not None:
+            self.stop_reason = reason
+        if self.on_progress is not None:
+            self.on_progress(self)
+        if not queue:
+            self._finish(self.stop_reason or 'done')
 
 
-class JSONFormatterApp(QMainWindow):
+def format_tree_value(value):
     """
-    JSON 格式化工具主窗口类
+    JSON 标量在树形视图中的显示文本
     """
+    if value is None:
+        return "null"
+    elif isinstance(value, bool):
+        return "true" if value else "false"
+    elif isinstance(value, str):
+        # 限制字符串长度显示
+        if len(value) > 100:
+            return f'"{value[:97]}..."'
+        return f'"{value}"'
+    else:
+        return str(value)
 
-    def __init__(self):
-        """
-        初始化主窗口
-        """
-        super().__init__()
-        # 初始化设置
-        self.settings = QSettings('JSONFormatter', 'FontSettings')
-        self.current_text_font_size = self.settings.value('text_font_size', 12, type=int)  # 文本编辑器字体
-        self.current_ui_font_size = self.settings.value('ui_font_size', 14, type=int)  # UI元素字体
-        self.temp_ui_font_size = self.current_ui_font_size  # 临时UI字体大小，用于保存前的预览
 
-        # 当前格式类型（JSON或XML）
-        self.current_format = 'JSON'
+# Qt 树形视图展开显示过深的层级时会崩溃（约 2 万层），展开和定位都不超过该深度
+MAX_VIEW_DEPTH = 10000
 
-        # 初始化搜索相关变量
-        self.input_search_widget = None
-        self.output_search_widget = None
-        self.input_replace_widget = None
-        self.output_replace_widget = None
-        self.current_search_text = ""
-        self.last_search_position = 0
-        self.search_results = []
-        self.current_result_index = -1
 
-        # 初始化JSON验证相关变量
-        self.json_error_format = QTextCharFormat()
-        self.json_error_format.setBackground(QColor(255, 200, 200))  # 浅红色背景
-        self.json_normal_format = QTextCharFormat()
-        self.json_normal_format.setBackground(QColor(255, 255, 255))  # 白色背景
-        # 移除实时验证相关变量
-        # self.validation_timer = QTimer()
-        # self.validation_timer.setSingleShot(True)
-        # self.validation_timer.timeout.connect(self.validate_json_input)
-        # self.last_json_error = None
+def collapse_tree_view(view, keep_top_level=True):
+    """
+    折叠树形视图：只遍历当前已展开的节点，耗时与可见行数成正比
+    """
+    model = view.model()
+    expanded = []
+    stack = [(model.index(row, 0), 0) for row in range(model.rowCount())]
+    while stack:
+        index, depth = stack.pop()
+        if not view.isExpanded(index):
+            continue
+        if depth > 0 or not keep_top_level:
+            expanded.append(index)
+        for row in range(model.rowCount(index)):
+            child = model.index(row, 0, index)
+            if model.hasChildren(child):
+                stack.append((child, depth + 1))
+
+    view.setUpdatesEnabled(False)
+    view.scheduleDelayedItemsLayout()
+    try:
+        for index in expanded:
+            view.setExpanded(index, False)
+    finally:
+        view.executeDelayedItemsLayout()
+        view.setUpdatesEnabled(True)
+    return len(expanded)
+
+
+def dump_json_pretty(value, sort_keys=False):
+    """
+    按工具统一的规则（4 空格缩进）美化 JSON 值
+    """
+    return json.dumps(value, indent=4, ensure_ascii=False, separators=(',', ': '), sort_keys=sort_keys)
 
-        self.init_ui()
-        self.setup_connections()
-        self.setup_shortcuts()
-        self.apply_font_size()
 
-    def init_ui(self):
-        """
-        初始化用户界面
-        """
-        # 设置窗口基本属性
-        self.setWindowTitle('离线 JSON/XML 格式化工具 v1.0')
-        self.setGeometry(100, 100, 1200, 800)
-        self.setMinimumSize(800, 600)
+def prettify_xml(element):
+    """
+    美化 XML 元素（4 空格缩进，移除空行），不包含元素自身的尾部文本
+    """
+    tail = element.tail
+    element.tail = None
+    try:
+        rough_string = ET.tostring(element, encoding='unicode')
+    finally:
+        element.tail = tail
+    # 使用minidom美化格式
+    reparsed = minidom.parseString(rough_string)
+    formatted_xml = reparsed.toprettyxml(indent="    ")
+    # 移除空行
+    lines = [line for line in formatted_xml.split('\n') if line.strip()]
+    return '\n'.join(lines)
+
+
+def sort_xml_element(element):
+    """
+    排序XML元素及其所有后代的属性和子元素（显式栈遍历，不受嵌套深度限制）
+    """
+    stack = [element]
+    while stack:
+        current = stack.pop()
+        # 排序属性（原地替换，保留文本和子元素）
+        attrib = current.attrib
+        if len(attrib) > 1:
+            sorted_attrib = sorted(attrib.items())
+            attrib.clear()
+            attrib.update(sorted_attrib)
+
+        # 按标签名排序子元素（稳定排序，同名元素保持原顺序）
+        if len(current):
+            # 注释和处理指令的 tag 不是字符串，排在同级元素之前
+            children = sorted(current, key=lambda x: x.tag if isinstance(x.tag, str) else '')
+            current[:] = children
+            stack.extend(children)
+
+
+def remove_xml_whitespace(element):
+    """
+    移除XML元素及其所有后代中的空白文本（Element.iter 为非递归遍历）
+    """
+    for current in element.iter():
+        # 注释和处理指令的 text 是其内容本身，不属于空白文本
+        if current.text and isinstance(current.tag, str):
+            current.text = current.text.strip() or None
+        if current.tail:
+            current.tail = current.tail.strip() or None
 
-        # 创建中央部件
-        central_widget = QWidget()
-        self.setCentralWidget(central_widget)
 
-        # 创建主布局
-        main_layout = QVBoxLayout(central_widget)
-        main_layout.setContentsMargins(10, 10, 10, 10)
-        main_layout.setSpacing(10)
+def format_xml_tree(xml_root, mode):
+    """
+    按处理方式（beautify/sort/minify）格式化解析好的 XML 树，排序时原地重排
+    各处理策略共用，保证输出一致
+    """
+    if mode == 'sort':
+        sort_xml_element(xml_root)
+    if mode == 'minify':
+        return minify_xml_element(xml_root)
+    return prettify_xml(xml_root)
 
-        # 创建标签页控件
-        self.tab_widget = QTabWidget()
-        main_layout.addWidget(self.tab_widget)
 
-        # 创建主功能标签页
-        main_tab = QWidget()
-        self.tab_widget.addTab(main_tab, "格式化工具")
+def minify_xml_element(element):
+    """
+    压缩 XML 元素为单行（移除空白和换行）
+    """
+    # 移除所有元素的空白文本
+    remove_xml_whitespace(element)
+    # 转换为字符串，不添加缩进
+    minified_xml = ET.tostring(element, encoding='unicode')
+    # 移除多余的空白字符
+    return ' '.join(minified_xml.split())
+
+
+# 压缩容器的文件头魔数
+COMPRESSION_MAGIC = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'BZh', 'bz2'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'PK\x03\x04', 'zip'),
+)
 
-        # 创建选项标签页
-        options_tab = QWidget()
-        self.tab_widget.addTab(options_tab, "选项设置")
+# 压缩格式对应的文件扩展名
+COMPRESSION_EXTENSIONS = {
+    'gzip': '.gz',
+    'bz2': '.bz2',
+    'xz': '.xz',
+    'zip': '.zip',
+}
 
-        # 设置主功能标签页布局
-        main_tab_layout = QVBoxLayout(main_tab)
-        main_tab_layout.setContentsMargins(10, 10, 10, 10)
-        main_tab_layout.setSpacing(10)
 
-        # 创建标题和格式选择区域
-        title_format_layout = QHBoxLayout()
-        
-        # 创建简化的标题标签（减少占用空间）
-        self.title_label = QLabel('格式化工具')
-        self.title_label.setAlignment(Qt.AlignCenter)
-        self.title_label.setStyleSheet("""
-            QLabel {
-                font-size: 14px;
-                font-weight: bold;
-                color: #2c3e50;
-                padding: 5px;
-                background-color: #ecf0f1;
-                border-radius: 3px;
-                margin-bottom: 5px;
-            }
-        """)
-        title_format_layout.addWidget(self.title_label)
+def detect_compression(path):
+    """
+    根据文件头魔数判断压缩格式，未压缩时返回 None
+    """
+    with open(path, 'rb') as f:
+        header = f.read(6)
+    for magic, compression in COMPRESSION_MAGIC:
+        if header.startswith(magic):
+            return compression
+    return None
 
-        # 添加格式选择下拉框
-        format_label = QLabel('格式类型：')
-        format_label.setStyleSheet("""
-            QLabel {
-                font-size: 16px;
-                font-weight: bold;
-                color: #2c3e50;
-                padding: 5px;
-            }
-        """)
-        title_format_layout.addWidget(format_label)
 
-        self.format_combo = QComboBox()
-        self.format_combo.addItems(['JSON', 'XML'])
-        self.format_combo.setCurrentText('JSON')
-        self.format_combo.setStyleSheet("""
-            QComboBox {
-                padding: 5px;
-                border: 1px solid #bdc3c7;
-                border-radius: 3px;
-                background-color: white;
-                min-width: 80px;
-            }
-            QComboBox:hover {
-                border-color: #3498db;
-            }
-            QComboBox::drop-down {
-                border: none;
-            }
-            QComboBox::down-arrow {
-                image: none;
-                border-left: 5px solid transparent;
-                border-right: 5px solid transparent;
-                border-top: 5px solid #2c3e50;
-                margin-right: 5px;
-            }
-        """)
-        self.format_combo.currentTextChanged.connect(self.on_format_changed)
-        title_format_layout.addWidget(self.format_combo)
+def compression_for_path(path):
+    """
+    根据保存路径的扩展名决定输出的压缩格式
+    """
+    lower_path = path.lower()
+    for compression, extension in COMPRESSION_EXTENSIONS.items():
+        if lower_path.endswith(extension):
+            return compression
+    return None
 
-        title_format_layout.addStretch()  # 添加弹性空间
 
-        main_tab_layout.addLayout(title_format_layout)
+def strip_compression_extension(path):
+    """
+    去掉压缩扩展名（data.json.gz -> data.json）
+    """
+    compression = compression_for_path(path)
+    if compression is None:
+        return path
+    return path[:-len(COMPRESSION_EXTENSIONS[compression])]
 
-        # 创建文本区域布局（增加拉伸因子，占用更多空间）
-        text_layout = self.create_text_area()
-        main_tab_layout.addLayout(text_layout, 1)  # 拉伸因子为1，占用主要空间
 
-        # 创建按钮区域（固定大小，不拉伸）
-        button_layout = self.create_button_area()
-        main_tab_layout.addLayout(button_layout, 0)  # 拉伸因子为0，保持固定大小
+def guess_text_format(path):
+    """
+    根据扩展名（忽略压缩扩展名）或内容开头判断文件是 JSON 还是 XML
+    """
+    extension = os.path.splitext(strip_compression_extension(path))[1].lower()
+    if extension == '.xml':
+        return 'XML'
+    if extension in ('.json', '.jsonl', '.ndjson'):
+        return 'JSON'
+    with open_text_input(path) as f:
+        head = f.read(1024).lstrip()
+    return 'XML' if head.startswith('<') else 'JSON'
+
+
+@contextmanager
+def open_binary_input(path):
+    """
+    以二进制流打开输入文件，压缩文件通过标准库解压器边读边解压
+    zip 压缩包读取其中第一个文件
+    """
+    compression = detect_compression(path)
+    if compression == 'gzip':
+        stream = gzip.open(path, 'rb')
+    elif compression == 'bz2':
+        stream = bz2.open(path, 'rb')
+    elif compression == 'xz':
+        stream = lzma.open(path, 'rb')
+    elif compression == 'zip':
+        archive = zipfile.ZipFile(path)
+        try:
+            names = [info.filename for info in archive.infolist() if not info.is_dir()]
+            if not names:
+                raise ValueError('zip 压缩包中没有文件')
+            stream = archive.open(names[0])
+        except Exception:
+            archive.close()
+            raise
+        try:
+            yield stream
+        finally:
+            stream.close()
+            archive.close()
+        return
+    else:
+        stream = open(path, 'rb')
+    with stream:
+        yield stream
 
-        # 设置选项标签页
-        self.setup_options_tab(options_tab)
 
-        # 创建状态栏
-        self.status_bar = QStatusBar()
-        self.setStatusBar(self.status_bar)
-        self.status_bar.showMessage('就绪')
+@contextmanager
+def open_text_input(path):
+    """
+    以 UTF-8 文本流打开输入文件（自动解压，忽略 BOM）
+    """
+    with open_binary_input(path) as stream:
+        yield io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
 
-        # 设置窗口样式
-        self.setStyleSheet("""
-            QMainWindow {
-                background-color: #f8f9fa;
-            }
-            QTextEdit {
-                border: 2px solid #bdc3c7;
-                border-radius: 5px;
-                padding: 10px;
-                font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
-                line-height: 1.4;
-                background-color: white;
-            }
-            QTextEdit:focus {
-                border-color: #3498db;
-            }
-            QPushButton {
-                background-color: #3498db;
-                color: white;
-                border: none;
-                padding: 10px 20px;
-                border-radius: 5px;
-                font-size: 14px;
-                font-weight: bold;
-                min-width: 100px;
-            }
-            QPushButton:hover {
-                background-color: #2980b9;
-            }
-            QPushButton:pressed {
-                background-color: #21618c;
-            }
-            QPushButton:disabled {
-                background-color: #bdc3c7;
-                color: #7f8c8d;
-            }
-        """)
 
-    def create_text_area(self):
-        """
-        创建文本输入输出区域
-        """
-        # 创建水平分割器
-        splitter = QSplitter(Qt.Horizontal)
+def iter_file_text(path, chunk_size=1024 * 1024):
+    """
+    分块读取（并解压）文本文件的生成器，任何时候只持有一块解压后的内容
+    """
+    with open_text_input(path) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
 
-        # 创建左侧输入区域
-        left_frame = QFrame()
-        left_layout = QVBoxLayout(left_frame)
-        left_layout.setContentsMargins(0, 0, 5, 0)
 
-        self.input_label = QLabel(f'输入 {self.current_format}：')
-        self.input_label.setStyleSheet("""
-            QLabel {
-                font-size: 14px;
-                font-weight: bold;
-                color: #2c3e50;
-                margin-bottom: 5px;
-            }
-        """)
-        left_layout.addWidget(self.input_label)
+@contextmanager
+def open_text_output(path, compression=None, chunk_size=1024 * 1024, member=None):
+    """
+    以 UTF-8 文本流打开输出文件，指定压缩格式时边写边压缩
+    zip 归档中的文件名和 gzip 头中记录的原文件名默认由路径得到，写入临时文件时由 member 指定
+    """
+    if compression == 'gzip' and member is not None:
+        with open(path, 'wb') as raw:
+            with gzip.GzipFile(filename=member, mode='wb', fileobj=raw) as binary:
+                with io.TextIOWrapper(binary, encoding='utf-8', newline='') as stream:
+                    yield stream
+        return
+    if compression == 'gzip':
+        stream = gzip.open(path, 'wt', encoding='utf-8', newline='')
+    elif compression == 'bz2':
+        stream = bz2.open(path, 'wt', encoding='utf-8', newline='')
+    elif compression == 'xz':
+        stream = lzma.open(path, 'wt', encoding='utf-8', newline='')
+    elif compression == 'zip':
+        archive = zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED)
+        try:
+            if member is None:
+                member = os.path.basename(strip_compression_extension(path))
+            with archive.open(member, 'w', force_zip64=True) as raw:
+                with io.TextIOWrapper(raw, encoding='utf-8', newline='') as stream:
+                    yield stream
+        finally:
+            archive.close()
+        return
+    else:
+        stream = open(path, 'w', encoding='utf-8', newline='', buffering=chunk_size)
+    with stream:
+        yield stream
 
-        # 创建输入文本框容器（用于嵌入搜索组件）
-        self.input_container = QFrame()
-        self.input_container.setStyleSheet("QFrame { border: 1px solid #bdc3c7; }")
-        input_container_layout = QVBoxLayout(self.input_container)
-        input_container_layout.setContentsMargins(0, 0, 0, 0)
-        input_container_layout.setSpacing(0)
 
-        self.input_text = QTextEdit()
-        self.input_text.setPlaceholderText(f'请在此处输入需要格式化的 {self.current_format} 数据...')
-        self.input_text.setStyleSheet("QTextEdit { border: none; }")
-        input_container_layout.addWidget(self.input_text)
+def write_text_file(path, text, chunk_size=1024 * 1024, compression=None):
+    """
+    以缓冲方式分块写入文本文件，避免一次性编码整个字符串产生额外副本
+    """
+    with open_text_output(path, compression, chunk_size) as f:
+        for start in range(0, len(text), chunk_size):
+            f.write(text[start:start + chunk_size])
+
+
+# JSON 词法单元：结构符号、字符串、数字和字面量（前导空白一并跳过）
+JSON_TOKEN_RE = re.compile(
+    r'[ \t\n\r]*(?:'
+    r'([{}\[\],:])'
+    r'|("[^"\\\x00-\x1f]*(?:\\(?:["\\/bfnrt]|u[0-9a-fA-F]{4})[^"\\\x00-\x1f]*)*")'
+    r'|(-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?|true|false|null)'
+    r')'
+)
+JSON_WHITESPACE_RE = re.compile(r'[ \t\n\r]*')
+# 可能延续数字或字面量的字符
+JSON_SCALAR_TAIL_RE = re.compile(r'[0-9A-Za-z.+-]*')
 
-        left_layout.addWidget(self.input_container)
 
-        # 创建右侧输出区域
-        right_frame = QFrame()
-        right_layout = QVBoxLayout(right_frame)
-        right_layout.setContentsMargins(5, 0, 0, 0)
+def iter_json_tokens(chunks, lookahead=64):
+    """
+    从文本块流中逐个产生 JSON 词法单元 (文本, 是否为结构符号)
+    跨块的字符串和数字会等待下一块补齐，只在内存中保留当前块
+    """
+    chunks = iter(chunks)
+    buffer = ''
+    position = 0
+    offset = 0
+    exhausted = False
+    while True:
+        # 靠近缓冲区末尾的词法单元可能被块边界截断，留到读入下一块后重新匹配
+        limit = len(buffer) if exhausted else len(buffer) - lookahead
+        match = JSON_TOKEN_RE.scanner(buffer, position).match
+        token_match = match()
+        while token_match is not None and token_match.end() <= limit:
+            position = token_match.end()
+            if token_match.lastindex == 1:
+                yield token_match.group(1), True
+            else:
+                yield token_match.group(token_match.lastindex), False
+            token_match = match()
+        if token_match is not None:
+            if exhausted:
+                position = token_match.end()
+                yield token_match.group(token_match.lastindex), token_match.lastindex == 1
+                continue
+            # 单个词法单元超过预读长度时，只有完整匹配（后面还有其他字符）才算完成
+            tail_end = JSON_SCALAR_TAIL_RE.match(buffer, token_match.end()).end()
+            if tail_end < len(buffer) and (token_match.lastindex != 3 or tail_end == token_match.end()):
+                position = token_match.end()
+                yield token_match.group(token_match.lastindex), token_match.lastindex == 1
+                continue
+        if exhausted:
+            end = JSON_WHITESPACE_RE.match(buffer, position).end()
+            if end == len(buffer):
+                return
+            raise ValueError(f'第 {offset + end + 1} 个字符处存在无效的 JSON 内容')
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+        else:
+            offset += position
+            buffer = buffer[position:] + chunk
+            position = 0
 
-        self.output_label = QLabel(f'输出 {self.current_format}：')
-        self.output_label.setStyleSheet("""
-            QLabel {
-                font-size: 14px;
-                font-weight: bold;
-                color: #2c3e50;
-                margin-bottom: 5px;
-            }
-        """)
-        right_layout.addWidget(self.output_label)
 
-        # 创建输出区域选项卡
-        self.output_tab_widget = QTabWidget()
-        self.output_tab_widget.setStyleSheet("""
-            QTabWidget::pane {
-                border: 1px solid #bdc3c7;
-                background-color: white;
-            }
-            QTabWidget::tab-bar {
-                alignment: left;
-            }
-            QTabBar::tab {
-                background-color: #ecf0f1;
-                padding: 8px 16px;
-                margin-right: 2px;
-                border-top-left-radius: 4px;
-                border-top-right-radius: 4px;
-            }
-            QTabBar::tab:selected {
-                background-color: #3498db;
-                color: white;
-            }
-            QTabBar::tab:hover {
-                background-color: #d5dbdb;
-            }
-        """)
+def normalize_json_scalar(token):
+    """
+    把字符串和数字写成与 json.dumps 相同的形式（转义、浮点数表示）
+    """
+    if token[0] == '"':
+        if '\\' not in token:
+            return token
+        return json.dumps(json.loads(token), ensure_ascii=False)
+    if token[0] in 'tfn' or (token != '-0' and not any(c in token for c in '.eE')):
+        return token
+    return json.dumps(json.loads(token))
+
+
+def iter_json_reformat(chunks, indent=4):
+    """
+    流式重排 JSON：不构建对象树，逐个词法单元输出美化（indent）或压缩（indent=None）的文本
+    内存占用只与嵌套深度有关；输出与 dump_json_pretty / 压缩结果一致（重复键原样保留）
+    """
+    key_separator = ':' if indent is None else ': '
+    stack = []
+    parts = []
+    # 期望的下一个词法单元：value / key / colon / next（逗号或结束）
+    expect = 'value'
+    opened = None
+    finished = False
+    for token, is_punctuation in iter_json_tokens(chunks):
+        if finished:
+            raise ValueError('JSON 数据之后存在多余内容')
+        if opened is not None:
+            # 刚打开的容器：紧跟结束符时输出空容器，否则换行缩进
+            if is_punctuation and token == (']' if opened == '[' else '}'):
+                parts.append(opened + token)
+                stack.pop()
+                opened = None
+                expect = 'next'
+                if not stack:
+                    finished = True
+                continue
+            parts.append(opened)
+            if indent is not None:
+                parts.append('\n' + ' ' * (indent * len(stack)))
+            opened = None
+
+        if expect == 'next':
+            if not is_punctuation or not stack:
+                raise ValueError('JSON 值之间缺少逗号')
+            closing = ']' if stack[-1] == '[' else '}'
+            if token == ',':
+                parts.append(',')
+                if indent is not None:
+                    parts.append('\n' + ' ' * (indent * len(stack)))
+                expect = 'value' if stack[-1] == '[' else 'key'
+                continue
+            if token != closing:
+                raise ValueError(f'期望 "," 或 "{closing}"，实际为 "{token}"')
+            stack.pop()
+            if indent is not None:
+                parts.append('\n' + ' ' * (indent * len(stack)))
+            parts.append(token)
+            if not stack:
+                finished = True
+        elif expect == 'key':
+            if is_punctuation or token[0] != '"':
+                raise ValueError('对象的键必须是字符串')
+            parts.append(normalize_json_scalar(token))
+            expect = 'colon'
+        elif expect == 'colon':
+            if token != ':' or not is_punctuation:
+                raise ValueError('对象的键之后缺少冒号')
+            parts.append(key_separator)
+            expect = 'value'
+        else:
+            if is_punctuation:
+                if token not in '[{':
+                    raise ValueError(f'期望 JSON 值，实际为 "{token}"')
+                stack.append(token)
+                opened = token
+                expect = 'value' if token == '[' else 'key'
+            else:
+                parts.append(normalize_json_scalar(token))
+                expect = 'next'
+                if not stack:
+                    finished = True
+        if len(parts) >= 8192:
+            yield ''.join(parts)
+            parts = []
+
+    if not finished:
+        raise ValueError('JSON 数据不完整')
+    if parts:
+        yield ''.join(parts)
+
+
+def iter_json_array_items(chunks):
+    """
+    流式解析顶层数组，逐个产生元素的 Python 值
+    只在内存中保留当前元素的词法单元，元素本身交给 json.loads 解析
+    """
+    tokens = iter_json_tokens(chunks)
+    if next(tokens, None) != ('[', True):
+        raise ValueError('顶层不是 JSON 数组')
+    depth = 0
+    element = []
+    after_comma = False
+    for token, is_punctuation in tokens:
+        if is_punctuation and depth == 0 and token in ',]}':
+            if token == '}':
+                raise ValueError('数组中出现了多余的 "}"')
+            if element:
+                # 词法单元之间用空格连接，缺少逗号等错误由 json.loads 报告
+                yield json.loads(' '.join(element))
+                element = []
+            elif token == ',' or after_comma:
+                raise ValueError('数组中存在多余的逗号')
+            if token == ']':
+                if next(tokens, None) is not None:
+                    raise ValueError('JSON 数据之后存在多余内容')
+                return
+            after_comma = True
+            continue
+        if is_punctuation:
+            if token in '[{':
+                depth += 1
+            elif token in ']}':
+                depth -= 1
+        element.append(token)
+    raise ValueError('JSON 数据不完整')
+
+
+def iter_text_chunks(text, chunk_size, first_chunk_size=None):
+    """
+    按行边界切分文本的生成器（单行过长时直接按大小切分）
+    """
+    length = len(text)
+    position = 0
+    size = first_chunk_size or chunk_size
+    while position < length:
+        end = min(position + size, length)
+        if end < length:
+            newline = text.rfind('\n', position, end)
+            if newline > position:
+                end = newline + 1
+        yield text[position:end]
+        position = end
+        size = chunk_size
+
+
+def utf8_length(text):
+    """
+    文本按 UTF-8 编码后的字节数
+    """
+    return len(text) if text.isascii() else len(text.encode('utf-8'))
+
+
+# BMP 以外的字符在 Qt 文本位置中占两个 UTF-16 单元
+ASTRAL_CHAR_RE = re.compile('[\U00010000-\U0010ffff]')
+
+
+def utf16_length(text):
+    """
+    文本的 UTF-16 长度（与 QTextCursor 位置的单位一致）
+    """
+    if ASTRAL_CHAR_RE.search(text) is None:
+        return len(text)
+    return len(text.encode('utf-16-le')) // 2
+
+
+class LineIndex:
+    """
+    文本文档的行首位置索引：第 i 行（从 0 计）行首的位置，与 QTextCursor 位置一致（按 UTF-16 单元计）
+    行列号与位置的换算都是二分查找；第一次查询时才构建，之后随 contentsChange 就地修补：
+    只替换编辑范围内的行首，编辑点之后各行的平移量延迟累加，在相近位置连续输入时每次修补只涉及两次编辑之间的行
+    """
+
+    def __init__(self, document):
+        self.document = document
+        self.starts = None
+        self.length = 0
+        # starts[shift_from:] 中保存的值还要加上 shift 才是实际位置
+        self.shift_from = 0
+        self.shift = 0
+        document.contentsChange.connect(self.on_contents_change)
+
+    @staticmethod
+    def build_starts(text):
+        """
+        文本中每一行行首的位置（UTF-16 单元）
+        """
+        lines = text.split('\n')
+        if ASTRAL_CHAR_RE.search(text) is None:
+            lengths = map(len, lines)
+        else:
+            lengths = map(utf16_length, lines)
+        starts = array('q', accumulate(map(add, lengths, repeat(1)), initial=0))
+        starts.pop()
+        return starts
+
+    def ensure(self):
+        """
+        需要时（第一次查询或无法修补之后）从文档文本重建索引
+        """
+        if self.starts is None:
+            self.starts = self.build_starts(self.document.toPlainText())
+            self.length = self.document.characterCount() - 1
+            self.shift_from = len(self.starts)
+            self.shift = 0
+        return self.starts
+
+    def _settle(self, line):
+        """
+        移动延迟平移的分界到 line：只落实两次分界之间的行
+        """
+        starts = self.starts
+        shift = self.shift
+        for i in range(self.shift_from, line):
+            starts[i] += shift
+        for i in range(line, self.shift_from):
+            starts[i] -= shift
+        self.shift_from = line
+
+    def line_count(self):
+        """
+        总行数
+        """
+        return len(self.ensure())
+
+    def line_start(self, line):
+        """
+        第 line 行（从 0 计）行首的位置
+        """
+        starts = self.ensure()
+        return starts[line] + (self.shift if line >= self.shift_from else 0)
+
+    def line_of(self, position):
+        """
+        位置所在的行（从 0 计）
+        """
+        starts = self.ensure()
+        split = self.shift_from
+        if split < len(starts) and position >= starts[split] + self.shift:
+            return bisect_right(starts, position - self.shift, split) - 1
+        return bisect_right(starts, position, 0, split) - 1
+
+    def line_column(self, position):
+        """
+        位置对应的行号和列号（均从 1 计，列号按 UTF-16 单元计）
+        """
+        line = self.line_of(position)
+        return line + 1, position - self.line_start(line) + 1
+
+    def position(self, line, column=1):
+        """
+        行号和列号（均从 1 计）对应的位置，超出范围时取最近的有效位置
+        """
+        count = self.line_count()
+        line = min(max(line, 1), count) - 1
+        start = self.line_start(line)
+        end = self.line_start(line + 1) - 1 if line + 1 < count else self.length
+        return min(start + max(column, 1) - 1, end)
+
+    def on_contents_change(self, position, removed, added):
+        """
+        文档内容变化后修补索引：删除被删范围内的行首，插入新文本中的行首，之后的行整体平移
+        """
+        if self.starts is None:
+            return
+        length = self.document.characterCount() - 1
+        delta = added - removed
+        # 整体替换（如载入新内容）或与记录不符的变化直接重建
+        if (self.length + delta != length or position + added > length
+                or added > 4096 and added > length // 2):
+            self.starts = None
+            return
+
+        starts = self.starts
+        line = self.line_of(position)
+        self._settle(line + 1)
+        end = bisect_right(starts, position + removed - self.shift, line + 1)
+        inserted = ()
+        if added:
+            cursor = QTextCursor(self.document)
+            cursor.setPosition(position)
+            cursor.setPosition(position + added, QTextCursor.KeepAnchor)
+            # 选中文本中的段落分隔符为 U+2029
+            text = cursor.selectedText()
+            if '\u2029' in text:
+                inserted = self.build_starts(text.replace('\u2029', '\n'))[1:]
+        self.shift += delta
+        offset = position - self.shift
+        starts[line + 1:end] = array('q', [start + offset for start in inserted])
+        self.length = length
+
+
+class TextMarkers:
+    """
+    文本框的标记层：错误位置、搜索命中等以 ExtraSelection 叠加显示，不修改文档的字符格式，也不进入撤销栈
+    各层分别设置和清除，代价与标记数成正比；标记的光标随编辑自动移动
+    """
+
+    def __init__(self, text_edit):
+        self.text_edit = text_edit
+        self.layers = {}
+
+    def set_layer(self, name, ranges, char_format):
+        """
+        用一组 (起始位置, 结束位置) 替换某一层的标记
+        """
+        document = self.text_edit.document()
+        length = document.characterCount() - 1
+        selections = []
+        for start, end in ranges:
+            selection = QTextEdit.ExtraSelection()
+            selection.cursor = QTextCursor(document)
+            selection.cursor.setPosition(min(start, length))
+            selection.cursor.setPosition(min(end, length), QTextCursor.KeepAnchor)
+            selection.format = char_format
+            selections.append(selection)
+        self.layers[name] = selections
+        self._apply()
+
+    def clear_layer(self, name):
+        """
+        清除某一层的标记
+        """
+        if self.layers.pop(name, None) is not None:
+            self._apply()
+
+    def clear(self):
+        """
+        清除所有标记（文本框切换文档时，旧文档上的标记随之失效）
+        """
+        if self.layers:
+            self.layers = {}
+            self._apply()
+
+    def _apply(self):
+        self.text_edit.setExtraSelections([selection for layer in self.layers.values() for selection in layer])
+
+
+class NDJSONTail:
+    """
+    增量读取不断增长的 JSON Lines 文件：记住已读到的字节偏移，每次只读取并解析新追加的完整行
+    末尾未写完的行留到下次；文件被截断或替换（日志轮转）时从头开始读
+    """
+
+    def __init__(self, path, start_bytes=None):
+        self.path = path
+        stat = os.stat(path)
+        self.identity = (stat.st_dev, stat.st_ino)
+        self.offset = 0
+        self.pending = b''
+        self.rotated = False
+        # 从文件末尾附近开始时，第一行可能不完整，需要跳过
+        self.skip_partial = False
+        if start_bytes is not None and stat.st_size > start_bytes:
+            self.offset = stat.st_size - start_bytes
+            self.skip_partial = True
+
+    def has_more(self):
+        """
+        文件中是否还有未读取的内容
+        """
+        try:
+            return os.path.getsize(self.path) > self.offset
+        except OSError:
+            return False
+
+    def read_new(self, max_bytes):
+        """
+        读取最多 max_bytes 字节的新内容，返回其中完整行的 [(解析结果, 显示文本, 错误信息)]
+        无法解析的行原样作为显示文本，解析结果为该行的字符串
+        """
+        stat = os.stat(self.path)
+        identity = (stat.st_dev, stat.st_ino)
+        self.rotated = identity != self.identity or stat.st_size < self.offset
+        if self.rotated:
+            self.identity = identity
+            self.offset = 0
+            self.pending = b''
+            self.skip_partial = False
+        if stat.st_size <= self.offset:
+            return []
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(min(stat.st_size - self.offset, max_bytes))
+        self.offset += len(data)
+        lines = (self.pending + data).split(b'\n')
+        self.pending = lines.pop()
+        if self.skip_partial and lines:
+            del lines[0]
+            self.skip_partial = False
+
+        entries = []
+        for raw in lines:
+            line = raw.rstrip(b'\r').decode('utf-8', errors='replace')
+            if not line.strip():
+                continue
+            try:
+                value = json.loads(line)
+            except ValueError as e:
+                entries.append((line, line, str(e)))
+                continue
+            entries.append((value, dump_json_pretty(value), None))
+        return entries
+
+
+class FileFollower(QObject):
+    """
+    跟踪模式：文件变化（QFileSystemWatcher）或定时轮询时读取新追加的完整行，只保留最近 window 条记录
+    records_read 信号送出新记录和因超出窗口而移出的旧记录在输出中占用的字符数（UTF-16）
+    """
+
+    records_read = pyqtSignal(list, int)
+    rotated = pyqtSignal()
+
+    # 轮询间隔（有些文件系统不发送变化通知）
+    POLL_MS = 1000
+    # 每次最多读取的字节数，剩余部分在下一个事件循环中继续读取
+    READ_LIMIT = 2 * 1024 * 1024
+    # 开始跟踪时从文件末尾往前读取的字节数
+    START_BYTES = 256 * 1024
+
+    def __init__(self, path, window, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.tail = NDJSONTail(path, self.START_BYTES)
+        self.records = deque()
+        self.window = window
+        self.total = 0
+        self.errors = 0
+        # 移出窗口的记录数（用于换算树形视图中节点的下标）
+        self.dropped = 0
+        self.watcher = QFileSystemWatcher([path], self)
+        self.watcher.fileChanged.connect(self.schedule_read)
+        self.read_timer = QTimer(self)
+        self.read_timer.setSingleShot(True)
+        self.read_timer.setInterval(0)
+        self.read_timer.timeout.connect(self.read)
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(self.POLL_MS)
+        self.poll_timer.timeout.connect(self.schedule_read)
+
+    def start(self):
+        """
+        读取文件末尾的已有内容并开始跟踪
+        """
+        self.poll_timer.start()
+        self.read()
+
+    def stop(self):
+        """
+        停止跟踪
+        """
+        self.poll_timer.stop()
+        self.read_timer.stop()
+        self.watcher.removePaths(self.watcher.files())
+
+    def schedule_read(self):
+        """
+        合并短时间内的多次变化通知，在下一个事件循环中读取一次
+        """
+        if not self.read_timer.isActive():
+            self.read_timer.start()
+
+    def read(self):
+        """
+        读取新追加的完整行，超出窗口的旧记录移出
+        """
+        try:
+            entries = self.tail.read_new(self.READ_LIMIT)
+        except OSError:
+            # 轮转时文件可能暂时不存在，下次轮询再试
+            return
+        if self.tail.rotated:
+            self.rotated.emit()
+        # 替换后的文件需要重新监视
+        if self.path not in self.watcher.files() and os.path.exists(self.path):
+            self.watcher.addPath(self.path)
+        if self.tail.has_more():
+            self.read_timer.start()
+        if not entries:
+            return
+
+        self.total += len(entries)
+        self.errors += sum(1 for entry in entries if entry[2] is not None)
+        if len(entries) > self.window:
+            self.dropped += len(entries) - self.window
+            entries = entries[-self.window:]
+        removed = 0
+        while self.records and len(self.records) + len(entries) > self.window:
+            removed += utf16_length(self.records.popleft()[1]) + 1
+            self.dropped += 1
+        self.records.extend(entries)
+        self.records_read.emit(entries, removed)
+
+    def set_window(self, window):
+        """
+        修改窗口大小（缩小时在下次读取新记录时生效）
+        """
+        self.window = max(1, window)
+
+    def values(self):
+        """
+        窗口中各记录的解析结果
+        """
+        return [entry[0] for entry in self.records]
+
+    def text(self):
+        """
+        窗口中所有记录的显示文本
+        """
+        return ''.join(entry[1] + '\n' for entry in self.records)
+
+
+class ProgressiveTextRenderer:
+    """
+    大文本渐进式渲染器
+    首屏内容立即显示，其余内容在后续事件循环中分块追加，已加载部分可正常滚动和搜索
+    """
+
+    # 首屏显示的字符数
+    FIRST_CHUNK_SIZE = 64 * 1024
+    # 后续每块的字符数
+    CHUNK_SIZE = 32 * 1024
+
+    def __init__(self, text_edit, slice_ms=20):
+        self.text_edit = text_edit
+        self.slice_ms = slice_ms
+        self.on_progress = None
+        self.on_finished = None
+        self.on_failed = None
+        self.loaded = 0
+        self.total = 0
+        self.document = None
+        self._chunks = None
+        self._timer = QTimer()
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._step)
+
+    def is_running(self):
+        """
+        是否仍有内容未加载
+        """
+        return self._timer.isActive()
+
+    def render(self, text):
+        """
+        显示文本：立即显示首屏，其余部分分块追加
+        """
+        self.cancel()
+        # 记住目标文档：切换文档后剩余内容仍追加到原文档
+        self.document = self.text_edit.document()
+        self.total = len(text)
+        if self.total <= self.FIRST_CHUNK_SIZE:
+            self.text_edit.setPlainText(text)
+            self.loaded = self.total
+            return
+        self._chunks = iter_text_chunks(text, self.CHUNK_SIZE, self.FIRST_CHUNK_SIZE)
+        first = next(self._chunks)
+        self.text_edit.setPlainText(first)
+        self.loaded = len(first)
+        self._timer.start()
+
+    def render_chunks(self, chunks, total=0):
+        """
+        显示文本块流（如边读边解压的文件）：首个时间片内的内容立即显示，其余分块追加
+        不预先拼接完整文本，读取失败时通过 on_failed 通知
+        """
+        self.cancel()
+        self.document = self.text_edit.document()
+        self.total = total
+        self.loaded = 0
+        self.text_edit.setPlainText('')
+        self._chunks = iter(chunks)
+        self._timer.start()
+        self._step()
+
+    def cancel(self):
+        """
+        停止追加剩余内容
+        """
+        self._timer.stop()
+        # 关闭生成器，及时释放其持有的文件
+        if self._chunks is not None and hasattr(self._chunks, 'close'):
+            self._chunks.close()
+        self._chunks = None
+
+    def finish_now(self):
+        """
+        立即加载全部剩余内容
+        """
+        if not self.is_running():
+            return
+        self._append(float('inf'))
+
+    def load_until(self, count):
+        """
+        立即加载到至少 count 个字符（用于恢复滚动位置），其余部分继续渐进加载
+        """
+        if self.is_running() and self.loaded < count:
+            self._append(float('inf'), count)
+
+    def _step(self):
+        """
+        在一个时间片内追加若干块
+        """
+        self._append(time.perf_counter() + self.slice_ms / 1000)
+
+    def _append(self, deadline, until=None):
+        """
+        追加内容直到时间片用完、已加载 until 个字符或全部加载完成
+        """
+        cursor = QTextCursor(self.document)
+        cursor.movePosition(QTextCursor.End)
+        finished = False
+        # 每个时间片至少追加一块，保证总能向前推进
+        while True:
+            try:
+                chunk = next(self._chunks, None)
+            except Exception as e:
+                self.cancel()
+                if self.on_failed is None:
+                    raise
+                self.on_failed(self, e)
+                return
+            if chunk is None:
+                finished = True
+                break
+            cursor.insertText(chunk)
+            self.loaded += len(chunk)
+            if time.perf_counter() >= deadline or (until is not None and self.loaded >= until):
+                break
+
+        if finished:
+            self.cancel()
+            if self.on_finished is not None:
+                self.on_finished(self)
+        elif self.on_progress is not None:
+            self.on_progress(self)
+
+
+# 表格中缺失的键（与 null 区分）
+_MISSING = object()
+
+
+class TableColumn:
+    """
+    对象数组中一个键对应的列，按值类型选择紧凑的存储方式：
+    整数/浮点数使用 array，布尔值使用 bytearray，重复较多的字符串使用字典编码，
+    null 和缺失的键记录在单独的状态数组中
+    """
+
+    # 状态数组中的取值
+    VALUE, NULL, MISSING = 0, 1, 2
+
+    # 存储类型的显示名称
+    KIND_LABELS = {
+        'int': '整数',
+        'float': '浮点数',
+        'bool': '布尔',
+        'str': '字符串',
+        'category': '字符串（字典编码）',
+        'mixed': '混合类型',
+        'null': '全部为空',
+    }
+
+    # 单元格显示的最大字符数
+    DISPLAY_LIMIT = 200
+
+    def __init__(self, name, values):
+        self.name = name
+        self.length = len(values)
+        self.categories = None
+        value_types = set(map(type, values))
+        self.states = None
+        if type(None) in value_types or object in value_types:
+            self.states = bytearray(
+                self.NULL if value is None else self.MISSING if value is _MISSING else self.VALUE
+                for value in values)
+        value_types.discard(type(None))
+        value_types.discard(object)
+
+        self.kind = 'mixed'
+        if not value_types:
+            self.kind = 'null'
+            self.data = None
+        elif value_types == {int}:
+            try:
+                self.data = array('q', (value if type(value) is int else 0 for value in values))
+                self.kind = 'int'
+            except OverflowError:
+                pass
+        elif value_types == {float}:
+            self.data = array('d', (value if type(value) is float else 0.0 for value in values))
+            self.kind = 'float'
+        elif value_types == {bool}:
+            self.data = bytearray(value is True for value in values)
+            self.kind = 'bool'
+        elif value_types == {str}:
+            codes = {}
+            for value in values:
+                if type(value) is str and value not in codes:
+                    codes[value] = len(codes)
+                    if len(codes) > max(16, self.length // 4):
+                        break
+            if len(codes) <= max(16, self.length // 4):
+                self.kind = 'category'
+                self.categories = list(codes)
+                self.data = array('I', (codes.get(value, 0) for value in values))
+            else:
+                self.kind = 'str'
+                self.data = [value if type(value) is str else '' for value in values]
+        if self.kind == 'mixed':
+            self.data = list(values)
+
+    def state(self, row):
+        """
+        单元格状态：有值 / null / 缺失
+        """
+        return self.states[row] if self.states is not None else self.VALUE
+
+    def value(self, row):
+        """
+        取出单元格的原始值（null 和缺失都返回 None）
+        """
+        if self.state(row) != self.VALUE:
+            return None
+        if self.kind == 'bool':
+            return bool(self.data[row])
+        if self.kind == 'category':
+            return self.categories[self.data[row]]
+        return self.data[row]
+
+    def display(self, row):
+        """
+        单元格的显示文本
+        """
+        state = self.state(row)
+        if state == self.MISSING:
+            return ''
+        if state == self.NULL:
+            return 'null'
+        value = self.value(row)
+        if self.kind == 'bool' or isinstance(value, bool):
+            return 'true' if value else 'false'
+        if isinstance(value, (dict, list)):
+            text = json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+        else:
+            text = str(value)
+        if len(text) > self.DISPLAY_LIMIT:
+            return text[:self.DISPLAY_LIMIT - 3] + '...'
+        return text
+
+    def memory_size(self):
+        """
+        列存储占用的字节数（不含字符串对象本身）
+        """
+        size = len(self.states) if self.states is not None else 0
+        if isinstance(self.data, array):
+            size += len(self.data) * self.data.itemsize
+        elif isinstance(self.data, bytearray):
+            size += len(self.data)
+        elif self.data is not None:
+            size += sys.getsizeof(self.data)
+        return size
+
+    def sort_order(self, descending=False):
+        """
+        直接在列数据上排序，返回行号数组；null 和缺失的行总是排在最后
+        """
+        if self.states is None:
+            rows = range(self.length)
+            empty_rows = []
+        else:
+            states = self.states
+            rows = [row for row in range(self.length) if not states[row]]
+            empty_rows = ([row for row in range(self.length) if states[row] == self.NULL]
+                          + [row for row in range(self.length) if states[row] == self.MISSING])
+
+        if self.kind == 'category':
+            # 只对去重后的字符串排序，再按编码的名次排序行
+            ranks = [0] * len(self.categories)
+            for rank, code in enumerate(sorted(range(len(self.categories)), key=self.categories.__getitem__)):
+                ranks[code] = rank
+            codes = self.data
+            key = lambda row: ranks[codes[row]]
+        elif self.kind == 'mixed':
+            data = self.data
+            key = lambda row: self._mixed_sort_key(data[row])
+        elif self.kind == 'null':
+            key = None
+        else:
+            key = self.data.__getitem__
+
+        ordered = sorted(rows, key=key, reverse=descending) if key is not None else list(rows)
+        return array('L', ordered + empty_rows)
+
+    @staticmethod
+    def _mixed_sort_key(value):
+        """
+        混合类型列的排序键：先按类型分组，再按值排序
+        """
+        if isinstance(value, bool):
+            return 0, int(value), ''
+        if isinstance(value, (int, float)):
+            return 1, value, ''
+        if isinstance(value, str):
+            return 2, 0, value
+        return 3, 0, json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+
+class ColumnarTable:
+    """
+    对象数组（[{...}, {...}, ...]）的列式存储：每个键一列，不保留按行组织的副本
+    """
+
+    # 最多显示的列数（键过多的数组不适合表格）
+    MAX_COLUMNS = 500
+
+    def __init__(self, records):
+        self.row_count = len(records)
+        keys = {}
+        for record in records:
+            if type(record) is dict:
+                keys.update(dict.fromkeys(record))
+        self.truncated_columns = max(0, len(keys) - self.MAX_COLUMNS)
+
+        self.columns = []
+        for key in list(keys)[:self.MAX_COLUMNS]:
+            values = [record.get(key, _MISSING) if type(record) is dict else _MISSING
+                      for record in records]
+            self.columns.append(TableColumn(str(key), values))
+
+    def memory_size(self):
+        """
+        列存储占用的字节数
+        """
+        return sum(column.memory_size() for column in self.columns)
+
+    @staticmethod
+    def is_record_array(value, sample_size=100):
+        """
+        判断是否为适合表格显示的对象数组（抽样的元素中多数是对象）
+        """
+        if not isinstance(value, list) or not value:
+            return False
+        sample = value[:sample_size]
+        records = sum(1 for item in sample if isinstance(item, dict))
+        return records * 2 > len(sample)
+
+
+class RecordTableModel(QAbstractTableModel):
+    """
+    对象数组的表格模型：只为可见的单元格生成显示文本，排序只重排行号数组
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.table = None
+        self.order = None
+
+    def set_table(self, table):
+        """
+        切换显示的列式数据
+        """
+        self.beginResetModel()
+        self.table = table
+        self.order = None
+        self.endResetModel()
+
+    def source_row(self, row):
+        """
+        表格中的行对应数组中的下标
+        """
+        return self.order[row] if self.order is not None else row
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.table is None:
+            return 0
+        return self.table.row_count
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.table is None:
+            return 0
+        return len(self.table.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or self.table is None:
+            return None
+        column = self.table.columns[index.column()]
+        row = self.source_row(index.row())
+        if role == Qt.DisplayRole:
+            return column.display(row)
+        if role == Qt.TextAlignmentRole and column.kind in ('int', 'float'):
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        if role == Qt.ForegroundRole and column.state(row) != TableColumn.VALUE:
+            return QColor('#95a5a6')
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if self.table is None:
+            return None
+        if orientation == Qt.Horizontal:
+            column = self.table.columns[section]
+            if role == Qt.DisplayRole:
+                return column.name
+            if role == Qt.ToolTipRole:
+                return f'{column.name}\n类型：{TableColumn.KIND_LABELS[column.kind]}'
+        elif role == Qt.DisplayRole:
+            return str(self.source_row(section))
+        return None
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """
+        按列排序（在列数据上计算行号顺序，不重建行）
+        """
+        if self.table is None or not 0 <= column < len(self.table.columns):
+            return
+        self.layoutAboutToBeChanged.emit()
+        self.order = self.table.columns[column].sort_order(order == Qt.DescendingOrder)
+        self.layoutChanged.emit()
+
+
+def mix_hash64(value):
+    """
+    把 Python 哈希值打散为均匀分布的 64 位整数（splitmix64 末尾混合）
+    """
+    h = hash(value) & 0xFFFFFFFFFFFFFFFF
+    h = ((h ^ (h >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+    h = ((h ^ (h >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+    return h ^ (h >> 31)
+
+
+class HyperLogLog:
+    """
+    HyperLogLog 基数估计：2^precision 个寄存器，标准误差约 1.04 / sqrt(2^precision)
+    """
+
+    def __init__(self, precision=12):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(self.size)
+
+    def add(self, value):
+        """
+        加入一个（可哈希的）值
+        """
+        h = mix_hash64(value)
+        index = h >> (64 - self.precision)
+        rest = h & ((1 << (64 - self.precision)) - 1)
+        rank = 64 - self.precision - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        """
+        合并另一个相同精度的估计器
+        """
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def estimate(self):
+        """
+        估计不同值的个数（小基数时使用线性计数修正）
+        """
+        m = self.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+# Python 类型对应的 JSON 类型名称
+JSON_TYPE_NAMES = {
+    str: 'string', int: 'integer', float: 'number', bool: 'boolean',
+    type(None): 'null', dict: 'object', list: 'array',
+}
+
+
+class ColumnProfile:
+    """
+    单个键的统计：类型分布、null 数、数值范围和均值、不同值个数估计、高频值
+    所有统计都可以一次流式累加，内存占用与记录条数无关
+    """
+
+    # 不同值少于该数量时精确计数，超过后改用 HyperLogLog
+    EXACT_DISTINCT_LIMIT = 4096
+    # 高频值候选的容量（Misra-Gries 摘要）
+    HEAVY_HITTER_CAPACITY = 1024
+
+    # JSON 类型名称
+    TYPE_NAMES = JSON_TYPE_NAMES
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.type_counts = {}
+        self.numeric_count = 0
+        self.minimum = None
+        self.maximum = None
+        self.total = 0.0
+        self.distinct = set()
+        self.sketch = None
+        self.heavy_hitters = {}
+
+    def add(self, value):
+        """
+        累加一个值
+        """
+        self.count += 1
+        value_type = type(value)
+        self.type_counts[value_type] = self.type_counts.get(value_type, 0) + 1
+        if value is None or value_type is dict or value_type is list:
+            # null、对象和数组只计入类型分布
+            return
+        if value_type is int or value_type is float:
+            self.numeric_count += 1
+            self.total += value
+            if self.minimum is None or value < self.minimum:
+                self.minimum = value
+            if self.maximum is None or value > self.maximum:
+                self.maximum = value
+        # 字符串以外的值带上类型，避免 1、1.0 和 true 被当成同一个值
+        key = value if value_type is str else (value_type, value)
+
+        if self.sketch is None:
+            self.distinct.add(key)
+            if len(self.distinct) > self.EXACT_DISTINCT_LIMIT:
+                self.sketch = HyperLogLog()
+                for item in self.distinct:
+                    self.sketch.add(item)
+                self.distinct = None
+        else:
+            self.sketch.add(key)
+
+        counters = self.heavy_hitters
+        if key in counters:
+            counters[key] += 1
+        elif len(counters) < self.HEAVY_HITTER_CAPACITY:
+            counters[key] = 1
+        else:
+            # 摘要已满：所有计数减去最小值并移除归零的候选（新值的计数为 1，同样被移除）
+            smallest = min(counters.values())
+            for candidate in [candidate for candidate, count in counters.items() if count <= smallest]:
+                del counters[candidate]
+            for candidate in counters:
+                counters[candidate] -= smallest
+
+    @property
+    def null_count(self):
+        return self.type_counts.get(type(None), 0)
+
+    @property
+    def mean(self):
+        return self.total / self.numeric_count if self.numeric_count else None
+
+    def distinct_count(self):
+        """
+        不同值个数（精确值或估计值）及是否为估计
+        """
+        if self.sketch is None:
+            return len(self.distinct), False
+        return self.sketch.estimate(), True
+
+    def top_values(self, k=5):
+        """
+        出现次数最多的 k 个值（计数为下界，精确计数阶段时为准确值）
+        只出现一次的值不算高频值，不再列出
+        """
+        ranked = sorted(((key, count) for key, count in self.heavy_hitters.items() if count > 1),
+                        key=lambda item: item[1], reverse=True)[:k]
+        return [(key if isinstance(key, str) else key[1], count) for key, count in ranked]
+
+    def type_mix(self):
+        """
+        类型分布，如 {'integer': 10, 'null': 2}
+        """
+        return {self.TYPE_NAMES.get(value_type, value_type.__name__): count
+                for value_type, count in sorted(self.type_counts.items(), key=lambda item: -item[1])}
+
+
+class RecordProfiler:
+    """
+    对象数组的列统计：逐条记录流式累加，每个键一个 ColumnProfile
+    """
+
+    # 最多统计的键数
+    MAX_COLUMNS = 500
+
+    def __init__(self):
+        self.rows = 0
+        self.non_records = 0
+        self.columns = {}
+        self.skipped_columns = set()
+
+    def add(self, record):
+        """
+        累加一条记录（非对象元素只计数）
+        """
+        self.rows += 1
+        if type(record) is not dict:
+            self.non_records += 1
+            return
+        columns = self.columns
+        for key, value in record.items():
+            column = columns.get(key)
+            if column is None:
+                if len(columns) >= self.MAX_COLUMNS:
+                    self.skipped_columns.add(key)
+                    continue
+                column = columns[key] = ColumnProfile(str(key))
+            column.add(value)
+
+    def run(self, records, progress=None, cancelled=None, report_every=20000):
+        """
+        遍历记录流；progress(已处理条数) 定期回调，cancelled() 返回 True 时提前结束
+        """
+        for index, record in enumerate(records, 1):
+            self.add(record)
+            if index % report_every == 0:
+                if cancelled is not None and cancelled():
+                    raise RuntimeError('统计已取消')
+                if progress is not None:
+                    progress(index)
+        return self
+
+    def summary_rows(self):
+        """
+        按列整理的统计结果，每项对应结果表格的一行
+        """
+        rows = []
+        for column in self.columns.values():
+            distinct, estimated = column.distinct_count()
+            rows.append({
+                'key': column.name,
+                'types': column.type_mix(),
+                'count': column.count,
+                'nulls': column.null_count,
+                'missing': self.rows - self.non_records - column.count,
+                'min': column.minimum,
+                'max': column.maximum,
+                'mean': column.mean,
+                'distinct': distinct,
+                'distinct_estimated': estimated,
+                'top': column.top_values(),
+            })
+        return rows
+
+
+def profile_records(records, cancelled=None, progress=None):
+    """
+    统计已解析的对象数组
+    """
+    return RecordProfiler().run(records, progress=progress, cancelled=cancelled)
+
+
+def profile_json_file(path, cancelled=None, progress=None):
+    """
+    流式统计 JSON 文件（支持压缩）中的顶层对象数组，不构建完整的对象树
+    """
+    records = iter_json_array_items(iter_file_text(path))
+    return RecordProfiler().run(records, progress=progress, cancelled=cancelled)
+
+
+_process_pool = None
+
+
+def get_process_pool():
+    """
+    共享的进程池（首次使用时创建）
+    使用 spawn 方式启动子进程，避免复制图形界面进程中的线程和 Qt 状态
+    """
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=os.cpu_count() or 1, mp_context=multiprocessing.get_context('spawn'))
+    return _process_pool
+
+
+def shutdown_process_pool():
+    """
+    关闭共享进程池，取消尚未开始的任务
+    """
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+# 顶层数组文本超过该长度（字符）且有多个 CPU 时，美化/压缩/排序按元素分段在进程池中并行处理
+PARALLEL_FORMAT_THRESHOLD = 8 * 1024 * 1024
+
+# 查找分段边界时的词法单元：字符串（含转义）、括号和逗号
+JSON_BOUNDARY_TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*"|[\[\]{},]')
+# 从字符串内部跳到字符串结束之后
+JSON_STRING_TAIL_RE = re.compile(r'(?:[^"\\]|\\.)*"')
+
+
+def split_json_array(text, parts, scan_limit=1 << 20):
+    """
+    把顶层 JSON 数组文本（已去掉首尾空白）在元素之间切成约 parts 段，返回各段（不含分隔逗号）的 (起始, 结束)；
+    不是数组时返回 None
+    在每个目标位置之后找下一个第 1 层的逗号：换行之后一定不在字符串内（JSON 字符串不能包含换行），
+    没有换行时按未转义引号的奇偶判断；所在深度按括号计数估算（字符串中成对的括号互相抵消）。
+    估算出错的切分点会让相邻分段无法单独解析，调用方据此回退到整体处理，结果不会出错
+    """
+    if len(text) < 2 or text[0] != '[' or text[-1] != ']':
+        return None
+    length = len(text) - 1
+    spans = []
+    start = 1
+    for part in range(1, parts):
+        target = max(len(text) * part // parts, start)
+        if target >= length:
+            break
+        position = text.find('\n', target, min(length, target + scan_limit))
+        if position < 0:
+            position = target
+            quotes = text.count('"', start, position) - text.count('\\"', start, position)
+            if quotes % 2:
+                match = JSON_STRING_TAIL_RE.match(text, position)
+                if match is None:
+                    break
+                position = match.end()
+        depth = 1 + sum(map(text.count, '[{', repeat(start), repeat(position))) \
+            - sum(map(text.count, ']}', repeat(start), repeat(position)))
+
+        cut = -1
+        for match in JSON_BOUNDARY_TOKEN_RE.finditer(text, position, min(length, position + scan_limit)):
+            token = match.group()
+            if token == ',':
+                if depth == 1:
+                    cut = match.start()
+                    break
+            elif token[0] in '[{':
+                depth += 1
+            elif token[0] in ']}':
+                depth -= 1
+        if cut < 0:
+            continue
+        spans.append((start, cut))
+        start = cut + 1
+    spans.append((start, length))
+    return spans
+
+
+def format_json_array_chunk(chunk, mode):
+    """
+    解析并格式化顶层数组中的一段元素（进程池中执行），返回去掉外层括号的输出片段
+    """
+    if not chunk.strip():
+        raise ValueError('数组分段为空')
+    items = json.loads('[' + chunk + ']')
+    if mode == 'minify':
+        return json.dumps(items, ensure_ascii=False, separators=(',', ':'))[1:-1]
+    # 美化输出为 "[\n" + 各元素（逐行缩进）+ "\n]"
+    return dump_json_pretty(items, sort_keys=mode == 'sort')[2:-2]
+
+
+def submit_json_array_format(text, mode, pool=None, parts=None):
+    """
+    把顶层 JSON 数组按元素切分后提交到进程池并行解析和格式化（mode 为 beautify/minify/sort），
+    返回按顺序排列的任务列表；不是数组或无法切分时返回 None
+    """
+    text = text.strip()
+    pool = pool or get_process_pool()
+    # 分段数多于进程数，各进程的负载更均衡
+    spans = split_json_array(text, parts or 4 * (os.cpu_count() or 1))
+    if spans is None or len(spans) < 2:
+        return None
+    try:
+        return [pool.submit(format_json_array_chunk, text[start:end], mode) for start, end in spans]
+    except BrokenProcessPool:
+        if pool is _process_pool:
+            shutdown_process_pool()
+        return None
+
+
+def collect_json_array_format(futures, mode):
+    """
+    按顺序拼接 submit_json_array_format 的结果，与整体解析后格式化的输出逐字节相同；
+    有分段无法解析（输入无效或切分点估算错误）时返回 None，由调用方整体处理
+    """
+    try:
+        pieces = [future.result() for future in futures]
+    except (ValueError, RecursionError, BrokenProcessPool) as e:
+        for future in futures:
+            future.cancel()
+        if isinstance(e, BrokenProcessPool):
+            shutdown_process_pool()
+        return None
+    if mode == 'minify':
+        return '[' + ','.join(pieces) + ']'
+    return '[\n' + ',\n'.join(pieces) + '\n]'
+
+
+def format_json_array_parallel(text, mode, pool=None, parts=None):
+    """
+    并行美化/压缩/排序顶层 JSON 数组，无法并行处理时返回 None
+    """
+    futures = submit_json_array_format(text, mode, pool, parts)
+    if futures is None:
+        return None
+    return collect_json_array_format(futures, mode)
+
+
+class SchemaSummary:
+    """
+    某个位置上所有值的结构摘要：类型计数、数值范围、低基数字符串、对象的键和数组元素
+    可以逐个累加，也可以合并（分块并行推断后汇总），最后转换为 JSON Schema
+    """
+
+    __slots__ = ('count', 'types', 'minimum', 'maximum', 'strings', 'properties', 'items',
+                 'min_items', 'max_items', 'required')
+
+    # 不同字符串不超过该数量时输出为 enum
+    ENUM_LIMIT = 20
+
+    # 输出 type 时的顺序
+    TYPE_ORDER = ('object', 'array', 'string', 'number', 'integer', 'boolean', 'null')
+
+    def __init__(self):
+        self.count = 0
+        self.types = {}
+        self.minimum = None
+        self.maximum = None
+        self.strings = {}
+        self.properties = None
+        self.items = None
+        self.min_items = None
+        self.max_items = None
+        # 在全部数据上精确计算的必需键（抽样推断时使用）
+        self.required = None
+
+    def add(self, value):
+        """
+        累加一个值（显式栈，不受嵌套深度限制；子值逆序入栈，保持与递归相同的先序顺序）
+        """
+        stack = [(self, value)]
+        while stack:
+            summary, value = stack.pop()
+            summary.count += 1
+            name = JSON_TYPE_NAMES[type(value)]
+            summary.types[name] = summary.types.get(name, 0) + 1
+            if name == 'string':
+                strings = summary.strings
+                if strings is not None:
+                    strings[value] = strings.get(value, 0) + 1
+                    if len(strings) > self.ENUM_LIMIT:
+                        summary.strings = None
+            elif name == 'integer' or name == 'number':
+                if summary.minimum is None or value < summary.minimum:
+                    summary.minimum = value
+                if summary.maximum is None or value > summary.maximum:
+                    summary.maximum = value
+            elif name == 'object':
+                if summary.properties is None:
+                    summary.properties = {}
+                properties = summary.properties
+                pending = []
+                for key, child_value in value.items():
+                    child = properties.get(key)
+                    if child is None:
+                        child = properties[key] = SchemaSummary()
+                    pending.append((child, child_value))
+                stack.extend(reversed(pending))
+            elif name == 'array':
+                length = len(value)
+                if summary.min_items is None or length < summary.min_items:
+                    summary.min_items = length
+                if summary.max_items is None or length > summary.max_items:
+                    summary.max_items = length
+                if summary.items is None:
+                    summary.items = SchemaSummary()
+                items = summary.items
+                stack.extend((items, item) for item in reversed(value))
+
+    def merge(self, other):
+        """
+        合并另一个摘要（顺序无关，显式栈，不受嵌套深度限制）
+        """
+        stack = [(self, other)]
+        while stack:
+            summary, other = stack.pop()
+            summary.count += other.count
+            for name, count in other.types.items():
+                summary.types[name] = summary.types.get(name, 0) + count
+            if other.minimum is not None and (summary.minimum is None or other.minimum < summary.minimum):
+                summary.minimum = other.minimum
+            if other.maximum is not None and (summary.maximum is None or other.maximum > summary.maximum):
+                summary.maximum = other.maximum
+            if summary.strings is not None:
+                if other.strings is None:
+                    summary.strings = None
+                else:
+                    for value, count in other.strings.items():
+                        summary.strings[value] = summary.strings.get(value, 0) + count
+                    if len(summary.strings) > self.ENUM_LIMIT:
+                        summary.strings = None
+            if other.properties is not None:
+                if summary.properties is None:
+                    summary.properties = {}
+                for key, child in other.properties.items():
+                    if key in summary.properties:
+                        stack.append((summary.properties[key], child))
+                    else:
+                        summary.properties[key] = child
+            if other.items is not None:
+                if summary.items is None:
+                    summary.items = other.items
+                else:
+                    stack.append((summary.items, other.items))
+            if other.min_items is not None and (summary.min_items is None or other.min_items < summary.min_items):
+                summary.min_items = other.min_items
+            if other.max_items is not None and (summary.max_items is None or other.max_items > summary.max_items):
+                summary.max_items = other.max_items
+        return self
+
+    def to_schema(self):
+        """
+        转换为 JSON Schema（draft 2020-12 子集）；子结构先放入空字典，之后再用显式栈逐个填充
+        """
+        root = {}
+        stack = [(self, root)]
+        while stack:
+            summary, schema = stack.pop()
+            stack.extend(summary._fill_schema(schema))
+        return root
+
+    def _fill_schema(self, schema):
+        """
+        填充本层的 schema，返回需要继续填充的 (子摘要, 子 schema) 列表
+        """
+        children = []
+        types = [name for name in self.TYPE_ORDER if name in self.types]
+        # 整数是数字的子集
+        if 'number' in types and 'integer' in types:
+            types.remove('integer')
+        if types:
+            schema['type'] = types[0] if len(types) == 1 else types
+
+        if 'object' in self.types:
+            properties = self.properties or {}
+            schema['properties'] = {}
+            for key, child in properties.items():
+                child_schema = schema['properties'][key] = {}
+                children.append((child, child_schema))
+            if self.required is not None:
+                required = [key for key in properties if key in self.required]
+            else:
+                object_count = self.types['object']
+                required = [key for key, child in properties.items() if child.count == object_count]
+            if required:
+                schema['required'] = required
+        if 'array' in self.types:
+            if self.items is not None and self.items.count:
+                schema['items'] = {}
+                children.append((self.items, schema['items']))
+            schema['minItems'] = self.min_items
+            schema['maxItems'] = self.max_items
+        if 'string' in self.types and self.strings is not None:
+            # 只有字符串（可为 null）且重复较多时才视为枚举
+            non_null = [name for name in types if name != 'null']
+            if non_null == ['string'] and self.types['string'] >= 2 * len(self.strings):
+                schema['enum'] = sorted(self.strings) + ([None] if 'null' in types else [])
+        if self.minimum is not None:
+            schema['minimum'] = self.minimum
+            schema['maximum'] = self.maximum
+        return children
+
+
+def infer_schema_chunk(values):
+    """
+    推断一组数组元素的结构摘要（进程池中执行）
+    """
+    summary = SchemaSummary()
+    for value in values:
+        summary.add(value)
+    return summary
+
+
+def infer_json_schema(data, sample_limit=0, chunk_size=20000, use_processes=True):
+    """
+    推断 JSON 数据的 Schema，返回 (schema, 说明)
+    大数组切分为若干块，多核时在进程池中分别推断后合并；
+    超过抽样上限时随机抽样推断类型和取值范围，顶层对象的必需键仍在全部元素上精确计算
+    """
+    if not isinstance(data, list) or len(data) <= chunk_size:
+        root = infer_schema_chunk([data])
+        notes = []
+    else:
+        elements = data
+        notes = [f'{len(data)} 个元素']
+        if sample_limit and len(data) > sample_limit:
+            # 固定种子的随机抽样（等间隔抽样会与数据中的周期性规律重合），保持原有顺序
+            indexes = sorted(random.Random(0).sample(range(len(data)), sample_limit))
+            elements = [data[index] for index in indexes]
+            notes.append(f'随机抽样 {sample_limit} 个')
+        chunks = [elements[start:start + chunk_size] for start in range(0, len(elements), chunk_size)]
+        summaries = None
+        if use_processes and (os.cpu_count() or 1) > 1 and len(chunks) > 1:
+            try:
+                summaries = list(get_process_pool().map(infer_schema_chunk, chunks))
+                notes.append(f'{len(chunks)} 块并行推断')
+            except BrokenProcessPool:
+                # 子进程异常退出时重建进程池，本次改为在当前进程中推断
+                shutdown_process_pool()
+        if summaries is None:
+            summaries = map(infer_schema_chunk, chunks)
+        items = SchemaSummary()
+        for summary in summaries:
+            items.merge(summary)
+
+        if elements is not data and 'object' in items.types:
+            required = None
+            for element in data:
+                if type(element) is dict:
+                    if required is None:
+                        required = set(element)
+                    else:
+                        required.intersection_update(element)
+            items.required = required or set()
+
+        root = SchemaSummary()
+        root.count = 1
+        root.types = {'array': 1}
+        root.items = items
+        root.min_items = root.max_items = len(data)
+
+    schema = {'$schema': 'https://json-schema.org/draft/2020-12/schema'}
+    schema.update(root.to_schema())
+    return schema, '，'.join(notes)
+
+
+def format_json_pointer(tokens):
+    """
+    把路径（键名和数组下标）格式化为 RFC 6901 JSON Pointer
+    """
+    return ''.join('/' + str(token).replace('~', '~0').replace('/', '~1') for token in tokens)
+
+
+def shift_json_pointer(pointer, shift):
+    """
+    顶层数组的前 shift 个元素被移除后，JSON Pointer 对应的新路径；指向已移除的元素时返回 None
+    """
+    if not pointer:
+        return pointer
+    head, _, rest = pointer[1:].partition('/')
+    if not head.isdigit() or int(head) < shift:
+        return None
+    return f'/{int(head) - shift}' + (f'/{rest}' if rest else '')
+
+
+def parse_json_pointer(pointer):
+    """
+    把 RFC 6901 JSON Pointer 解析为路径片段（均为字符串）
+    """
+    if pointer in ('', '#'):
+        return []
+    if pointer.startswith('#'):
+        pointer = pointer[1:]
+    if not pointer.startswith('/'):
+        raise ValueError(f'JSON Pointer 必须以 "/" 开头：{pointer}')
+    return [token.replace('~1', '/').replace('~0', '~') for token in pointer[1:].split('/')]
+
+
+def json_value_key(value):
+    """
+    JSON 值按 JSON Schema 相等规则的规范形式（可哈希），用于 enum、const 和 uniqueItems 的比较：
+    整数和浮点数按数值相等（1 与 1.0 相同），布尔值与数字不同（在数组和对象内部也是如此），对象不计键的顺序
+    """
+    if value is None:
+        return ('null',)
+    if type(value) is bool:
+        return ('boolean', value)
+    if isinstance(value, (int, float)):
+        return ('number', value)
+    if isinstance(value, str):
+        return ('string', value)
+    if isinstance(value, dict):
+        return ('object', frozenset((key, json_value_key(item)) for key, item in value.items()))
+    return ('array', tuple(json_value_key(item) for item in value))
+
+
+class SchemaValidator:
+    """
+    JSON Schema 校验器：编译时把 Schema 转换为一棵检查闭包树，校验时只执行闭包
+    支持 draft 2020-12 的常用关键字（type、enum、const、properties、required、additionalProperties、
+    patternProperties、items、prefixItems、数值/长度/数量约束、pattern、allOf/anyOf/oneOf/not、本地 $ref）
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self._refs = {}
+        try:
+            self._check = self._compile(schema)
+        except (re.error, KeyError, TypeError, IndexError) as e:
+            raise ValueError(f'无效的 Schema：{e}') from e
+
+    def validate(self, value):
+        """
+        校验数据，返回所有违反项 [(JSON Pointer, 说明), ...]
+        """
+        errors = []
+        self._check(value, [], errors)
+        return errors
+
+    def _resolve_ref(self, ref):
+        """
+        解析本地引用（#/... 形式），每个引用只编译一次，支持递归引用
+        """
+        if ref in self._refs:
+            return self._refs[ref]
+        if not ref.startswith('#'):
+            raise ValueError(f'不支持外部引用：{ref}')
+        # 先放入占位，递归 Schema 引用自身时使用
+        holder = []
+        self._refs[ref] = lambda value, path, errors: holder[0](value, path, errors)
+        target = self.schema
+        for token in parse_json_pointer(ref):
+            if isinstance(target, list):
+                target = target[int(token)]
+            elif isinstance(target, dict) and token in target:
+                target = target[token]
+            else:
+                raise ValueError(f'无法解析引用：{ref}')
+        holder.append(self._compile(target))
+        return self._refs[ref]
+
+    def _compile(self, schema):
+        """
+        编译一个（子）Schema，返回检查函数 check(value, path, errors)
+        """
+        if schema is True or schema == {}:
+            return lambda value, path, errors: None
+        if schema is False:
+            return lambda value, path, errors: errors.append((format_json_pointer(path), '不允许出现任何值'))
+        if not isinstance(schema, dict):
+            raise ValueError(f'无效的 Schema：{schema!r}')
+
+        checks = []
+        for keyword, builder in self._BUILDERS:
+            if keyword in schema:
+                check = builder(self, schema[keyword], schema)
+                if check is not None:
+                    checks.append(check)
+
+        if not checks:
+            return lambda value, path, errors: None
+        if len(checks) == 1:
+            return checks[0]
+
+        def check_all(value, path, errors):
+            for check in checks:
+                check(value, path, errors)
+        return check_all
+
+    # ---- 各关键字的编译函数 ----
+
+    # JSON Schema 类型对应的判断
+    _TYPE_TESTS = {
+        'null': lambda value: value is None,
+        'boolean': lambda value: type(value) is bool,
+        'string': lambda value: type(value) is str,
+        'object': lambda value: type(value) is dict,
+        'array': lambda value: type(value) is list,
+        'number': lambda value: type(value) in (int, float),
+        'integer': lambda value: type(value) is int or (type(value) is float and value.is_integer()),
+    }
+
+    def _build_ref(self, ref, schema):
+        return self._resolve_ref(ref)
+
+    def _build_type(self, expected, schema):
+        names = [expected] if isinstance(expected, str) else list(expected)
+        tests = [self._TYPE_TESTS[name] for name in names]
+        label = ' 或 '.join(names)
+
+        def check(value, path, errors):
+            for test in tests:
+                if test(value):
+                    return
+            errors.append((format_json_pointer(path),
+                           f'类型应为 {label}，实际为 {JSON_TYPE_NAMES.get(type(value), type(value).__name__)}'))
+        return check
+
+    def _build_enum(self, options, schema):
+        allowed = {json_value_key(option) for option in options}
+
+        def check(value, path, errors):
+            if json_value_key(value) not in allowed:
+                errors.append((format_json_pointer(path), f'取值不在枚举范围内：{json.dumps(value, ensure_ascii=False)[:80]}'))
+        return check
+
+    def _build_const(self, expected, schema):
+        expected_key = json_value_key(expected)
+
+        def check(value, path, errors):
+            if json_value_key(value) != expected_key:
+                errors.append((format_json_pointer(path), f'取值应为 {json.dumps(expected, ensure_ascii=False)[:80]}'))
+        return check
+
+    def _build_properties(self, properties, schema):
+        compiled = {key: self._compile(sub_schema) for key, sub_schema in properties.items()}
+
+        def check(value, path, errors):
+            if type(value) is not dict:
+                return
+            for key, check_property in compiled.items():
+                if key in value:
+                    path.append(key)
+                    check_property(value[key], path, errors)
+                    path.pop()
+        return check
+
+    def _build_pattern_properties(self, patterns, schema):
+        compiled = [(re.compile(pattern), self._compile(sub_schema)) for pattern, sub_schema in patterns.items()]
+
+        def check(value, path, errors):
+            if type(value) is not dict:
+                return
+            for key, item in value.items():
+                for regex, check_property in compiled:
+                    if regex.search(key):
+                        path.append(key)
+                        check_property(item, path, errors)
+                        path.pop()
+        return check
+
+    def _build_additional_properties(self, additional, schema):
+        known = set(schema.get('properties', {}))
+        patterns = [re.compile(pattern) for pattern in schema.get('patternProperties', {})]
+        check_additional = self._compile(additional)
+        forbidden = additional is False
+
+        def check(value, path, errors):
+            if type(value) is not dict:
+                return
+            for key, item in value.items():
+                if key in known or any(regex.search(key) for regex in patterns):
+                    continue
+                path.append(key)
+                if forbidden:
+                    errors.append((format_json_pointer(path), '不允许出现额外的键'))
+                else:
+                    check_additional(item, path, errors)
+                path.pop()
+        return check
+
+    def _build_required(self, required, schema):
+        def check(value, path, errors):
+            if type(value) is not dict:
+                return
+            for key in required:
+                if key not in value:
+                    errors.append((format_json_pointer(path), f'缺少必需的键 "{key}"'))
+        return check
+
+    def _build_items(self, items, schema):
+        check_item = self._compile(items)
+        offset = len(schema.get('prefixItems', []))
+
+        def check(value, path, errors):
+            if type(value) is not list:
+                return
+            for index in range(offset, len(value)):
+                path.append(index)
+                check_item(value[index], path, errors)
+                path.pop()
+        return check
+
+    def _build_prefix_items(self, prefix_items, schema):
+        compiled = [self._compile(sub_schema) for sub_schema in prefix_items]
+
+        def check(value, path, errors):
+            if type(value) is not list:
+                return
+            for index, check_item in enumerate(compiled[:len(value)]):
+                path.append(index)
+                check_item(value[index], path, errors)
+                path.pop()
+        return check
+
+    @staticmethod
+    def _build_limit(kind, message, compare, applies):
+        def builder(self, limit, schema):
+            def check(value, path, errors):
+                if applies(value) and not compare(kind(value), limit):
+                    errors.append((format_json_pointer(path), message.format(limit)))
+            return check
+        return builder
+
+    def _build_multiple_of(self, divisor, schema):
+        def check(value, path, errors):
+            if type(value) is int and type(divisor) is int:
+                valid = value % divisor == 0
+            elif type(value) in (int, float):
+                # 浮点数允许舍入误差（0.3 是 0.1 的倍数）
+                quotient = value / divisor
+                valid = math.isclose(quotient, round(quotient), rel_tol=1e-9, abs_tol=1e-9)
+            else:
+                return
+            if not valid:
+                errors.append((format_json_pointer(path), f'应为 {divisor} 的倍数'))
+        return check
+
+    def _build_pattern(self, pattern, schema):
+        regex = re.compile(pattern)
+
+        def check(value, path, errors):
+            if type(value) is str and not regex.search(value):
+                errors.append((format_json_pointer(path), f'不匹配正则表达式 {pattern}'))
+        return check
+
+    def _build_unique_items(self, unique, schema):
+        if not unique:
+            return None
+
+        def check(value, path, errors):
+            if type(value) is not list:
+                return
+            seen = set()
+            for item in value:
+                key = json_value_key(item)
+                if key in seen:
+                    errors.append((format_json_pointer(path), '数组元素应互不相同'))
+                    return
+                seen.add(key)
+        return check
+
+    def _build_all_of(self, schemas, schema):
+        compiled = [self._compile(sub_schema) for sub_schema in schemas]
+
+        def check(value, path, errors):
+            for check_sub in compiled:
+                check_sub(value, path, errors)
+        return check
+
+    def _build_any_of(self, schemas, schema):
+        compiled = [self._compile(sub_schema) for sub_schema in schemas]
+
+        def check(value, path, errors):
+            for check_sub in compiled:
+                sub_errors = []
+                check_sub(value, path, sub_errors)
+                if not sub_errors:
+                    return
+            errors.append((format_json_pointer(path), '不满足 anyOf 中的任何一个 Schema'))
+        return check
+
+    def _build_one_of(self, schemas, schema):
+        compiled = [self._compile(sub_schema) for sub_schema in schemas]
+
+        def check(value, path, errors):
+            matched = 0
+            for check_sub in compiled:
+                sub_errors = []
+                check_sub(value, path, sub_errors)
+                if not sub_errors:
+                    matched += 1
+            if matched != 1:
+                errors.append((format_json_pointer(path), f'应恰好满足 oneOf 中的一个 Schema（实际满足 {matched} 个）'))
+        return check
+
+    def _build_not(self, sub_schema, schema):
+        check_sub = self._compile(sub_schema)
+
+        def check(value, path, errors):
+            sub_errors = []
+            check_sub(value, path, sub_errors)
+            if not sub_errors:
+                errors.append((format_json_pointer(path), '不应满足 not 中的 Schema'))
+        return check
+
+
+def _is_number(value):
+    return type(value) in (int, float)
+
+
+def _is_str(value):
+    return type(value) is str
+
+
+def _is_list(value):
+    return type(value) is list
+
+
+def _is_dict(value):
+    return type(value) is dict
+
+
+def _identity(value):
+    return value
+
+
+# 关键字及其编译函数（按顺序执行检查）
+SchemaValidator._BUILDERS = [
+    ('$ref', SchemaValidator._build_ref),
+    ('type', SchemaValidator._build_type),
+    ('enum', SchemaValidator._build_enum),
+    ('const', SchemaValidator._build_const),
+    ('required', SchemaValidator._build_required),
+    ('properties', SchemaValidator._build_properties),
+    ('patternProperties', SchemaValidator._build_pattern_properties),
+    ('additionalProperties', SchemaValidator._build_additional_properties),
+    ('prefixItems', SchemaValidator._build_prefix_items),
+    ('items', SchemaValidator._build_items),
+    ('minimum', SchemaValidator._build_limit(_identity, '应不小于 {}', lambda a, b: a >= b, _is_number)),
+    ('maximum', SchemaValidator._build_limit(_identity, '应不大于 {}', lambda a, b: a <= b, _is_number)),
+    ('exclusiveMinimum', SchemaValidator._build_limit(_identity, '应大于 {}', lambda a, b: a > b, _is_number)),
+    ('exclusiveMaximum', SchemaValidator._build_limit(_identity, '应小于 {}', lambda a, b: a < b, _is_number)),
+    ('multipleOf', SchemaValidator._build_multiple_of),
+    ('minLength', SchemaValidator._build_limit(len, '长度应不小于 {}', lambda a, b: a >= b, _is_str)),
+    ('maxLength', SchemaValidator._build_limit(len, '长度应不大于 {}', lambda a, b: a <= b, _is_str)),
+    ('pattern', SchemaValidator._build_pattern),
+    ('minItems', SchemaValidator._build_limit(len, '元素个数应不少于 {}', lambda a, b: a >= b, _is_list)),
+    ('maxItems', SchemaValidator._build_limit(len, '元素个数应不多于 {}', lambda a, b: a <= b, _is_list)),
+    ('uniqueItems', SchemaValidator._build_unique_items),
+    ('minProperties', SchemaValidator._build_limit(len, '键的个数应不少于 {}', lambda a, b: a >= b, _is_dict)),
+    ('maxProperties', SchemaValidator._build_limit(len, '键的个数应不多于 {}', lambda a, b: a <= b, _is_dict)),
+    ('allOf', SchemaValidator._build_all_of),
+    ('anyOf', SchemaValidator._build_any_of),
+    ('oneOf', SchemaValidator._build_one_of),
+    ('not', SchemaValidator._build_not),
+]
+
+# 已编译的校验器，按 Schema 内容的哈希缓存（每个进程各自缓存）
+_validator_cache = OrderedDict()
+_VALIDATOR_CACHE_SIZE = 32
+
+
+def schema_hash(schema_text):
+    """
+    Schema 内容的哈希（忽略键顺序和空白）
+    """
+    canonical = json.dumps(json.loads(schema_text), sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def get_schema_validator(schema_text, digest=None):
+    """
+    获取 Schema 对应的校验器：同一 Schema 只编译一次
+    """
+    digest = digest or schema_hash(schema_text)
+    validator = _validator_cache.get(digest)
+    if validator is None:
+        validator = SchemaValidator(json.loads(schema_text))
+        _validator_cache[digest] = validator
+        if len(_validator_cache) > _VALIDATOR_CACHE_SIZE:
+            _validator_cache.popitem(last=False)
+    else:
+        _validator_cache.move_to_end(digest)
+    return validator
+
+
+def validate_file_against_schema(path, schema_text, digest, max_errors=20):
+    """
+    用 Schema 校验一个 JSON 文件（支持压缩，进程池中执行），返回 (路径, 违反项总数, 前若干项, 错误说明)
+    """
+    try:
+        validator = get_schema_validator(schema_text, digest)
+        with open_text_input(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError, EOFError, zlib.error, lzma.LZMAError, zipfile.BadZipFile) as e:
+        return path, 0, [], str(e)
+    errors = validator.validate(data)
+    return path, len(errors), errors[:max_errors], None
+
+
+def iter_json_files(directory):
+    """
+    递归列出目录中的 JSON 文件（含压缩文件）
+    """
+    for folder, _, names in os.walk(directory):
+        for name in sorted(names):
+            if strip_compression_extension(name).lower().endswith(('.json', '.geojson')):
+                yield os.path.join(folder, name)
+
+
+def validate_directory_against_schema(directory, schema_text, schema_path=None, cancelled=None, progress=None):
+    """
+    批量校验目录中的 JSON 文件（跳过 Schema 文件本身）：多核时在进程池中执行，每个子进程只编译一次 Schema
+    """
+    digest = schema_hash(schema_text)
+    # 先在本进程编译一次，Schema 本身无效时尽早报错
+    get_schema_validator(schema_text, digest)
+    skipped = os.path.abspath(schema_path) if schema_path else None
+    paths = [path for path in iter_json_files(directory) if os.path.abspath(path) != skipped]
+    futures = []
+    if (os.cpu_count() or 1) > 1 and len(paths) > 1:
+        pool = get_process_pool()
+        futures = [pool.submit(validate_file_against_schema, path, schema_text, digest) for path in paths]
+        results = (future.result() for future in futures)
+    else:
+        results = (validate_file_against_schema(path, schema_text, digest) for path in paths)
+
+    collected = []
+    for index, result in enumerate(results, 1):
+        collected.append(result)
+        if cancelled is not None and cancelled():
+            for future in futures:
+                future.cancel()
+            raise RuntimeError('校验已取消')
+        if progress is not None:
+            progress((index, len(paths)))
+    return collected
+
+
+def format_schema_report(results, directory):
+    """
+    批量校验结果的文本报告
+    """
+    invalid = [result for result in results if result[1] or result[3]]
+    lines = [f'目录：{directory}',
+             f'共 {len(results)} 个文件，{len(results) - len(invalid)} 个通过，{len(invalid)} 个未通过', '']
+    for path, count, errors, failure in invalid:
+        relative = os.path.relpath(path, directory)
+        if failure:
+            lines.append(f'✗ {relative}：无法读取或解析：{failure}')
+            continue
+        lines.append(f'✗ {relative}：{count} 处违反')
+        for pointer, message in errors:
+            lines.append(f'    {pointer or "/"}：{message}')
+        if count > len(errors):
+            lines.append(f'    ……另有 {count - len(errors)} 处')
+    return '\n'.join(lines)
+
+
+@contextmanager
+def atomic_output_path(path):
+    """
+    原子替换文件：返回同一目录下的临时文件路径，with 块正常结束后把临时文件刷到磁盘并替换原文件，保留原文件权限
+    中途失败时删除临时文件，原文件保持不变，不会留下写了一半的内容
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    os.close(fd)
+    try:
+        yield temp_path
+        fd = os.open(temp_path, os.O_RDWR)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        if os.path.exists(path):
+            shutil.copymode(path, temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_file_atomically(path, data):
+    """
+    原子写入文件（见 atomic_output_path）
+    """
+    with atomic_output_path(path) as temp_path:
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+
+
+# 根元素之前的序言：XML 声明、DOCTYPE、注释、处理指令和空白
+XML_PROLOG_RE = re.compile(r'(?:\s+|<\?.*?\?>|<!--.*?-->|<!DOCTYPE(?:[^\[>]|\[.*?\])*>)*', re.S)
+XML_ENCODING_RE = re.compile(r'<\?xml[^>]*?encoding\s*=\s*["\']([^"\']+)["\']')
+XML_DOCTYPE_SUBSET_RE = re.compile(r'<!DOCTYPE[^\[>]*\[')
+# 原地处理时可以按 UTF-8 读写的编码声明
+XML_UTF8_ENCODINGS = {'utf-8', 'utf8', 'us-ascii', 'ascii'}
+
+
+def split_xml_document(text):
+    """
+    把 XML 文档拆分为 (序言, 根元素, 结尾)，序言和结尾中的注释、处理指令等原样保留
+    """
+    prolog_end = XML_PROLOG_RE.match(text).end()
+    body_end = len(text.rstrip())
+    while True:
+        tail = text[:body_end]
+        if tail.endswith('-->'):
+            start = tail.rfind('<!--')
+        elif tail.endswith('?>'):
+            start = tail.rfind('<?')
+        else:
+            break
+        if start < prolog_end:
+            break
+        body_end = len(text[:start].rstrip())
+    return text[:prolog_end], text[prolog_end:body_end], text[body_end:]
+
+
+def parse_xml_keeping_comments(text):
+    """
+    解析 XML 元素，保留其中的注释和处理指令
+    """
+    parser = ET.XMLParser(target=ET.TreeBuilder(insert_comments=True, insert_pis=True))
+    return ET.fromstring(text, parser=parser)
+
+
+def format_document_text(text, format_type, mode):
+    """
+    按界面中美化/排序/压缩按钮相同的规则格式化完整文本
+    XML 的序言（声明、DOCTYPE、注释、处理指令）和根元素之后的内容原样保留，根元素内的注释和处理指令也保留；
+    DOCTYPE 含内部子集或声明了 UTF-8 以外的编码时无法保证不改变内容，抛出 ValueError
+    """
+    if format_type == 'JSON':
+        value = json.loads(text)
+        if mode == 'minify':
+            return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+        return dump_json_pretty(value, sort_keys=(mode == 'sort'))
+    prolog, body, epilog = split_xml_document(text)
+    encoding = XML_ENCODING_RE.search(prolog)
+    if encoding is not None and encoding.group(1).lower() not in XML_UTF8_ENCODINGS:
+        raise ValueError(f'不支持的编码声明 {encoding.group(1)}（只处理 UTF-8 文件）')
+    if XML_DOCTYPE_SUBSET_RE.search(prolog):
+        raise ValueError('DOCTYPE 含内部子集（实体声明等），为避免改变内容不做处理')
+    xml_root = parse_xml_keeping_comments(body)
+    if mode == 'sort':
+        sort_xml_element(xml_root)
+    if mode == 'minify':
+        formatted = minify_xml_element(xml_root)
+    else:
+        # 去掉 minidom 生成的 XML 声明，使用原文件的序言
+        formatted = prettify_xml(xml_root).split('\n', 1)[-1]
+    return '\n'.join(part for part in (prolog.strip(), formatted, epilog.strip()) if part)
+
+
+def canonical_document_form(text, format_type, sort):
+    """
+    文档内容的规范形式，用于确认格式化前后内容一致（忽略缩进等空白，sort 时先按排序规则重排）
+    XML 包含序言、结尾和根元素的 C14N 形式（含注释）
+    """
+    if format_type == 'JSON':
+        return json.dumps(json.loads(text), sort_keys=True)
+    prolog, body, epilog = split_xml_document(text)
+    xml_root = parse_xml_keeping_comments(body)
+    if sort:
+        sort_xml_element(xml_root)
+    canonical = ET.canonicalize(ET.tostring(xml_root, encoding='unicode'), with_comments=True, strip_text=True)
+    return prolog.strip(), canonical, epilog.strip()
+
+
+# 可以原地格式化的文件扩展名（压缩文件不参与，避免改写压缩容器）
+BATCH_FORMAT_EXTENSIONS = {'.json': 'JSON', '.geojson': 'JSON', '.xml': 'XML'}
+
+
+def iter_format_files(path, format_type=None):
+    """
+    列出可原地格式化的文件及其格式：path 为目录时递归查找，为文件时只包含它自身
+    指定 format_type 时只保留该格式的文件
+    """
+    if os.path.isdir(path):
+        candidates = (os.path.join(folder, name)
+                      for folder, _, names in os.walk(path) for name in sorted(names))
+    else:
+        candidates = [path]
+    for candidate in candidates:
+        file_format = BATCH_FORMAT_EXTENSIONS.get(os.path.splitext(candidate)[1].lower())
+        if file_format is not None and format_type in (None, file_format):
+            yield os.path.abspath(candidate), file_format
+
+
+def format_file_in_place(path, format_type, mode):
+    """
+    格式化单个文件并原子写回（结果与原内容相同时不写），在进程池的子进程中执行
+    返回 (路径, 状态, 写回后内容的 SHA-256, 错误信息)，状态为 formatted / unchanged / failed
+    """
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read()
+        text = raw.decode('utf-8-sig')
+        formatted = format_document_text(text, format_type, mode)
+        # 保留原文件末尾的换行习惯和 BOM
+        if raw.endswith(b'\n'):
+            formatted += '\n'
+        data = formatted.encode('utf-8-sig' if raw.startswith(codecs.BOM_UTF8) else 'utf-8')
+        if data == raw:
+            return path, 'unchanged', hashlib.sha256(raw).hexdigest(), None
+        # 写回前重新解析结果，确认内容与原文件一致（压缩等规则改变了内容时不写）
+        sort = mode == 'sort'
+        if canonical_document_form(formatted, format_type, sort) != canonical_document_form(text, format_type, sort):
+            return path, 'failed', None, '格式化结果与原内容不一致，未写回'
+        write_file_atomically(path, data)
+        return path, 'formatted', hashlib.sha256(data).hexdigest(), None
+    except (OSError, ValueError, ET.ParseError, ExpatError) as e:
+        return path, 'failed', None, str(e)
+
+
+class FormatCache:
+    """
+    批量格式化的持久缓存：按 "格式:处理方式" 分区记录已是目标格式的文件 (mtime_ns, 大小, SHA-256)
+    时间戳和大小都未变的文件不必读取；变了但内容哈希是已知的格式化结果时也不必重新格式化
+    """
+
+    # 格式化规则变化时递增，旧缓存整体失效
+    VERSION = 2
+
+    def __init__(self, path):
+        self.path = path
+        self.sections = {}
+        self._digests = {}
+        self.load()
+
+    def load(self):
+        """
+        读取缓存文件，文件不存在、损坏或版本不符时从空缓存开始
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(payload, dict) and payload.get('version') == self.VERSION:
+            self.sections = payload.get('sections', {})
+
+    def save(self):
+        """
+        原子写回缓存文件
+        """
+        payload = {'version': self.VERSION, 'sections': self.sections}
+        write_file_atomically(self.path, json.dumps(payload, ensure_ascii=False).encode('utf-8'))
+
+    def section(self, key):
+        """
+        某种格式和处理方式对应的 {路径: [mtime_ns, 大小, 哈希]}
+        """
+        return self.sections.setdefault(key, {})
+
+    def is_clean(self, key, path, stat):
+        """
+        文件自上次记录后是否未被改动（只比较时间戳和大小，不读取内容）
+        """
+        entry = self.section(key).get(path)
+        return entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size
+
+    def is_known_digest(self, key, digest):
+        """
+        内容哈希是否是该处理方式下已知的格式化结果（文件被复制、touch 或改回原样时命中）
+        """
+        digests = self._digests.get(key)
+        if digests is None:
+            digests = self._digests[key] = {entry[2] for entry in self.section(key).values()}
+        return digest in digests
+
+    def record(self, key, path, stat, digest):
+        """
+        记录文件当前已是目标格式
+        """
+        self.section(key)[path] = [stat.st_mtime_ns, stat.st_size, digest]
+        if key in self._digests:
+            self._digests[key].add(digest)
+
+    def forget(self, key, path):
+        """
+        删除文件的记录（格式化失败或文件已不存在）
+        """
+        self.section(key).pop(path, None)
+
+    def prune(self, root, seen):
+        """
+        删除 root 目录下本次没有遇到的文件记录（已删除或改名的文件）
+        """
+        prefix = os.path.join(os.path.abspath(root), '')
+        for key, section in self.sections.items():
+            stale = [path for path in section
+                     if path.startswith(prefix) and (key, path) not in seen and not os.path.exists(path)]
+            for path in stale:
+                del section[path]
+            if stale:
+                self._digests.pop(key, None)
+
+
+def get_format_cache_path():
+    """
+    批量格式化缓存文件的位置
+    """
+    return os.path.join(get_app_data_dir(), 'format_cache.json')
+
+
+def format_directory(path, mode, format_type=None, cache_path=None, cancelled=None, progress=None):
+    """
+    原地格式化目录（或单个文件）中的 JSON/XML 文件，规则与界面中的美化/排序/压缩相同
+    缓存命中的文件直接跳过，其余文件多核时在进程池中格式化；返回 [(路径, 状态, 错误信息)]
+    状态为 formatted / unchanged / cached / failed
+    """
+    cache = FormatCache(cache_path) if cache_path else None
+    results = []
+    pending = []
+    seen = set()
+    files = list(iter_format_files(path, format_type))
+    for file_path, file_format in files:
+        key = f'{file_format}:{mode}'
+        seen.add((key, file_path))
+        if cache is not None:
+            try:
+                stat = os.stat(file_path)
+                if cache.is_clean(key, file_path, stat):
+                    results.append((file_path, 'cached', None))
+                    continue
+                with open(file_path, 'rb') as f:
+                    digest = hashlib.sha256(f.read()).hexdigest()
+            except OSError as e:
+                results.append((file_path, 'failed', str(e)))
+                continue
+            if cache.is_known_digest(key, digest):
+                cache.record(key, file_path, stat, digest)
+                results.append((file_path, 'cached', None))
+                continue
+        pending.append((file_path, file_format, key))
+
+    if progress is not None:
+        progress((len(results), len(files)))
+    futures = []
+    if (os.cpu_count() or 1) > 1 and len(pending) > 1:
+        pool = get_process_pool()
+        futures = [pool.submit(format_file_in_place, file_path, file_format, mode)
+                   for file_path, file_format, _ in pending]
+        outcomes = (future.result() for future in futures)
+    else:
+        outcomes = (format_file_in_place(file_path, file_format, mode) for file_path, file_format, _ in pending)
+
+    try:
+        for (_, _, key), (file_path, status, digest, error) in zip(pending, outcomes):
+            results.append((file_path, status, error))
+            if cache is not None:
+                if status == 'failed':
+                    cache.forget(key, file_path)
+                else:
+                    try:
+                        cache.record(key, file_path, os.stat(file_path), digest)
+                    except OSError:
+                        cache.forget(key, file_path)
+            if cancelled is not None and cancelled():
+                for future in futures:
+                    future.cancel()
+                raise RuntimeError('批量格式化已取消')
+            if progress is not None:
+                progress((len(results), len(files)))
+    finally:
+        # 取消或出错时也保存已完成部分的记录
+        if cache is not None:
+            if os.path.isdir(path):
+                cache.prune(path, seen)
+            cache.save()
+    return results
+
+
+BATCH_FORMAT_MODE_NAMES = {'beautify': '美化', 'sort': '排序', 'minify': '压缩'}
+
+
+def format_batch_report(results, path, mode, elapsed):
+    """
+    批量格式化结果的文本报告
+    """
+    directory = path if os.path.isdir(path) else os.path.dirname(os.path.abspath(path))
+    counts = {status: 0 for status in ('formatted', 'unchanged', 'cached', 'failed')}
+    for _, status, _ in results:
+        counts[status] += 1
+    lines = [f'{"目录" if os.path.isdir(path) else "文件"}：{path}',
+             f'{BATCH_FORMAT_MODE_NAMES[mode]}：共 {len(results)} 个文件，已格式化 {counts["formatted"]} 个，'
+             f'原本已是目标格式 {counts["unchanged"]} 个，未改动跳过 {counts["cached"]} 个，'
+             f'失败 {counts["failed"]} 个（{elapsed:.2f} 秒）', '']
+    for file_path, status, error in results:
+        relative = os.path.relpath(file_path, directory)
+        if status == 'failed':
+            lines.append(f'✗ {relative}：{error}')
+        elif status == 'formatted':
+            lines.append(f'✎ {relative}')
+    return '\n'.join(lines)
+
+
+def get_physical_memory():
+    """
+    物理内存的字节数，无法获取时返回 None
+    """
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        pass
+    if sys.platform == 'win32':
+        import ctypes
+
+        class MemoryStatus(ctypes.Structure):
+            _fields_ = [('length', ctypes.c_ulong), ('memory_load', ctypes.c_ulong),
+                        ('total_phys', ctypes.c_ulonglong), ('avail_phys', ctypes.c_ulonglong),
+                        ('total_page_file', ctypes.c_ulonglong), ('avail_page_file', ctypes.c_ulonglong),
+                        ('total_virtual', ctypes.c_ulonglong), ('avail_virtual', ctypes.c_ulonglong),
+                        ('avail_extended_virtual', ctypes.c_ulonglong)]
+
+        status = MemoryStatus()
+        status.length = ctypes.sizeof(MemoryStatus)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.total_phys
+    return None
+
+
+def default_memory_limit_mb():
+    """
+    默认的内存上限：物理内存的一半，无法获取时取 4 GB
+    """
+    physical = get_physical_memory()
+    if not physical:
+        return 4096
+    return max(512, physical // 2 // (1024 * 1024))
+
+
+class InputEstimate:
+    """
+    输入的结构估计：由开头一段样本按比例外推（样本覆盖全部输入时为精确值）
+    """
+
+    def __init__(self, chars, nodes, compact_chars, pretty_chars, exact):
+        self.chars = chars
+        self.nodes = nodes
+        self.compact_chars = compact_chars
+        self.pretty_chars = pretty_chars
+        self.exact = exact
+
+
+def sample_json_structure(sample, total_chars):
+    """
+    扫描 JSON 开头的样本，估计全文的节点数、压缩后和美化后的字符数
+    样本末尾被截断的词法单元忽略不计
+    """
+    nodes = 0
+    compact = 0
+    pretty = 0
+    depth = 0
+    try:
+        for token, is_punctuation in iter_json_tokens([sample]):
+            compact += len(token)
+            pretty += len(token)
+            if not is_punctuation:
+                nodes += 1
+            elif token == ':':
+                # 前一个字符串是键，键值对在节点表中只占一个节点
+                nodes -= 1
+                pretty += 1
+            elif token in '[{':
+                nodes += 1
+                depth += 1
+                pretty += 1 + 4 * depth
+            elif token in ']}':
+                depth = max(depth - 1, 0)
+                pretty += 1 + 4 * depth
+            else:
+                pretty += 1 + 4 * depth
+    except ValueError:
+        pass
+    return _scale_estimate(sample, total_chars, nodes, compact, pretty)
+
+
+XML_SAMPLE_TAG_RE = re.compile(r'<(/?)([^\s>/!?]+)((?:[^>"\']|"[^"]*"|\'[^\']*\')*?)(/?)>')
+XML_SAMPLE_ATTRIBUTE_RE = re.compile(r'[^\s=]+\s*=\s*(?:"[^"]*"|\'[^\']*\')')
+XML_SAMPLE_GAP_RE = re.compile(r'>\s+<')
+
+
+def sample_xml_structure(sample, total_chars):
+    """
+    扫描 XML 开头的样本，估计全文的节点数（元素和属性）、压缩后和美化后的字符数
+    """
+    nodes = 0
+    pretty = 0
+    depth = 0
+    for match in XML_SAMPLE_TAG_RE.finditer(sample):
+        closing, _, attributes, self_closing = match.groups()
+        if closing:
+            depth = max(depth - 1, 0)
+            pretty += 1 + 4 * depth
+            continue
+        nodes += 1 + len(XML_SAMPLE_ATTRIBUTE_RE.findall(attributes))
+        pretty += 1 + 4 * depth
+        if not self_closing:
+            depth += 1
+    pretty += len(sample)
+    compact = len(XML_SAMPLE_GAP_RE.sub('><', sample))
+    return _scale_estimate(sample, total_chars, nodes, compact, pretty)
+
+
+def _scale_estimate(sample, total_chars, nodes, compact, pretty):
+    """
+    把样本上的统计按字符数比例外推到全文
+    """
+    exact = len(sample) >= total_chars
+    factor = 1.0 if exact else total_chars / max(len(sample), 1)
+    return InputEstimate(total_chars, int(nodes * factor), int(compact * factor), int(pretty * factor), exact)
+
+
+class ProcessingPlan:
+    """
+    按输入规模选择的处理策略及各策略的峰值内存估计
+    """
+
+    # 策略：完整处理 / 延迟树 / 流式格式化 / 仅文件到文件
+    EAGER = 'eager'
+    LAZY = 'lazy'
+    STREAM = 'stream'
+    FILE = 'file'
+    NAMES = {EAGER: '完整处理', LAZY: '延迟树', STREAM: '流式格式化', FILE: '仅文件到文件'}
+    DESCRIPTIONS = {
+        EAGER: '解析、构建树形视图并显示完整输出',
+        LAZY: '解析并构建树形视图（按需展开），输出视图只显示开头部分，复制和保存使用完整结果',
+        STREAM: '不解析为对象，逐个词法单元流式格式化；树形视图不可用，输出视图只显示开头部分',
+        FILE: '不在界面中生成结果，直接格式化并保存到文件',
+    }
+
+    # 输入输出文本视图（UTF-16 文本加排版信息）每个字符的字节数，与 Document.cache_size 一致
+    EDITOR_BYTES_PER_CHAR = 4
+    # 从文本视图取出完整文本时的副本（UTF-16 的 QString 加 Python 字符串）
+    TEXT_COPY_BYTES_PER_CHAR = 3
+    # 解析结果中每个节点的字节数（JSON 为 dict/list/标量对象，XML 为 Element）
+    PARSED_NODE_BYTES = {'JSON': 72, 'XML': 220}
+    # 节点表中每个节点的字节数（见 --benchmark nodes）
+    TABLE_NODE_BYTES = {'JSON': 56, 'XML': 96}
+    # XML 美化经过 minidom，每个节点的临时开销
+    XML_PRETTIFY_NODE_BYTES = 1100
+    # 延迟树和流式格式化时输出视图显示的字符数
+    PREVIEW_CHARS = 4 * 1024 * 1024
+    # 文件到文件的流式处理的缓冲区
+    STREAM_BUFFER_BYTES = 16 * 1024 * 1024
+    # 样本的字符数
+    SAMPLE_CHARS = 256 * 1024
+    # 每个输入字符最多约占的字节数：总量低于上限时无需采样，直接完整处理
+    WORST_BYTES_PER_CHAR = 256
+
+    def __init__(self, strategy, peaks, limit, estimate=None, reason=''):
+        self.strategy = strategy
+        self.peaks = peaks
+        self.limit = limit
+        self.estimate = estimate
+        self.reason = reason
+
+    @property
+    def preview_chars(self):
+        """
+        输出视图最多显示的字符数，完整处理时为 None
+        """
+        return self.PREVIEW_CHARS if self.strategy in (self.LAZY, self.STREAM) else None
+
+    @classmethod
+    def peak_bytes(cls, estimate, format_type, mode):
+        """
+        估算在界面中处理已载入的输入时，各策略的峰值内存（包含输入视图本身）
+        流式格式化只适用于 JSON 的美化和压缩
+        """
+        chars = estimate.chars
+        output = estimate.compact_chars if mode == 'minify' else estimate.pretty_chars
+        base = chars * (cls.EDITOR_BYTES_PER_CHAR + cls.TEXT_COPY_BYTES_PER_CHAR)
+        parsed = estimate.nodes * cls.PARSED_NODE_BYTES[format_type] + chars
+        if format_type == 'XML' and mode != 'minify':
+            parsed += estimate.nodes * cls.XML_PRETTIFY_NODE_BYTES
+        table = estimate.nodes * cls.TABLE_NODE_BYTES[format_type]
+        preview = min(output, cls.PREVIEW_CHARS) * cls.EDITOR_BYTES_PER_CHAR
+        peaks = {
+            cls.EAGER: base + parsed + table + output * (1 + cls.EDITOR_BYTES_PER_CHAR),
+            cls.LAZY: base + parsed + table + output + preview,
+        }
+        streamable = format_type == 'JSON' and mode != 'sort'
+        if streamable:
+            peaks[cls.STREAM] = base + output + preview
+            peaks[cls.FILE] = base + cls.STREAM_BUFFER_BYTES
+        else:
+            peaks[cls.FILE] = base + parsed + output
+        return peaks
+
+    @classmethod
+    def for_operation(cls, estimate, format_type, mode, limit):
+        """
+        选择峰值内存不超过上限的第一个策略（按完整处理、延迟树、流式格式化、文件到文件的顺序）
+        都超过上限时仍选择文件到文件
+        """
+        peaks = cls.peak_bytes(estimate, format_type, mode)
+        for strategy in (cls.EAGER, cls.LAZY, cls.STREAM, cls.FILE):
+            if strategy in peaks and peaks[strategy] <= limit:
+                break
+        precision = '' if estimate.exact else '约 '
+        size = f'输入 {format_size(estimate.chars)}、{precision}{estimate.nodes:,} 个节点'
+        if strategy == cls.EAGER:
+            reason = f'{size}，预计峰值 {format_size(peaks[strategy])}，未超过上限 {format_size(limit)}'
+        else:
+            order = list(peaks)
+            skipped = [f'{cls.NAMES[name]}约需 {format_size(peaks[name])}'
+                       for name in order[:order.index(strategy)]]
+            reason = f'{size}，{"、".join(skipped)}，超过上限 {format_size(limit)}'
+            if peaks[strategy] > limit:
+                reason += f'；文件到文件仍约需 {format_size(peaks[strategy])}，可能内存不足'
+        return cls(strategy, peaks, limit, estimate, reason)
+
+    @classmethod
+    def for_opening(cls, file_size, compressed, limit):
+        """
+        打开文件前判断能否载入输入视图：载入本身需要的内存超过上限时只能文件到文件处理
+        压缩文件的解压后大小未知，按压缩比 5 倍估计
+        """
+        chars = file_size * 5 if compressed else file_size
+        peak = chars * cls.EDITOR_BYTES_PER_CHAR
+        strategy = cls.EAGER if peak <= limit else cls.FILE
+        guess = '（压缩文件按 5 倍解压估计）' if compressed else ''
+        reason = f'载入输入视图约需 {format_size(peak)}{guess}，上限 {format_size(limit)}'
+        return cls(strategy, {strategy: peak}, limit, reason=reason)
+
+    def summary(self):
+        """
+        状态栏中的一行说明
+        """
+        return f'处理策略：{self.NAMES[self.strategy]}（{self.reason}）'
+
+    def details(self):
+        """
+        各策略的峰值内存估计（用于提示）
+        """
+        lines = [f'处理策略：{self.NAMES[self.strategy]} —— {self.DESCRIPTIONS[self.strategy]}', self.reason, '']
+        for name, peak in self.peaks.items():
+            mark = '✓' if peak <= self.limit else '✗'
+            lines.append(f'{mark} {self.NAMES[name]}：预计峰值 {format_size(peak)}')
+        return '\n'.join(lines)
+
+
+# 输入超过该字符数时先显示快速预览，完整处理在后台进行
+QUICK_LOOK_THRESHOLD = 4 * 1024 * 1024
+# 快速预览只扫描输入开头的字符数
+QUICK_LOOK_PREFIX_CHARS = 1024 * 1024
+
+
+def build_json_preview(prefix, limit):
+    """
+    从 JSON 开头的一段文本中取出顶层数组或对象的前 limit 个元素，组成可以解析的预览值
+    被截断的最后一个元素不计入；顶层不是数组或对象、开头就无效或整个文档都在这段文本中时返回 None
+    """
+    tokens = []
+    depth = 0
+    count = 0
+    cut = None
+    try:
+        for token, is_punctuation in iter_json_tokens([prefix]):
+            if is_punctuation:
+                if token in '[{':
+                    depth += 1
+                elif token in ']}':
+                    depth -= 1
+                    if depth == 0:
+                        return None
+                elif token == ',' and depth == 1:
+                    cut = len(tokens)
+                    count += 1
+                    if count >= limit:
+                        break
+            tokens.append(token)
+    except ValueError:
+        pass
+    if cut is None or tokens[0] not in ('[', '{'):
+        return None
+    try:
+        return json.loads(''.join(tokens[:cut]) + (']' if tokens[0] == '[' else '}'))
+    except ValueError:
+        return None
+
+
+def build_xml_preview(prefix, limit):
+    """
+    从 XML 开头的一段文本中取出根元素和前 limit 个完整的子元素，无法得到预览时返回 None
+    """
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    root = None
+    depth = 0
+    count = 0
+    try:
+        parser.feed(prefix)
+        for event, element in parser.read_events():
+            if event == 'start':
+                if root is None:
+                    root = element
+                depth += 1
+                continue
+            depth -= 1
+            if depth == 0:
+                # 整个文档都在这段文本中
+                return None
+            if depth == 1:
+                count += 1
+                if count >= limit:
+                    break
+    except ET.ParseError:
+        pass
+    if root is None or count == 0:
+        return None
+    # 去掉截断处未完成的子元素
+    del root[count:]
+    return root
+
+
+def parse_and_format(text, format_type, mode):
+    """
+    后台完整处理：解析、美化（或排序后美化）并构建节点表，返回 (解析结果, 输出文本, 节点表)
+    """
+    if format_type == 'JSON':
+        data = json.loads(text)
+        formatted = dump_json_pretty(data, sort_keys=(mode == 'sort'))
+        return data, formatted, NodeTable.from_json(data)
+    xml_root = ET.fromstring(text.strip())
+    formatted = format_xml_tree(xml_root, mode)
+    return xml_root, formatted, NodeTable.from_xml(xml_root)
+
+
+def write_pieces_to_file(pieces, output):
+    """
+    把逐块产生的文本写入输出文件（按扩展名压缩），返回输出文件的字节数
+    先写同一目录下的临时文件，全部成功后才替换输出文件，失败时已有的同名文件保持不变
+    """
+    member = os.path.basename(strip_compression_extension(output))
+    with atomic_output_path(output) as temp_path:
+        with open_text_output(temp_path, compression_for_path(output), member=member) as f:
+            for piece in pieces:
+                f.write(piece)
+    return os.path.getsize(output)
+
+
+def format_file_to_file(path, output, format_type, mode):
+    """
+    流式读取（自动解压）并格式化文件，写入输出文件
+    """
+    return write_pieces_to_file(iter_formatted_file(path, format_type, mode), output)
+
+
+def format_text_to_file(text, output, format_type, mode):
+    """
+    把已载入的文本格式化后写入输出文件：JSON 美化和压缩按块流式处理，其余需要完整解析；
+    输出与界面中其他处理策略（完整处理、快速预览、文件到文件）逐字节相同
+    """
+    if format_type == 'JSON':
+        if mode == 'sort':
+            pieces = [dump_json_pretty(json.loads(text), sort_keys=True)]
+        else:
+            pieces = iter_json_reformat(iter_text_chunks(text, 1024 * 1024),
+                                        indent=4 if mode == 'beautify' else None)
+    else:
+        pieces = [format_xml_tree(ET.fromstring(text.strip()), mode)]
+    return write_pieces_to_file(pieces, output)
+
+
+# 可以直接用索引回答的 XPath：//tag、//tag[@attr]、//tag[@attr='value']，可带结尾的 /@attr
+XPATH_NAME = r"[^\s/\[\]@=()'\"]+"
+XPATH_INDEXED_RE = re.compile(
+    rf"^//(\*|{XPATH_NAME})(?:\[@({XPATH_NAME})(?:\s*=\s*(['\"])(.*?)\3)?\])?(?:/@({XPATH_NAME}))?$")
+XPATH_ATTRIBUTE_TAIL_RE = re.compile(rf"^(.+?)/@({XPATH_NAME})$")
+
+
+class XPathQuery:
+    """
+    编译后的 XPath 查询：简单形式走元素索引，其余交给 ElementTree 的 XPath 子集
+    """
+
+    __slots__ = ('expression', 'tag', 'attribute', 'value', 'path', 'absolute', 'target_attribute')
+
+    def __init__(self, expression):
+        self.expression = expression
+        self.tag = self.attribute = self.value = self.path = self.target_attribute = None
+        self.absolute = True
+        match = XPATH_INDEXED_RE.match(expression)
+        if match:
+            self.tag, self.attribute, _, self.value, self.target_attribute = match.groups()
+            return
+
+        path = expression
+        match = XPATH_ATTRIBUTE_TAIL_RE.match(path)
+        if match:
+            path, self.target_attribute = match.groups()
+        # 绝对路径在包住根元素的临时父元素上求值，使 //tag 也能匹配根元素；相对路径从根元素开始
+        self.absolute = path.startswith('/')
+        self.path = '.' + path if self.absolute else path
+        try:
+            ET.Element('query').findall(self.path)
+        except SyntaxError as e:
+            raise ValueError(f'无效的 XPath：{expression}（{e}）') from e
+        except (KeyError, TypeError, StopIteration) as e:
+            raise ValueError(f'无效的 XPath：{expression}') from e
+
+    @property
+    def indexed(self):
+        return self.path is None
+
+
+@lru_cache(maxsize=128)
+def compile_xpath(expression):
+    """
+    编译 XPath 表达式（按表达式缓存）
+    """
+    expression = expression.strip()
+    if not expression:
+        raise ValueError('XPath 表达式为空')
+    return XPathQuery(expression)
+
+
+class XMLElementIndex:
+    """
+    XML 元素索引：第一次查询时构建（文档顺序、父节点、按标签和属性名分组），
+    属性值索引在第一次按该属性取值查询时构建
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.built = False
+        self.order = {}
+        self.info = {}
+        self.tag_counts = {}
+        self.by_tag = {}
+        self.by_attribute = {}
+        self.by_value = {}
+
+    def build(self):
+        """
+        遍历一次文档构建索引
+        """
+        if self.built:
+            return
+        order, info, by_tag, by_attribute = self.order, self.info, self.by_tag, self.by_attribute
+        info[self.root] = (None, 0, 1)
+        for number, element in enumerate(self.root.iter()):
+            order[element] = number
+            elements = by_tag.get(element.tag)
+            if elements is None:
+                elements = by_tag[element.tag] = []
+            elements.append(element)
+            for name in element.attrib:
+                by_attribute.setdefault(name, []).append(element)
+            # 记录子元素的父节点、位置和同名兄弟中的序号
+            if len(element):
+                counts = {}
+                for position, child in enumerate(element):
+                    tag = child.tag
+                    count = counts[tag] = counts.get(tag, 0) + 1
+                    info[child] = (element, position, count)
+                self.tag_counts[element] = counts
+        self.built = True
+
+    def elements_with_value(self, attribute, value):
+        """
+        属性取值等于 value 的元素（按属性名惰性构建取值索引）
+        """
+        values = self.by_value.get(attribute)
+        if values is None:
+            values = {}
+            for element in self.by_attribute.get(attribute, ()):
+                values.setdefault(element.attrib[attribute], []).append(element)
+            self.by_value[attribute] = values
+        return values.get(value, [])
+
+    def query(self, query):
+        """
+        执行编译后的查询，返回文档顺序的命中列表 [(元素, 属性名或 None), ...]
+        """
+        self.build()
+        if query.indexed:
+            if query.value is not None:
+                candidates = self.elements_with_value(query.attribute, query.value)
+            elif query.attribute is not None:
+                candidates = self.by_attribute.get(query.attribute, [])
+            elif query.tag == '*':
+                candidates = list(self.order)
+            else:
+                candidates = self.by_tag.get(query.tag, [])
+            if query.tag != '*' and (query.attribute is not None):
+                candidates = [element for element in candidates if element.tag == query.tag]
+        else:
+            if query.absolute:
+                wrapper = ET.Element('query')
+                wrapper.append(self.root)
+                candidates = wrapper.findall(query.path)
+            else:
+                candidates = self.root.findall(query.path)
+            candidates.sort(key=self.order.__getitem__)
+
+        if query.target_attribute is not None:
+            return [(element, query.target_attribute) for element in candidates
+                    if query.target_attribute in element.attrib]
+        return [(element, None) for element in candidates]
+
+    def element_path(self, element):
+        """
+        元素的绝对路径，同名兄弟用 [n] 区分，例如 /root/item[2]/name
+        """
+        steps = []
+        while element is not None:
+            parent, _, tag_position = self.info[element]
+            if parent is not None and self.tag_counts[parent][element.tag] > 1:
+                steps.append(f'{element.tag}[{tag_position}]')
+            else:
+                steps.append(element.tag)
+            element = parent
+        return '/' + '/'.join(reversed(steps))
+
+    def element_positions(self, element):
+        """
+        从根元素到该元素逐级的子元素下标
+        """
+        self.build()
+        positions = []
+        while element is not self.root:
+            parent, position, _ = self.info[element]
+            positions.append(position)
+            element = parent
+        positions.reverse()
+        return positions
+
+
+# 序列化 XML 文本中的标记：注释、CDATA、处理指令、DOCTYPE、结束标签和开始标签（属性值中的 ">" 不结束标签）
+XML_MARKUP_RE = re.compile(
+    r'<!--.*?-->|<!\[CDATA\[.*?\]\]>|<\?.*?\?>|<!DOCTYPE(?:[^\[>]|\[.*?\])*>|</[^>]*>'
+    r'|<([^\s/>]+)(?:[^>"\']|"[^"]*"|\'[^\']*\')*>', re.S)
+
+
+def map_xml_start_tags(text, root):
+    """
+    把序列化后的 XML 文本中的开始标签按文档顺序对应到元素，返回 {元素: (起点, 终点)}（"<" 和标签名的范围）
+    注释、CDATA、处理指令和属性值中的内容不会被当作标签；文本中标签的名称和嵌套层次与元素树不完全一致时
+    （文本来自其他解析结果、排序前的树、只是预览等）无法可靠定位，返回 None
+    """
+    elements = []
+    stack = [(root, 0)]
+    while stack:
+        element, depth = stack.pop()
+        if not isinstance(element.tag, str):
+            continue
+        elements.append((element, depth))
+        stack.extend((child, depth + 1) for child in reversed(element))
+
+    spans = {}
+    position = 0
+    depth = 0
+    for match in XML_MARKUP_RE.finditer(text):
+        name = match.group(1)
+        if name is None:
+            if text.startswith('</', match.start()):
+                depth -= 1
+            continue
+        if position >= len(elements):
+            return None
+        element, expected_depth = elements[position]
+        if depth != expected_depth or name.rsplit(':', 1)[-1] != element.tag.rsplit('}', 1)[-1]:
+            return None
+        spans[element] = (match.start(), match.start() + 1 + len(name))
+        position += 1
+        if text[match.end() - 2] != '/':
+            depth += 1
+    return spans if position == len(elements) else None
+
+
+# node_path 生成的 XML 路径：按步骤切分（{uri} 中的 "/" 不切分），每一步为 名称[序号] 或 @属性名
+XML_PATH_STEP_RE = re.compile(r"@?(?:\{[^}]*\})?[^/{]+")
+XML_PATH_PART_RE = re.compile(r"^(@?(?:\{[^}]*\})?[^\[\]]+)(?:\[(\d+)\])?$")
+
+
+class NodeTable:
+    """
+    紧凑的节点表：解析结果按广度优先顺序展开为并行数组，同一节点的子节点编号连续（第 k 个子节点为 first_child + k）
+    树形视图模型、路径查找和树内搜索都只读这张表，不为每个节点创建 Qt 对象；
+    键和值只保存对解析结果中已有对象的引用，显示文本在绘制可见行时才生成
+    """
+
+    # 节点类型（类型名与树形视图“类型”列的显示一致）
+    OBJECT, ARRAY, STRING, INTEGER, FLOAT, BOOLEAN, NULL, ELEMENT, ATTRIBUTE = range(9)
+    TYPE_NAMES = ('Object', 'Array', 'str', 'int', 'float', 'bool', 'NoneType', 'Element', 'Attribute')
+    JSON_KINDS = {dict: OBJECT, list: ARRAY, str: STRING, int: INTEGER, float: FLOAT, bool: BOOLEAN, type(None): NULL}
+
+    def __init__(self, format_type):
+        self.format_type = format_type
+        self.parents = array('i')
+        self.first_child = array('i')
+        self.child_count = array('i')
+        self.sizes = array('i')
+        self.byte_sizes = array('q')
+        self.kinds = bytearray()
+        self.keys = []
+        self.values = []
+        # 按路径查找时为经过的节点按需建立的子节点查找表
+        self._child_maps = {}
+
+    def __len__(self):
+        return len(self.kinds)
+
+    @classmethod
+    def _json_kind(cls, value):
+        """
+        JSON 值的节点类型（兼容 dict/list 的子类）
+        """
+        kind = cls.JSON_KINDS.get(type(value))
+        if kind is not None:
+            return kind
+        if isinstance(value, dict):
+            return cls.OBJECT
+        if isinstance(value, (list, tuple)):
+            return cls.ARRAY
+        return cls.STRING
+
+    @classmethod
+    def from_json(cls, data):
+        """
+        从 JSON 值构建节点表（数组元素的键为 None，显示时按行号生成 [i]）
+        """
+        table = cls('JSON')
+        parents, first_child, child_count = table.parents, table.first_child, table.child_count
+        kinds, keys, values = table.kinds, table.keys, table.values
+        kind_of = cls._json_kind
+        OBJECT, ARRAY = cls.OBJECT, cls.ARRAY
+
+        parents.append(-1)
+        keys.append(None)
+        values.append(data)
+        kinds.append(kind_of(data))
+        node = 0
+        while node < len(kinds):
+            kind = kinds[node]
+            if kind == OBJECT or kind == ARRAY:
+                value = values[node]
+                first_child.append(len(kinds))
+                child_count.append(len(value))
+                if kind == OBJECT:
+                    keys.extend(value.keys())
+                    children = value.values()
+                else:
+                    keys.extend([None] * len(value))
+                    children = value
+                values.extend(children)
+                kinds.extend(map(kind_of, children))
+                parents.extend(array('i', [node]) * len(value))
+            else:
+                first_child.append(-1)
+                child_count.append(0)
+            node += 1
+        table._compute_sizes()
+        return table
+
+    @classmethod
+    def from_xml(cls, root):
+        """
+        从 XML 根元素构建节点表：每个元素的子节点依次为属性和子元素
+        """
+        table = cls('XML')
+        parents, first_child, child_count = table.parents, table.first_child, table.child_count
+        kinds, keys, values = table.kinds, table.keys, table.values
+        ELEMENT, ATTRIBUTE = cls.ELEMENT, cls.ATTRIBUTE
+
+        parents.append(-1)
+        keys.append(root.tag)
+        values.append(root)
+        kinds.append(ELEMENT)
+        node = 0
+        while node < len(kinds):
+            if kinds[node] == ELEMENT:
+                element = values[node]
+                attrib = element.attrib
+                children = list(element)
+                count = len(attrib) + len(children)
+                first_child.append(len(kinds) if count else -1)
+                child_count.append(count)
+                if attrib:
+                    keys.extend(attrib.keys())
+                    values.extend(attrib.values())
+                    kinds.extend(bytes([ATTRIBUTE]) * len(attrib))
+                if children:
+                    keys.extend([child.tag for child in children])
+                    values.extend(children)
+                    kinds.extend(bytes([ELEMENT]) * len(children))
+                parents.extend(array('i', [node]) * count)
+            else:
+                first_child.append(-1)
+                child_count.append(0)
+            node += 1
+        table._compute_sizes()
+        return table
+
+    # 保存到会话快照的数组（名称、类型码），之后是节点类型字节串
+    SNAPSHOT_ARRAYS = (('parents', 'i'), ('first_child', 'i'), ('child_count', 'i'),
+                       ('sizes', 'i'), ('byte_sizes', 'q'))
+
+    def to_snapshot(self):
+        """
+        展开为可安全保存的形式：返回 (描述, 二进制块列表)
+        描述中只有字符串、数字和 None（键名、叶子的值，XML 元素的 text/tail），二进制块为各并行数组的原始字节
+        含注释或处理指令（标签不是字符串）的 XML 树无法保存，抛出 ValueError
+        """
+        kinds, keys, values = self.kinds, self.keys, self.values
+        if self.format_type == 'JSON':
+            OBJECT, ARRAY = self.OBJECT, self.ARRAY
+            info = {
+                'scalars': [None if kind == OBJECT or kind == ARRAY else value
+                            for kind, value in zip(kinds, values)],
+            }
+        else:
+            if not all(isinstance(key, str) for key in keys):
+                raise ValueError('XML 树中含有注释或处理指令')
+            ELEMENT = self.ELEMENT
+            info = {
+                'scalars': [None if kind == ELEMENT else value for kind, value in zip(kinds, values)],
+                'texts': [value.text if kind == ELEMENT else None for kind, value in zip(kinds, values)],
+                'tails': [value.tail if kind == ELEMENT else None for kind, value in zip(kinds, values)],
+            }
+        info.update(format=self.format_type, count=len(kinds), byteorder=sys.byteorder, keys=keys)
+        blobs = [getattr(self, name).tobytes() for name, _ in self.SNAPSHOT_ARRAYS]
+        blobs.append(bytes(kinds))
+        return info, blobs
+
+    @classmethod
+    def from_snapshot(cls, info, blobs):
+        """
+        由 to_snapshot 的结果重建节点表和解析结果（按编号逆序组装，子节点总在父节点之前完成），不需要重新解析文本
+        数据不完整或不一致时抛出 ValueError
+        """
+        format_type = info['format']
+        if format_type not in ('JSON', 'XML'):
+            raise ValueError(f'未知的格式：{format_type}')
+        table = cls(format_type)
+        count = info['count']
+        if len(blobs) != len(cls.SNAPSHOT_ARRAYS) + 1:
+            raise ValueError('节点表数据不完整')
+        for (name, typecode), blob in zip(cls.SNAPSHOT_ARRAYS, blobs):
+            values = array(typecode)
+            values.frombytes(blob)
+            if info['byteorder'] != sys.byteorder:
+                values.byteswap()
+            if len(values) != count:
+                raise ValueError('节点表数据不完整')
+            setattr(table, name, values)
+        table.kinds = bytearray(blobs[-1])
+        table.keys = list(info['keys'])
+        scalars = info['scalars']
+        if not count or len(table.kinds) != count or len(table.keys) != count or len(scalars) != count:
+            raise ValueError('节点表数据不完整')
+        allowed = set(range(cls.ELEMENT)) if format_type == 'JSON' else {cls.ELEMENT, cls.ATTRIBUTE}
+        if not set(table.kinds) <= allowed or (format_type == 'XML' and table.kinds[0] != cls.ELEMENT):
+            raise ValueError('节点类型不正确')
+
+        kinds, keys, first_child, child_count = table.kinds, table.keys, table.first_child, table.child_count
+        values = list(scalars)
+        if format_type == 'JSON':
+            OBJECT, ARRAY = cls.OBJECT, cls.ARRAY
+            for node in range(count - 1, -1, -1):
+                kind = kinds[node]
+                if kind == OBJECT or kind == ARRAY:
+                    first = first_child[node]
+                    end = first + child_count[node]
+                    if first <= node or end > count:
+                        raise ValueError('节点表结构不正确')
+                    if kind == OBJECT:
+                        values[node] = dict(zip(keys[first:end], values[first:end]))
+                    else:
+                        values[node] = values[first:end]
+        else:
+            ELEMENT, ATTRIBUTE = cls.ELEMENT, cls.ATTRIBUTE
+            texts, tails = info['texts'], info['tails']
+            if len(texts) != count or len(tails) != count:
+                raise ValueError('节点表数据不完整')
+            for node in range(count - 1, -1, -1):
+                if kinds[node] != ELEMENT:
+                    continue
+                element = ET.Element(keys[node])
+                element.text = texts[node]
+                element.tail = tails[node]
+                first = first_child[node]
+                end = first + child_count[node]
+                if child_count[node] and (first <= node or end > count):
+                    raise ValueError('节点表结构不正确')
+                for child in range(max(first, 0), end):
+                    if kinds[child] == ATTRIBUTE:
+                        element.set(keys[child], values[child])
+                    else:
+                        element.append(values[child])
+                values[node] = element
+        table.values = values
+        return table
+
+    def _compute_sizes(self):
+        """
+        计算每个节点的子树大小（含自身）：节点数和序列化后的字节数（UTF-8）
+        广度优先编号中子节点总在父节点之后，逆序一遍累加即可。
+        JSON 按压缩格式计算（与“压缩”的输出一致）；XML 按标签、属性和文本估算，不计转义和声明
+        """
+        count = len(self.kinds)
+        sizes = array('i', [1]) * count
+        byte_sizes = array('q', [0]) * count
+        parents, kinds, keys, values = self.parents, self.kinds, self.keys, self.values
+        child_count = self.child_count
+        is_json = self.format_type == 'JSON'
+        OBJECT, ARRAY, STRING, INTEGER, FLOAT, BOOLEAN = (
+            self.OBJECT, self.ARRAY, self.STRING, self.INTEGER, self.FLOAT, self.BOOLEAN)
+        ELEMENT, ATTRIBUTE = self.ELEMENT, self.ATTRIBUTE
+        # JSON 对象的键名大量重复，键名（含引号和冒号）的字节数按键缓存
+        key_bytes = {}
+        for node in range(count - 1, -1, -1):
+            kind = kinds[node]
+            if kind == STRING:
+                text = encode_json_string(values[node])
+                own = len(text) if text.isascii() else len(text.encode('utf-8'))
+            elif kind == OBJECT or kind == ARRAY:
+                # 括号和元素间的逗号
+                own = 1 + (child_count[node] or 1)
+            elif kind == INTEGER:
+                own = len(int.__repr__(values[node]))
+            elif kind == FLOAT:
+                own = len(float.__repr__(values[node]))
+            elif kind == BOOLEAN:
+                own = 4 if values[node] else 5
+            elif kind == ELEMENT:
+                # <tag>text</tag>tail
+                element = values[node]
+                own = 2 * utf8_length(keys[node]) + 5 + utf8_length(element.text or '') + utf8_length(element.tail or '')
+            elif kind == ATTRIBUTE:
+                # 空格、等号和引号
+                own = utf8_length(keys[node]) + utf8_length(values[node]) + 4
+            else:
+                own = 4
+            if is_json:
+                key = keys[node]
+                if key is not None:
+                    cost = key_bytes.get(key)
+                    if cost is None:
+                        cost = key_bytes[key] = utf8_length(encode_json_string(key)) + 1
+                    own += cost
+            total = byte_sizes[node] + own
+            byte_sizes[node] = total
+            if node:
+                parent = parents[node]
+                byte_sizes[parent] += total
+                sizes[parent] += sizes[node]
+        self.sizes = sizes
+        self.byte_sizes = byte_sizes
+
+    def heaviest(self, limit=50):
+        """
+        序列化字节数最大的 limit 个节点（不含根节点），按字节数从大到小排列
+        """
+        return heapq.nlargest(limit, range(1, len(self)), key=self.byte_sizes.__getitem__)
+
+    def memory_size(self):
+        """
+        节点表自身占用的字节数（不含被引用的键和值对象）
+        """
+        arrays = (self.parents, self.first_child, self.child_count, self.sizes, self.byte_sizes)
+        return (sum(part.itemsize * len(part) for part in arrays) + sys.getsizeof(self.kinds)
+                + sys.getsizeof(self.keys) + sys.getsizeof(self.values))
+
+    def row(self, node):
+        """
+        节点在父节点中的行号
+        """
+        parent = self.parents[node]
+        return 0 if parent < 0 else node - self.first_child[parent]
+
+    def depth(self, node):
+        """
+        节点的嵌套深度（根节点为 0）
+        """
+        depth = 0
+        parents = self.parents
+        while parents[node] >= 0:
+            node = parents[node]
+            depth += 1
+        return depth
+
+    def ancestors(self, node):
+        """
+        从根节点到该节点（不含）的祖先节点
+        """
+        chain = []
+        parents = self.parents
+        node = parents[node]
+        while node >= 0:
+            chain.append(node)
+            node = parents[node]
+        chain.reverse()
+        return chain
+
+    def visible_node(self, node):
+        """
+        节点本身，或节点过深时可以安全展开显示的最深祖先
+        """
+        depth = self.depth(node)
+        while depth > MAX_VIEW_DEPTH:
+            node = self.parents[node]
+            depth -= 1
+        return node
+
+    def label(self, node):
+        """
+        第一列显示的键名 / 索引 / 元素名
+        """
+        kind = self.kinds[node]
+        if node == 0 and self.format_type == 'JSON':
+            if kind == self.OBJECT:
+                return "JSON Object"
+            return "JSON Array" if kind == self.ARRAY else "JSON Value"
+        key = self.keys[node]
+        if kind == self.ATTRIBUTE:
+            return f"@{key}"
+        if key is None:
+            return f"[{self.row(node)}]"
+        return str(key)
+
+    def display_value(self, node):
+        """
+        第二列显示的值
+        """
+        kind = self.kinds[node]
+        value = self.values[node]
+        if kind == self.OBJECT or kind == self.ARRAY:
+            return f"{self.child_count[node]} 项"
+        if kind == self.ELEMENT:
+            if not value.text:
+                return ""
+            return value.text if node == 0 else value.text.strip()
+        if kind == self.ATTRIBUTE:
+            return value
+        return str(value) if node == 0 else format_tree_value(value)
+
+    def type_name(self, node):
+        """
+        第三列显示的类型名
+        """
+        return self.TYPE_NAMES[self.kinds[node]]
+
+    def _child_map(self, node):
+        """
+        节点的子节点查找表（第一次经过该节点时构建并缓存）：
+        对象为 键名 → 节点；元素为 标签 → 同名子元素节点列表、@属性名 → 节点
+        """
+        mapping = self._child_maps.get(node)
+        if mapping is None:
+            first = self.first_child[node]
+            keys, kinds = self.keys, self.kinds
+            mapping = {}
+            if kinds[node] == self.ELEMENT:
+                for child in range(first, first + self.child_count[node]):
+                    if kinds[child] == self.ATTRIBUTE:
+                        mapping['@' + keys[child]] = child
+                    else:
+                        mapping.setdefault(keys[child], []).append(child)
+            else:
+                for child in range(first, first + self.child_count[node]):
+                    mapping[keys[child]] = child
+            self._child_maps[node] = mapping
+        return mapping
+
+    def find_child(self, node, token):
+        """
+        按键名或数组下标查找子节点，找不到时返回 -1
+        """
+        kind = self.kinds[node]
+        if kind == self.ARRAY:
+            token = str(token)
+            if token.isdigit() and int(token) < self.child_count[node]:
+                return self.first_child[node] + int(token)
+            return -1
+        if kind != self.OBJECT:
+            return -1
+        return self._child_map(node).get(token, -1)
+
+    def node_path(self, node):
+        """
+        节点的路径：JSON 为 RFC 6901 JSON Pointer（根节点为空串），
+        XML 为绝对路径，同名兄弟元素用 [n] 区分，属性为 /@name，例如 /root/item[2]/@id
+        """
+        chain = self.ancestors(node) + [node]
+        if self.format_type == 'JSON':
+            return format_json_pointer(
+                self.row(step) if self.keys[step] is None else self.keys[step] for step in chain[1:])
+        steps = [self.keys[0]]
+        for step in chain[1:]:
+            if self.kinds[step] == self.ATTRIBUTE:
+                steps.append('@' + self.keys[step])
+                continue
+            siblings = self._child_map(self.parents[step])[self.keys[step]]
+            if len(siblings) > 1:
+                steps.append(f'{self.keys[step]}[{bisect_left(siblings, step) + 1}]')
+            else:
+                steps.append(self.keys[step])
+        return '/' + '/'.join(steps)
+
+    def resolve_path(self, path):
+        """
+        按 node_path 格式的路径逐级查找节点（每级查表，总耗时与深度成正比），路径无效或不存在时抛出 ValueError
+        """
+        if not len(self):
+            raise ValueError('没有可查找的数据')
+        path = path.strip()
+        if self.format_type == 'JSON':
+            node = 0
+            for depth, token in enumerate(parse_json_pointer(path)):
+                node = self.find_child(node, token)
+                if node < 0:
+                    raise ValueError(f'路径不存在：{format_json_pointer(parse_json_pointer(path)[:depth + 1])}')
+            return node
+
+        if not path.startswith('/'):
+            raise ValueError(f'XML 路径必须以 "/" 开头：{path}')
+        # 命名空间写作 {uri}tag，其中的 "/" 不是分隔符
+        steps = XML_PATH_STEP_RE.findall(path)
+        if not steps:
+            raise ValueError(f'无效的 XML 路径：{path}')
+        node = -1
+        for depth, step in enumerate(steps):
+            match = XML_PATH_PART_RE.match(step)
+            if match is None:
+                raise ValueError(f'无效的路径步骤：{step}')
+            name, position = match.group(1), int(match.group(2) or 1)
+            if node < 0:
+                candidates = [0] if name == self.keys[0] else []
+            elif self.kinds[node] != self.ELEMENT:
+                candidates = []
+            elif name.startswith('@'):
+                child = self._child_map(node).get(name)
+                candidates = [] if child is None else [child]
+            else:
+                candidates = self._child_map(node).get(name, [])
+            if not 0 < position <= len(candidates):
+                raise ValueError(f'路径不存在：/{"/".join(steps[:depth + 1])}')
+            node = candidates[position - 1]
+        return node
+
+    def iter_preorder(self, start=0):
+        """
+        按文档顺序（先序）遍历子树中的节点（显式栈，不受嵌套深度限制）
+        """
+        first_child, child_count = self.first_child, self.child_count
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            yield node
+            count = child_count[node]
+            if count:
+                first = first_child[node]
+                stack.extend(range(first + count - 1, first - 1, -1))
+
+    def search(self, text, limit=10000):
+        """
+        按文档顺序查找键名或值包含 text（不区分大小写）的节点
+        """
+        needle = text.casefold()
+        matches = []
+        for node in self.iter_preorder():
+            if needle in self.label(node).casefold() or needle in self.display_value(node).casefold():
+                matches.append(node)
+                if len(matches) >= limit:
+                    break
+        return matches
+
+
+class NodeTreeModel(QAbstractItemModel):
+    """
+    基于 NodeTable 的只读树模型：QModelIndex 的 internalId 就是节点编号，只为可见行生成显示文本
+    元素很多的数组按下标分组显示（[0…999]、[1000…1999]、…），分组逐层嵌套，每层最多 bucket_size 行；
+    分组行没有对应的节点，展开到哪里才登记到哪里
+    """
+
+    # 标记节点（例如 Schema 违反项）的背景色
+    MARK_COLOR = QColor('#fadbd8')
+    # 分组行的 internalId 从该值开始（节点编号总小于它）
+    BUCKET_BASE = 1 << 40
+    BUCKET_COLOR = QColor('#7f8c8d')
+    # “大小”列所在的列号，背景色按子树占整个文档的比例从白色渐变到红色
+    SIZE_COLUMN = 3
+    HEAT_COLORS = [QColor(255, int(255 - 155 * level / 20), int(255 - 175 * level / 20)) for level in range(21)]
+
+    @classmethod
+    def heat_color(cls, ratio):
+        """
+        占比对应的背景色（取平方根，小占比也能分辨）
+        """
+        return cls.HEAT_COLORS[min(20, int(math.sqrt(max(ratio, 0.0)) * 20 + 0.5))]
+
+    def __init__(self, headers, parent=None, bucket_size=1000):
+        super().__init__(parent)
+        self.headers = headers
+        self.table = None
+        self.marks = {}
+        self.bucket_size = bucket_size
+        # 已登记的分组：(数组节点, 起始下标, 结束下标, 每个子项覆盖的元素数, 父项, 行号)
+        self.buckets = []
+        self.bucket_ids = {}
+        # 分组行的 (节点数, 字节数)，第一次显示时累加
+        self.bucket_sizes = {}
+
+    def set_table(self, table):
+        """
+        替换节点表（重置模型）
+        """
+        self.beginResetModel()
+        self.table = table
+        self.marks = {}
+        self.buckets = []
+        self.bucket_ids = {}
+        self.bucket_sizes = {}
+        self.endResetModel()
+
+    def subtree_size(self, item):
+        """
+        节点或分组行的 (节点数, 序列化字节数)
+        """
+        if item < self.BUCKET_BASE:
+            return self.table.sizes[item], self.table.byte_sizes[item]
+        size = self.bucket_sizes.get(item)
+        if size is None:
+            node, start, end, _, _, _ = self.buckets[item - self.BUCKET_BASE]
+            first = self.table.first_child[node]
+            size = (sum(self.table.sizes[first + start:first + end]),
+                    sum(self.table.byte_sizes[first + start:first + end]))
+            self.bucket_sizes[item] = size
+        return size
+
+    def size_text(self, item):
+        """
+        “大小”列的显示文本：字节数和节点数
+        """
+        nodes, size = self.subtree_size(item)
+        return f"{format_size(size)} · {nodes} 节点"
+
+    def set_bucket_size(self, size):
+        """
+        修改数组分组大小（重置模型）
+        """
+        if size == self.bucket_size:
+            return
+        self.bucket_size = size
+        marks = self.marks
+        self.set_table(self.table)
+        self.marks = marks
+
+    def is_bucket(self, item):
+        """
+        internalId 是否为分组行
+        """
+        return item >= self.BUCKET_BASE
+
+    def _bucket(self, node, start, end, span, parent, row):
+        """
+        登记（或取回已登记的）分组行
+        """
+        key = (node, start, span)
+        item = self.bucket_ids.get(key)
+        if item is None:
+            item = self.BUCKET_BASE + len(self.buckets)
+            self.buckets.append((node, start, end, span, parent, row))
+            self.bucket_ids[key] = item
+        return item
+
+    def _children(self, item):
+        """
+        项的子项布局：(子项数, 每个子项覆盖的元素数, 起始下标, 结束下标, 节点)
+        每个子项覆盖 1 个元素时子项就是节点本身，否则是分组
+        """
+        if item >= self.BUCKET_BASE:
+            node, start, end, span, _, _ = self.buckets[item - self.BUCKET_BASE]
+            return -(-(end - start) // span), span, start, end, node
+        count = self.table.child_count[item]
+        span = 1
+        if self.table.kinds[item] == NodeTable.ARRAY:
+            # 顶层每组覆盖的元素数取分组大小的整数次幂，使顶层不超过 bucket_size 行
+            while count > span * self.bucket_size:
+                span *= self.bucket_size
+        return -(-count // span), span, 0, count, item
+
+    def _child(self, item, row):
+        """
+        项的第 row 个子项
+        """
+        _, span, start, end, node = self._children(item)
+        if span == 1:
+            return self.table.first_child[node] + start + row
+        child_start = start + row * span
+        return self._bucket(node, child_start, min(end, child_start + span), span // self.bucket_size, item, row)
+
+    def _locate(self, item):
+        """
+        项的父项和行号，根节点的父项为 -1
+        节点位于分组数组中时，按下标逐层定位到所在的分组（层数与分组嵌套层数相同）
+        """
+        if item >= self.BUCKET_BASE:
+            bucket = self.buckets[item - self.BUCKET_BASE]
+            return bucket[4], bucket[5]
+        parent = self.table.parents[item]
+        if parent < 0:
+            return -1, 0
+        row = item - self.table.first_child[parent]
+        owner = parent
+        _, span, start, _, _ = self._children(owner)
+        while span > 1:
+            owner = self._child(owner, (row - start) // span)
+            _, span, start, _, _ = self._children(owner)
+        return owner, row - start
+
+    def node_index(self, node, column=0):
+        """
+        节点（或分组行）对应的模型索引
+        """
+        if self.table is None or node < 0:
+            return QModelIndex()
+        return self.createIndex(self._locate(node)[1], column, node)
+
+    def index(self, row, column, parent=QModelIndex()):
+        if self.table is None or not len(self.table) or not 0 <= column < len(self.headers):
+            return QModelIndex()
+        if not parent.isValid():
+            return self.createIndex(row, column, 0) if row == 0 else QModelIndex()
+        item = parent.internalId()
+        if not 0 <= row < self._children(item)[0]:
+            return QModelIndex()
+        return self.createIndex(row, column, self._child(item, row))
+
+    def parent(self, index=QModelIndex()):
+        if not index.isValid():
+            return QModelIndex()
+        parent, _ = self._locate(index.internalId())
+        if parent < 0:
+            return QModelIndex()
+        return self.createIndex(self._locate(parent)[1], 0, parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if self.table is None or not len(self.table):
+            return 0
+        if not parent.isValid():
+            return 1
+        if parent.column() > 0:
+            return 0
+        return self._children(parent.internalId())[0]
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.headers)
+
+    def hasChildren(self, parent=QModelIndex()):
+        return self.rowCount(parent) > 0
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalId()
+        if index.column() == self.SIZE_COLUMN:
+            if role == Qt.DisplayRole:
+                return self.size_text(node)
+            if role == Qt.BackgroundRole:
+                return self.heat_color(self.subtree_size(node)[1] / max(self.table.byte_sizes[0], 1))
+            if role == Qt.TextAlignmentRole:
+                return int(Qt.AlignRight | Qt.AlignVCenter)
+            return None
+        if node >= self.BUCKET_BASE:
+            _, start, end, _, _, _ = self.buckets[node - self.BUCKET_BASE]
+            if role == Qt.DisplayRole:
+                column = index.column()
+                if column == 0:
+                    return f"[{start}…{end - 1}]"
+                if column == 1:
+                    return f"{end - start} 项"
+                return ""
+            if role == Qt.ForegroundRole:
+                return self.BUCKET_COLOR
+            return None
+        if role == Qt.DisplayRole:
+            column = index.column()
+            if column == 0:
+                return self.table.label(node)
+            if column == 1:
+                return self.table.display_value(node)
+            return self.table.type_name(node)
+        if role == Qt.BackgroundRole and node in self.marks:
+            return self.MARK_COLOR
+        if role == Qt.ToolTipRole and node in self.marks:
+            return self.marks[node]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.headers[section]
+        return None
+
+
+class NodeTreeView(QTreeView):
+    """
+    JSON/XML 树形视图的公共部分：数据放在 NodeTable 中，通过 NodeTreeModel 显示
+    """
+
+    def __init__(self, headers, parent=None):
+        super().__init__(parent)
+        self.table = None
+        self.node_model = NodeTreeModel(headers, self)
+        self.setModel(self.node_model)
+        self.setup_tree()
+
+    def setup_tree(self):
+        """
+        设置树形视图的基本属性
+        """
+        # 设置列宽
+        header = self.header()
+        header.setStretchLastSection(False)
+        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(1, QHeaderView.Stretch)
+        header.setSectionResizeMode(2, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(3, QHeaderView.ResizeToContents)
+
+        # 设置选择模式
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
+
+        # 所有行等高，滚动和布局不需要逐行计算高度
+        self.setUniformRowHeights(True)
+
+        # 设置样式
+        self.setStyleSheet("""
+            QTreeView {
+                border: 2px solid #bdc3c7;
+                border-radius: 5px;
+                background-color: white;
+                font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
+                font-size: 24px;
+                alternate-background-color: #f8f9fa;
+            }
+            QTreeView::item {
+                padding: 6px;
+                border-bottom: 1px solid #ecf0f1;
+                height: 24px;
+            }
+            QTreeView::item:selected {
+                background-color: #3498db;
+                color: white;
+            }
+            QTreeView::item:hover {
+                background-color: #e8f4fd;
+            }
+            QTreeView::branch:has-children:!has-siblings:closed,
+            QTreeView::branch:closed:has-children:has-siblings {
+                border-image: none;
+                image: none;
+                background-color: #27ae60;
+                width: 18px;
+                height: 18px;
+                border-radius: 9px;
+                margin: 1px;
+                border: 2px solid #2ecc71;
+            }
+            QTreeView::branch:open:has-children:!has-siblings,
+            QTreeView::branch:open:has-children:has-siblings {
+                border-image: none;
+                image: none;
+                background-color: #e74c3c;
+                width: 18px;
+                height: 18px;
+                border-radius: 9px;
+                margin: 1px;
+                border: 2px solid #c0392b;
+            }
+            QTreeView::branch:has-children:!has-siblings:closed:hover,
+            QTreeView::branch:closed:has-children:has-siblings:hover {
+                background-color: #229954;
+                border: 2px solid #27ae60;
+            }
+            QTreeView::branch:open:has-children:!has-siblings:hover,
+            QTreeView::branch:open:has-children:has-siblings:hover {
+                background-color: #cb4335;
+                border: 2px solid #e74c3c;
+            }
+        """)
+
+        # 启用交替行颜色
+        self.setAlternatingRowColors(True)
+
+        # 设置根节点装饰
+        self.setRootIsDecorated(True)
+
+        # 设置动画效果
+        self.setAnimated(True)
+
+    def set_table(self, table):
+        """
+        显示新的节点表并展开根节点
+        """
+        self.table = table
+        self.node_model.set_table(table)
+        if table is not None:
+            self.expandToDepth(0)
+
+    def _index_node(self, index):
+        """
+        索引对应的节点，无效索引或分组行返回 -1
+        """
+        if not index.isValid() or self.node_model.is_bucket(index.internalId()):
+            return -1
+        return index.internalId()
+
+    def set_bucket_size(self, size):
+        """
+        修改大数组的分组大小并重新显示
+        """
+        if size == self.node_model.bucket_size:
+            return
+        self.node_model.set_bucket_size(size)
+        if self.table is not None:
+            self.expandToDepth(0)
+
+    def current_node(self):
+        """
+        当前选中的节点，没有（或选中的是分组行）时返回 -1
+        """
+        return self._index_node(self.currentIndex())
+
+    def node_at(self, position):
+        """
+        视口坐标处的节点，没有（或是分组行）时返回 -1
+        """
+        return self._index_node(self.indexAt(position))
+
+    def node_text(self, node, column):
+        """
+        节点在某一列显示的文本
+        """
+        if column == 0:
+            return self.table.label(node)
+        if column == 1:
+            return self.table.display_value(node)
+        if column == 2:
+            return self.table.type_name(node)
+        return self.node_model.size_text(node)
+
+    def reveal_node(self, node):
+        """
+        展开节点的所有祖先（过深时只到可安全显示的深度），返回实际显示的节点
+        """
+        node = self.table.visible_node(node)
+        # 沿模型的父项链展开，途经的数组分组行也一并展开
+        chain = []
+        parent = self.node_model.node_index(node).parent()
+        while parent.isValid():
+            chain.append(parent)
+            parent = parent.parent()
+        for index in reversed(chain):
+            self.setExpanded(index, True)
+        return node
+
+    def select_node(self, node):
+        """
+        选中节点并滚动到该处
+        """
+        node = self.reveal_node(node)
+        index = self.node_model.node_index(node)
+        self.setCurrentIndex(index)
+        self.scrollTo(index)
+        return node
+
+    def get_selected_path(self):
+        """
+        获取选中项的路径（JSON Pointer 或 XML 路径，沿父节点链生成，与深度成正比），没有选中项时返回 None
+        """
+        node = self.current_node()
+        if node < 0:
+            return None
+        return self.table.node_path(node)
+
+    def go_to_path(self, path):
+        """
+        按路径选中并显示节点（只展开其祖先），路径无效或不存在时抛出 ValueError
+        """
+        if self.table is None:
+            raise ValueError('树形视图中没有数据')
+        return self.select_node(self.table.resolve_path(path))
+
+    def save_view_state(self):
+        """
+        记录展开的节点、选中的节点和滚动位置（按路径记录，换成另一份节点表后仍可恢复）
+        """
+        if self.table is None:
+            return None
+        model = self.node_model
+        expanded = []
+        stack = [QModelIndex()]
+        while stack:
+            parent = stack.pop()
+            for row in range(model.rowCount(parent)):
+                index = model.index(row, 0, parent)
+                if not self.isExpanded(index):
+                    continue
+                # 分组行没有路径，展开其中的节点时会随祖先一并展开
+                if not model.is_bucket(index.internalId()):
+                    expanded.append(self.table.node_path(index.internalId()))
+                stack.append(index)
+        return {'expanded': expanded, 'current': self.get_selected_path(),
+                'scroll': self.verticalScrollBar().value()}
+
+    def restore_view_state(self, state):
+        """
+        按 save_view_state 的记录恢复展开状态、选中项和滚动位置，新数据中不存在的路径忽略
+        """
+        if state is None or self.table is None:
+            return
+        for path in state['expanded']:
+            try:
+                node = self.table.resolve_path(path)
+            except ValueError:
+                continue
+            self.setExpanded(self.node_model.node_index(self.reveal_node(node)), True)
+        if state['current'] is not None:
+            try:
+                node = self.reveal_node(self.table.resolve_path(state['current']))
+                self.setCurrentIndex(self.node_model.node_index(node))
+            except ValueError:
+                pass
+        self.verticalScrollBar().setValue(state['scroll'])
+
+    def search_nodes(self, text):
+        """
+        在节点表中按文档顺序查找键名或值包含 text 的节点
+        """
+        if self.table is None or not text:
+            return []
+        return self.table.search(text)
+
+
+class JSONTreeWidget(NodeTreeView):
+    """
+    自定义JSON树形视图组件
+    """
+
+    # 显示的 JSON 数据发生变化
+    json_data_changed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(["键/索引", "值", "类型", "大小"], parent)
+        self.json_data = None
+
+    def populate_tree(self, json_data, table=None):
+        """
+        填充树形视图数据（table 为在后台线程中预先构建的节点表）
+        """
+        self.json_data = json_data
+        self.json_data_changed.emit()
+        if table is None and json_data is not None:
+            table = NodeTable.from_json(json_data)
+        self.set_table(table)
+
+    def get_item_value(self, node):
+        """
+        节点对应的 JSON 值（节点表中保存着值的引用）
+        """
+        return self.table.values[node]
+
+    def get_subtree_text(self, node):
+        """
+        将节点对应的子树序列化为美化后的 JSON 文本
+        """
+        return dump_json_pretty(self.get_item_value(node))
+
+    def find_node(self, tokens):
+        """
+        按路径片段（JSON Pointer 解析结果）查找节点，找不到时返回最深的已找到节点
+        """
+        node = 0
+        for token in tokens:
+            child = self.table.find_child(node, token)
+            if child < 0:
+                break
+            node = child
+        return node
+
+    def mark_violations(self, violations, limit=1000):
+        """
+        标记 Schema 违反项：节点标红、提示中显示说明，并展开到该节点
+        """
+        if self.table is None:
+            return 0
+        messages = {}
+        for pointer, message in violations[:limit]:
+            messages.setdefault(pointer, []).append(message)
+
+        marks = {}
+        for pointer, lines in messages.items():
+            node = self.find_node(parse_json_pointer(pointer))
+            marks[node] = '\n'.join(([marks[node]] if node in marks else []) + [pointer or '/'] + lines)
+            self.reveal_node(node)
+        self.node_model.marks = marks
+        self.viewport().update()
+        if marks:
+            self.scrollTo(self.node_model.node_index(self.table.visible_node(next(iter(marks)))))
+        return len(marks)
+
+
+class XMLTreeWidget(NodeTreeView):
+    """
+    自定义XML树形视图组件
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(["元素/属性", "值", "类型", "大小"], parent)
+        self.xml_root = None
+        self.element_index = None
+
+    def populate_tree(self, xml_root, table=None):
+        """
+        填充XML树形视图数据（table 为在后台线程中预先构建的节点表）
+        """
+        self.xml_root = xml_root
+        self.element_index = None
+        if table is None and xml_root is not None:
+            table = NodeTable.from_xml(xml_root)
+        self.set_table(table)
+
+    def get_item_element(self, node):
+        """
+        节点对应的 XML 元素（属性节点返回其所属元素）
+        """
+        if self.table.kinds[node] == NodeTable.ATTRIBUTE:
+            node = self.table.parents[node]
+        return self.table.values[node]
+
+    def get_subtree_text(self, node):
+        """
+        将节点对应的子树序列化为美化后的 XML 文本（属性节点返回属性值）
+        """
+        if self.table.kinds[node] == NodeTable.ATTRIBUTE:
+            return self.table.values[node]
+        return prettify_xml(self.get_item_element(node))
+
+    def get_element_index(self):
+        """
+        当前 XML 的元素索引（第一次查询时才遍历文档构建）
+        """
+        if self.element_index is None and self.xml_root is not None:
+            self.element_index = XMLElementIndex(self.xml_root)
+        return self.element_index
+
+    def element_node(self, element, attribute=None):
+        """
+        元素（或其属性）对应的节点：每个节点的子节点先排属性，再排子元素
+        """
+        node = 0
+        current = self.xml_root
+        for position in self.get_element_index().element_positions(element):
+            node = self.table.first_child[node] + len(current.attrib) + position
+            current = current[position]
+        if attribute is not None:
+            node = self.table.first_child[node] + list(element.attrib).index(attribute)
+        return node
+
+    def select_element(self, element, attribute=None):
+        """
+        选中元素（或其属性）对应的树节点并滚动到该处
+        """
+        return self.select_node(self.element_node(element, attribute))
+
+
+class JSONFormatterApp(QMainWindow):
+    """
+    JSON 格式化工具主窗口类
+    """
+
+    # 列统计结果的表头
+    STATS_HEADERS = ['键', '类型分布', '非空', 'null', '缺失', '最小值', '最大值', '平均值', '不同值', '高频值']
+
+    # XPath 查询面板最多列出的命中数
+    XPATH_RESULT_LIMIT = 1000
+
+    def __init__(self):
+        """
+        初始化主窗口
+        """
+        super().__init__()
+        # 初始化设置
+        self.settings = QSettings('JSONFormatter', 'FontSettings')
+        self.current_text_font_size = self.settings.value('text_font_size', 12, type=int)  # 文本编辑器字体
+        self.current_ui_font_size = self.settings.value('ui_font_size', 14, type=int)  # UI元素字体
+        self.temp_ui_font_size = self.current_ui_font_size  # 临时UI字体大小，用于保存前的预览
+
+        # 初始化操作性能记录器（耗时、峰值内存、输入输出大小）
+        self.profiler = OperationProfiler(get_app_data_dir(),
+                                          self.settings.value('perf/track_memory', False, type=bool))
+        self.profiler.on_finished = self.on_operation_profiled
+
+        # 界面卡顿监测（可选，在选项设置中开启）
+        self.stall_watchdog = UIStallWatchdog(self.settings.value('watchdog/threshold_ms', 200, type=int))
+        self.stall_watchdog.operation_provider = self.profiler.current_operation
+        if self.settings.value('watchdog/enabled', False, type=bool):
+            self.stall_watchdog.start()
+
+        # 分批展开树形视图的任务及其限制
+        self.expand_job = None
+        # 体积排行对话框（非模态）
+        self.size_report_dialog = None
+        self.expand_node_budget = self.settings.value('tree/expand_budget', 100000, type=int)
+        self.expand_max_depth = self.settings.value('tree/expand_max_depth', 0, type=int)
+        # 大数组在树形视图中按下标分组，每层最多显示的行数
+        self.tree_bucket_size = self.settings.value('tree/bucket_size', 1000, type=int)
+        # 处理前按输入规模估算峰值内存，超过上限时改用更省内存的策略
+        self.memory_limit_mb = self.settings.value('planner/memory_limit_mb', default_memory_limit_mb(), type=int)
+        # 正在执行的操作所用的策略（决定输出视图是否只显示开头部分）
+        self.active_plan = None
+        # 大输入先预览的顶层元素数（0 表示关闭）
+        self.quick_look_elements = self.settings.value('preview/elements', 200, type=int)
+        # 跟踪模式：正在跟踪的文件及其所在文档，窗口中最多保留的记录数
+        self.follower = None
+        self.follow_document = None
+        self.follow_window = self.settings.value('follow/window', 2000, type=int)
+        self.follow_tree_timer = QTimer(self)
+        self.follow_tree_timer.setSingleShot(True)
+        self.follow_tree_timer.setInterval(1000)
+        self.follow_tree_timer.timeout.connect(self.refresh_follow_tree)
+        # 上次刷新树形视图时已移出窗口的记录数
+        self.follow_tree_dropped = 0
+
+        # 后台任务（共享全局线程池），保存引用直到任务完成
+        self.thread_pool = QThreadPool.globalInstance()
+        self._background_tasks = set()
+
+        # 多文档：所有文档共用同一组视图和线程池，非活动文档的缓存受内存预算约束
+        self.documents = []
+        self.active_document = None
+        self.document_lru = DocumentLRU(
+            self.settings.value('documents/memory_budget_mb', 1024, type=int) * 1024 * 1024)
+        # 正在载入输入区的文件路径
+        self.opening_file = None
+
+        # 列统计：后台统计任务的取消标记
+        self.stats_cancel_event = None
+
+        # 表格视图：当前显示的对象数组及其列式数据（切换到表格标签页时才构建）
+        self.table_source = None
+        self.table_pending_source = None
+        self.table_build_generation = 0
+
+        # 树内查找：命中的节点、所属的节点表和查找文本
+        self.tree_search_hits = []
+        self.tree_search_key = None
+
+        # XPath 查询：命中结果及其所属的 XML 根元素
+        self.xpath_hits = []
+        self.xpath_hits_root = None
+        # 输出文本中各元素开始标签的位置：(根元素, 输出字符串, {元素: 范围} 或 None)
+        self.xml_output_spans_cache = None
+
+        # 会话快照：空闲时在后台保存，启动时延迟恢复
+        self.snapshot_path = os.path.join(get_app_data_dir(), 'session.snapshot')
+        self.restore_session_enabled = self.settings.value('session/restore', True, type=bool)
+        self.snapshot_timer = QTimer()
+        self.snapshot_timer.setSingleShot(True)
+        self.snapshot_timer.setInterval(3000)
+        self.snapshot_timer.timeout.connect(self.save_session_snapshot)
+
+        # 当前格式类型（JSON或XML）
+        self.current_format = 'JSON'
+
+        # 初始化搜索相关变量
+        self.input_search_widget = None
+        self.output_search_widget = None
+        self.input_replace_widget = None
+        self.output_replace_widget = None
+        self.current_search_text = ""
+        self.last_search_position = 0
+        self.search_results = []
+        self.current_result_index = -1
+
+        # 初始化JSON验证相关变量
+        self.json_error_format = QTextCharFormat()
+        self.json_error_format.setBackground(QColor(255, 200, 200))  # 浅红色背景
+        # 移除实时验证相关变量
+        # self.validation_timer = QTimer()
+        # self.validation_timer.setSingleShot(True)
+        # self.validation_timer.timeout.connect(self.validate_json_input)
+        # self.last_json_error = None
+
+        self.init_ui()
+        self.setup_connections()
+        self.setup_shortcuts()
+        self.apply_font_size()
+        self.new_document()
+
+        # 窗口显示后再在后台恢复上次会话，保证窗口立即可用
+        if self.restore_session_enabled and os.path.exists(self.snapshot_path):
+            QTimer.singleShot(0, self.restore_session_snapshot)
+
+    def init_ui(self):
+        """
+        初始化用户界面
+        """
+        # 设置窗口基本属性
+        self.setWindowTitle('离线 JSON/XML 格式化工具 v1.0')
+        self.setGeometry(100, 100, 1200, 800)
+        self.setMinimumSize(800, 600)
+
+        # 创建中央部件
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+
+        # 创建主布局
+        main_layout = QVBoxLayout(central_widget)
+        main_layout.setContentsMargins(10, 10, 10, 10)
+        main_layout.setSpacing(10)
+
+        # 创建标签页控件
+        self.tab_widget = QTabWidget()
+        main_layout.addWidget(self.tab_widget)
+
+        # 创建主功能标签页
+        main_tab = QWidget()
+        self.tab_widget.addTab(main_tab, "格式化工具")
+
+        # 创建选项标签页
+        options_tab = QWidget()
+        self.tab_widget.addTab(options_tab, "选项设置")
+
+        # 设置主功能标签页布局
+        main_tab_layout = QVBoxLayout(main_tab)
+        main_tab_layout.setContentsMargins(10, 10, 10, 10)
+        main_tab_layout.setSpacing(10)
+
+        # 创建标题和格式选择区域
+        title_format_layout = QHBoxLayout()
+        
+        # 创建简化的标题标签（减少占用空间）
+        self.title_label = QLabel('格式化工具')
+        self.title_label.setAlignment(Qt.AlignCenter)
+        self.title_label.setStyleSheet("""
+            QLabel {
+                font-size: 14px;
+                font-weight: bold;
+                color: #2c3e50;
+                padding: 5px;
+                background-color: #ecf0f1;
+                border-radius: 3px;
+                margin-bottom: 5px;
+            }
+        """)
+        title_format_layout.addWidget(self.title_label)
+
+        # 添加格式选择下拉框
+        format_label = QLabel('格式类型：')
+        format_label.setStyleSheet("""
+            QLabel {
+                font-size: 16px;
+                font-weight: bold;
+                color: #2c3e50;
+                padding: 5px;
+            }
+        """)
+        title_format_layout.addWidget(format_label)
+
+        self.format_combo = QComboBox()
+        self.format_combo.addItems(['JSON', 'XML'])
+        self.format_combo.setCurrentText('JSON')
+        self.format_combo.setStyleSheet("""
+            QComboBox {
+                padding: 5px;
+                border: 1px solid #bdc3c7;
+                border-radius: 3px;
+                background-color: white;
+                min-width: 80px;
+            }
+            QComboBox:hover {
+                border-color: #3498db;
+            }
+            QComboBox::drop-down {
+                border: none;
+            }
+            QComboBox::down-arrow {
+                image: none;
+                border-left: 5px solid transparent;
+                border-right: 5px solid transparent;
+                border-top: 5px solid #2c3e50;
+                margin-right: 5px;
+            }
+        """)
+        self.format_combo.currentTextChanged.connect(self.on_format_changed)
+        title_format_layout.addWidget(self.format_combo)
+
+        title_format_layout.addStretch()  # 添加弹性空间
+
+        main_tab_layout.addLayout(title_format_layout)
+
+        # 文档标签栏
+        document_layout = QHBoxLayout()
+        self.document_tabs = QTabBar()
+        self.document_tabs.setTabsClosable(True)
+        self.document_tabs.setMovable(True)
+        self.document_tabs.setExpanding(False)
+        self.document_tabs.setDocumentMode(True)
+        document_layout.addWidget(self.document_tabs, 1)
+
+        self.new_document_btn = QPushButton('＋ 新建文档')
+        self.new_document_btn.setToolTip('新建一个文档标签页（Ctrl+T）')
+        self.new_document_btn.setStyleSheet("""
+            QPushButton {
+                padding: 4px 10px;
+                min-width: 60px;
+                font-size: 12px;
+            }
+        """)
+        document_layout.addWidget(self.new_document_btn)
+
+        self.open_file_btn = QPushButton('📄 打开文件')
+        self.open_file_btn.setToolTip('打开 JSON/XML 文件，gzip/bz2/xz/zip 压缩文件边读边解压（Ctrl+O）')
+        self.open_file_btn.setStyleSheet("""
+            QPushButton {
+                padding: 4px 10px;
+                min-width: 60px;
+                font-size: 12px;
+            }
+        """)
+        document_layout.addWidget(self.open_file_btn)
+
+        self.batch_format_btn = QPushButton('🗂 批量格式化')
+        self.batch_format_btn.setToolTip('原地美化/排序/压缩目录中的所有 JSON/XML 文件，跳过未改动的文件')
+        self.batch_format_btn.setStyleSheet("""
+            QPushButton {
+                padding: 4px 10px;
+                min-width: 60px;
+                font-size: 12px;
+            }
+        """)
+        document_layout.addWidget(self.batch_format_btn)
+
+        self.follow_btn = QPushButton('📡 跟踪文件')
+        self.follow_btn.setToolTip('跟踪不断增长的 JSON Lines 日志：只读取新追加的行并追加到输出和树形视图，'
+                                   '只保留最近的若干条记录')
+        self.follow_btn.setStyleSheet("""
+            QPushButton {
+                padding: 4px 10px;
+                min-width: 60px;
+                font-size: 12px;
+            }
+        """)
+        document_layout.addWidget(self.follow_btn)
+        main_tab_layout.addLayout(document_layout)
+
+        # 创建文本区域布局（增加拉伸因子，占用更多空间）
+        text_layout = self.create_text_area()
+        main_tab_layout.addLayout(text_layout, 1)  # 拉伸因子为1，占用主要空间
+
+        # 创建按钮区域（固定大小，不拉伸）
+        button_layout = self.create_button_area()
+        main_tab_layout.addLayout(button_layout, 0)  # 拉伸因子为0，保持固定大小
+
+        # 设置选项标签页
+        self.setup_options_tab(options_tab)
+
+        # 创建状态栏
+        self.status_bar = QStatusBar()
+        self.setStatusBar(self.status_bar)
+        self.status_bar.showMessage('就绪')
+
+        # 输入框光标所在的行号和列号
+        self.cursor_label = QLabel()
+        self.cursor_label.setStyleSheet("QLabel { color: #7f8c8d; padding: 0 5px; }")
+        self.status_bar.addPermanentWidget(self.cursor_label)
+
+        # 最近一次操作选择的处理策略，提示中列出各策略的峰值内存估计
+        self.plan_label = QLabel()
+        self.plan_label.setStyleSheet("QLabel { color: #8e44ad; padding: 0 5px; }")
+        self.plan_label.hide()
+        self.status_bar.addPermanentWidget(self.plan_label)
+
+        # 状态栏右侧显示最近一次操作的性能摘要
+        self.perf_label = QLabel()
+        self.perf_label.setStyleSheet("QLabel { color: #7f8c8d; padding: 0 5px; }")
+        self.status_bar.addPermanentWidget(self.perf_label)
+
+        # 输出分块加载进度
+        self.render_label = QLabel()
+        self.render_label.setStyleSheet("QLabel { color: #2980b9; padding: 0 5px; }")
+        self.render_label.hide()
+        self.status_bar.addPermanentWidget(self.render_label)
+
+        # 长时间任务（如展开全部）的进度条
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setMaximumWidth(200)
+        self.progress_bar.setMaximumHeight(16)
+        self.progress_bar.hide()
+        self.status_bar.addPermanentWidget(self.progress_bar)
+
+        # 设置窗口样式
+        self.setStyleSheet("""
+            QMainWindow {
+                background-color: #f8f9fa;
+            }
+            QTextEdit {
+                border: 2px solid #bdc3c7;
+                border-radius: 5px;
+                padding: 10px;
+                font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
+                line-height: 1.4;
+                background-color: white;
+            }
+            QTextEdit:focus {
+                border-color: #3498db;
+            }
+            QPushButton {
+                background-color: #3498db;
+                color: white;
+                border: none;
+                padding: 10px 20px;
+                border-radius: 5px;
+                font-size: 14px;
+                font-weight: bold;
+                min-width: 100px;
+            }
+            QPushButton:hover {
+                background-color: #2980b9;
+            }
+            QPushButton:pressed {
+                background-color: #21618c;
+            }
+            QPushButton:disabled {
+                background-color: #bdc3c7;
+                color: #7f8c8d;
+            }
+        """)
+
+    def create_text_area(self):
+        """
+        创建文本输入输出区域
+        """
+        # 创建水平分割器
+        splitter = QSplitter(Qt.Horizontal)
+
+        # 创建左侧输入区域
+        left_frame = QFrame()
+        left_layout = QVBoxLayout(left_frame)
+        left_layout.setContentsMargins(0, 0, 5, 0)
+
+        self.input_label = QLabel(f'输入 {self.current_format}：')
+        self.input_label.setStyleSheet("""
+            QLabel {
+                font-size: 14px;
+                font-weight: bold;
+                color: #2c3e50;
+                margin-bottom: 5px;
+            }
+        """)
+        left_layout.addWidget(self.input_label)
+
+        # 创建输入文本框容器（用于嵌入搜索组件）
+        self.input_container = QFrame()
+        self.input_container.setStyleSheet("QFrame { border: 1px solid #bdc3c7; }")
+        input_container_layout = QVBoxLayout(self.input_container)
+        input_container_layout.setContentsMargins(0, 0, 0, 0)
+        input_container_layout.setSpacing(0)
+
+        self.input_text = QTextEdit()
+        self.input_markers = TextMarkers(self.input_text)
+        self.input_text.setPlaceholderText(f'请在此处输入需要格式化的 {self.current_format} 数据...')
+        self.input_text.setStyleSheet("QTextEdit { border: none; }")
+        input_container_layout.addWidget(self.input_text)
+
+        left_layout.addWidget(self.input_container)
+
+        # 创建右侧输出区域
+        right_frame = QFrame()
+        right_layout = QVBoxLayout(right_frame)
+        right_layout.setContentsMargins(5, 0, 0, 0)
+
+        self.output_label = QLabel(f'输出 {self.current_format}：')
+        self.output_label.setStyleSheet("""
+            QLabel {
+                font-size: 14px;
+                font-weight: bold;
+                color: #2c3e50;
+                margin-bottom: 5px;
+            }
+        """)
+        right_layout.addWidget(self.output_label)
+
+        # 创建输出区域选项卡
+        self.output_tab_widget = QTabWidget()
+        self.output_tab_widget.setStyleSheet("""
+            QTabWidget::pane {
+                border: 1px solid #bdc3c7;
+                background-color: white;
+            }
+            QTabWidget::tab-bar {
+                alignment: left;
+            }
+            QTabBar::tab {
+                background-color: #ecf0f1;
+                padding: 8px 16px;
+                margin-right: 2px;
+                border-top-left-radius: 4px;
+                border-top-right-radius: 4px;
+            }
+            QTabBar::tab:selected {
+                background-color: #3498db;
+                color: white;
+            }
+            QTabBar::tab:hover {
+                background-color: #d5dbdb;
+            }
+        """)
 
         # 创建文本视图标签页
         text_tab = QWidget()
@@ -649,419 +5658,1457 @@ class JSONFormatterApp(QMainWindow):
         text_tab_layout.setContentsMargins(0, 0, 0, 0)
         text_tab_layout.setSpacing(0)
 
-        # 创建输出文本框容器（用于嵌入搜索组件）
-        self.output_container = QFrame()
-        self.output_container.setStyleSheet("QFrame { border: none; }")
-        output_container_layout = QVBoxLayout(self.output_container)
-        output_container_layout.setContentsMargins(0, 0, 0, 0)
-        output_container_layout.setSpacing(0)
+        # 创建输出文本框容器（用于嵌入搜索组件）
+        self.output_container = QFrame()
+        self.output_container.setStyleSheet("QFrame { border: none; }")
+        output_container_layout = QVBoxLayout(self.output_container)
+        output_container_layout.setContentsMargins(0, 0, 0, 0)
+        output_container_layout.setSpacing(0)
+
+        self.output_text = QTextEdit()
+        self.output_markers = TextMarkers(self.output_text)
+        self.output_text.setReadOnly(True)
+        self.output_text.setPlaceholderText(f'格式化后的 {self.current_format} 将显示在此处...')
+        self.output_text.setStyleSheet("QTextEdit { border: none; }")
+        # 输出区只读，关闭撤销记录以免分块追加时占用额外内存
+        self.output_text.setUndoRedoEnabled(False)
+        output_container_layout.addWidget(self.output_text)
+
+        # 输出结果的完整字符串（复制、保存直接使用，无需等待渲染完成）
+        self.output_content = ''
+        self.output_renderer = ProgressiveTextRenderer(self.output_text)
+        self.output_renderer.on_progress = self.on_render_progress
+        self.output_renderer.on_finished = self.on_render_finished
+
+        # 输入区渐进加载（用于恢复会话等大文本场景，加载期间只读）
+        self.input_renderer = ProgressiveTextRenderer(self.input_text)
+        self.input_renderer.on_finished = self.on_input_render_finished
+        self.input_renderer.on_failed = self.on_input_render_failed
+
+        text_tab_layout.addWidget(self.output_container)
+
+        # 创建树形视图标签页
+        tree_tab = QWidget()
+        tree_tab_layout = QVBoxLayout(tree_tab)
+        tree_tab_layout.setContentsMargins(0, 0, 0, 0)
+
+        self.json_tree = JSONTreeWidget()
+        self.xml_tree = XMLTreeWidget()
+        for tree in (self.json_tree, self.xml_tree):
+            tree.node_model.bucket_size = self.tree_bucket_size
+
+        # 树内查找：在节点表中按文档顺序查找键名或值
+        tree_search_bar = QHBoxLayout()
+        tree_search_bar.addWidget(QLabel('查找：'))
+        self.tree_search_input = QLineEdit()
+        self.tree_search_input.setPlaceholderText('在树中查找键名或值（回车查找下一个）')
+        tree_search_bar.addWidget(self.tree_search_input, 1)
+        self.tree_search_btn = QPushButton('下一个')
+        self.tree_search_btn.setStyleSheet("QPushButton { padding: 4px 10px; font-size: 12px; }")
+        tree_search_bar.addWidget(self.tree_search_btn)
+        self.size_report_btn = QPushButton('⚖ 体积排行')
+        self.size_report_btn.setToolTip('列出序列化后字节数最大的子树')
+        self.size_report_btn.setStyleSheet("QPushButton { padding: 4px 10px; font-size: 12px; }")
+        tree_search_bar.addWidget(self.size_report_btn)
+        tree_search_bar.addWidget(QLabel('路径：'))
+        self.tree_path_input = QLineEdit()
+        self.tree_path_input.setToolTip('输入路径后回车，选中并显示对应节点（Ctrl+L）')
+        tree_search_bar.addWidget(self.tree_path_input, 1)
+        tree_tab_layout.addLayout(tree_search_bar)
+
+        # XPath 查询面板（仅 XML 模式显示）
+        self.xpath_panel = QWidget()
+        xpath_layout = QVBoxLayout(self.xpath_panel)
+        xpath_layout.setContentsMargins(0, 0, 0, 4)
+        xpath_bar = QHBoxLayout()
+        xpath_bar.addWidget(QLabel('XPath：'))
+        self.xpath_input = QLineEdit()
+        self.xpath_input.setPlaceholderText("例如 //item[@id='1']、/root/item/name、//item/@id")
+        self.xpath_input.setToolTip('支持 ElementTree 的 XPath 子集；//tag、//tag[@attr]、//tag[@attr=\'值\'] 直接使用元素索引')
+        xpath_bar.addWidget(self.xpath_input, 1)
+        self.xpath_btn = QPushButton('🔍 查询')
+        self.xpath_btn.setStyleSheet("QPushButton { padding: 4px 10px; font-size: 12px; }")
+        xpath_bar.addWidget(self.xpath_btn)
+        xpath_layout.addLayout(xpath_bar)
+        self.xpath_results = QTableWidget(0, 2)
+        self.xpath_results.setHorizontalHeaderLabels(['路径', '值'])
+        self.xpath_results.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.xpath_results.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.xpath_results.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.xpath_results.setWordWrap(False)
+        self.xpath_results.horizontalHeader().setSectionResizeMode(0, QHeaderView.Interactive)
+        self.xpath_results.horizontalHeader().setDefaultSectionSize(360)
+        self.xpath_results.horizontalHeader().setStretchLastSection(True)
+        self.xpath_results.setToolTip('单击定位到树形视图，双击定位到文本视图')
+        self.xpath_results.setMaximumHeight(200)
+        self.xpath_results.hide()
+        xpath_layout.addWidget(self.xpath_results)
+        tree_tab_layout.addWidget(self.xpath_panel)
+        self.xpath_panel.setVisible(self.current_format == 'XML')
+        self.update_tree_path_placeholder(self.current_format)
+
+        # 将两个树形视图都添加到布局中
+        tree_tab_layout.addWidget(self.json_tree)
+        tree_tab_layout.addWidget(self.xml_tree)
+
+        # 根据当前格式显示对应的树形视图
+        if self.current_format == 'JSON':
+            self.json_tree.show()
+            self.xml_tree.hide()
+        else:
+            self.json_tree.hide()
+            self.xml_tree.show()
+
+        # 创建表格视图标签页（对象数组按列存储，只渲染可见行）
+        table_tab = QWidget()
+        table_tab_layout = QVBoxLayout(table_tab)
+        table_tab_layout.setContentsMargins(0, 0, 0, 0)
+
+        self.table_info_label = QLabel('表格视图用于显示对象数组（[{...}, {...}, ...]）')
+        self.table_info_label.setStyleSheet("QLabel { color: #7f8c8d; padding: 4px; }")
+        table_tab_layout.addWidget(self.table_info_label)
+
+        self.table_model = RecordTableModel(self)
+        self.table_view = QTableView()
+        self.table_view.setModel(self.table_model)
+        self.table_view.setAlternatingRowColors(True)
+        self.table_view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table_view.setWordWrap(False)
+        # 固定行高和列宽，避免为计算尺寸遍历所有行
+        self.table_view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table_view.verticalHeader().setDefaultSectionSize(28)
+        self.table_view.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.table_view.horizontalHeader().setDefaultSectionSize(160)
+        self.table_view.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.table_view.setSortingEnabled(True)
+        table_tab_layout.addWidget(self.table_view)
+
+        # 添加标签页
+        self.output_tab_widget.addTab(text_tab, "📄 文本视图")
+        self.output_tab_widget.addTab(tree_tab, "🌳 树形视图")
+        self.table_tab_index = self.output_tab_widget.addTab(table_tab, "📊 表格视图")
+
+        # 创建列统计标签页
+        stats_tab = QWidget()
+        stats_tab_layout = QVBoxLayout(stats_tab)
+        stats_tab_layout.setContentsMargins(0, 0, 0, 0)
+
+        stats_toolbar = QHBoxLayout()
+        self.stats_info_label = QLabel('统计对象数组中每个键的类型分布、空值、数值范围、不同值个数和高频值')
+        self.stats_info_label.setStyleSheet("QLabel { color: #7f8c8d; padding: 4px; }")
+        stats_toolbar.addWidget(self.stats_info_label, 1)
+        self.stats_data_btn = QPushButton('统计当前数据')
+        self.stats_data_btn.setToolTip('统计已解析的对象数组（或表格视图中选择的数组）')
+        self.stats_file_btn = QPushButton('统计文件...')
+        self.stats_file_btn.setToolTip('流式读取 JSON 文件（支持压缩）中的顶层数组进行统计，不构建完整的对象树')
+        self.stats_cancel_btn = QPushButton('取消')
+        self.stats_cancel_btn.setEnabled(False)
+        for btn in (self.stats_data_btn, self.stats_file_btn, self.stats_cancel_btn):
+            btn.setStyleSheet("QPushButton { padding: 4px 10px; font-size: 12px; }")
+            stats_toolbar.addWidget(btn)
+        stats_tab_layout.addLayout(stats_toolbar)
+
+        self.stats_table = QTableWidget(0, len(self.STATS_HEADERS))
+        self.stats_table.setHorizontalHeaderLabels(self.STATS_HEADERS)
+        self.stats_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.stats_table.setAlternatingRowColors(True)
+        self.stats_table.setWordWrap(False)
+        self.stats_table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.stats_table.horizontalHeader().setDefaultSectionSize(120)
+        stats_tab_layout.addWidget(self.stats_table)
+        self.output_tab_widget.addTab(stats_tab, "📈 列统计")
+
+        right_layout.addWidget(self.output_tab_widget)
+
+        # 添加到分割器
+        splitter.addWidget(left_frame)
+        splitter.addWidget(right_frame)
+        splitter.setSizes([600, 600])  # 设置初始比例
+
+        # 创建布局并添加分割器
+        layout = QVBoxLayout()
+        layout.addWidget(splitter)
+
+        return layout
+
+    def setup_options_tab(self, options_tab):
+        """
+        设置选项标签页
+        """
+        options_layout = QVBoxLayout(options_tab)
+        options_layout.setContentsMargins(20, 20, 20, 20)
+        options_layout.setSpacing(15)
+
+        # 字体设置组
+        font_group = QGroupBox("字体设置")
+        font_layout = QFormLayout(font_group)
+
+        # 定义字体大小范围
+        self.min_font_size = 8
+        self.max_font_size = 32
+
+        # 文本编辑器字体大小设置
+        self.text_font_size_spinbox = QSpinBox()
+        self.text_font_size_spinbox.setMinimum(1)
+        self.text_font_size_spinbox.setMaximum(999)
+        self.text_font_size_spinbox.setValue(self.current_text_font_size)
+        self.text_font_size_spinbox.setSuffix(" px")
+        self.text_font_size_spinbox.valueChanged.connect(self.on_text_font_size_changed)
+
+        font_layout.addRow("文本编辑器字体大小：", self.text_font_size_spinbox)
+
+        # UI元素字体大小设置
+        self.ui_font_size_spinbox = QSpinBox()
+        self.ui_font_size_spinbox.setMinimum(1)
+        self.ui_font_size_spinbox.setMaximum(999)
+        self.ui_font_size_spinbox.setValue(self.current_ui_font_size)
+        self.ui_font_size_spinbox.setSuffix(" px")
+        self.ui_font_size_spinbox.valueChanged.connect(self.on_ui_font_size_changed)
+
+        font_layout.addRow("界面标签字体大小：", self.ui_font_size_spinbox)
+
+        # 保存按钮
+        self.save_font_button = QPushButton("保存字体设置")
+        self.save_font_button.setStyleSheet("""
+            QPushButton {
+                background-color: #007bff;
+                color: white;
+                border: none;
+                padding: 8px 16px;
+                border-radius: 4px;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background-color: #0056b3;
+            }
+            QPushButton:pressed {
+                background-color: #004085;
+            }
+        """)
+        self.save_font_button.clicked.connect(self.save_font_settings_and_apply)
+        font_layout.addRow(self.save_font_button)
+
+        # 添加说明标签
+        self.info_label = QLabel(
+            "提示：\n• 使用 Ctrl + 鼠标滚轮 可快速调整文本编辑器字体大小\n• 界面标签字体需要点击保存按钮后生效")
+        self.info_label.setStyleSheet("""
+            QLabel {
+                color: #7f8c8d;
+                font-size: 14px;
+                padding: 15px;
+                background-color: #f8f9fa;
+                border: 1px solid #dee2e6;
+                border-radius: 5px;
+                line-height: 1.5;
+            }
+        """)
+        font_layout.addRow(self.info_label)
+
+        options_layout.addWidget(font_group)
+
+        # 性能诊断设置组
+        perf_group = QGroupBox("性能诊断")
+        perf_layout = QFormLayout(perf_group)
+
+        self.track_memory_checkbox = QCheckBox("记录每个操作的峰值内存（tracemalloc，会降低处理速度）")
+        self.track_memory_checkbox.setChecked(self.profiler.track_memory)
+        self.track_memory_checkbox.toggled.connect(self.on_track_memory_toggled)
+        perf_layout.addRow(self.track_memory_checkbox)
+
+        self.profile_next_button = QPushButton("下一次操作启用 cProfile 分析")
+        self.profile_next_button.setToolTip("对下一次格式化/搜索等操作进行函数级性能分析，结果保存在日志目录")
+        self.profile_next_button.clicked.connect(self.request_profile_next_operation)
+        perf_layout.addRow(self.profile_next_button)
+
+        self.open_log_dir_button = QPushButton("打开日志目录")
+        self.open_log_dir_button.clicked.connect(self.open_log_directory)
+        perf_layout.addRow(self.open_log_dir_button)
+
+        self.perf_log_label = QLabel(f"操作日志：{self.profiler.log_path or '不可用'}")
+        self.perf_log_label.setWordWrap(True)
+        self.perf_log_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        self.perf_log_label.setStyleSheet("QLabel { color: #7f8c8d; }")
+        perf_layout.addRow(self.perf_log_label)
+
+        options_layout.addWidget(perf_group)
+
+        # 界面卡顿监测设置组
+        watchdog_group = QGroupBox("界面卡顿监测")
+        watchdog_layout = QFormLayout(watchdog_group)
+
+        self.watchdog_checkbox = QCheckBox("启用卡顿监测（界面无响应时记录调用栈）")
+        self.watchdog_checkbox.setChecked(self.stall_watchdog.is_running())
+        self.watchdog_checkbox.toggled.connect(self.on_watchdog_toggled)
+        watchdog_layout.addRow(self.watchdog_checkbox)
+
+        self.watchdog_threshold_spinbox = QSpinBox()
+        self.watchdog_threshold_spinbox.setRange(50, 10000)
+        self.watchdog_threshold_spinbox.setSingleStep(50)
+        self.watchdog_threshold_spinbox.setValue(self.stall_watchdog.threshold_ms)
+        self.watchdog_threshold_spinbox.setSuffix(" ms")
+        self.watchdog_threshold_spinbox.valueChanged.connect(self.on_watchdog_threshold_changed)
+        watchdog_layout.addRow("卡顿阈值：", self.watchdog_threshold_spinbox)
+
+        watchdog_buttons = QHBoxLayout()
+        self.view_stalls_button = QPushButton("查看卡顿统计")
+        self.view_stalls_button.clicked.connect(self.show_stall_report)
+        watchdog_buttons.addWidget(self.view_stalls_button)
+        self.export_stalls_button = QPushButton("导出卡顿报告")
+        self.export_stalls_button.clicked.connect(self.export_stall_report)
+        watchdog_buttons.addWidget(self.export_stalls_button)
+        watchdog_buttons.addStretch()
+        watchdog_layout.addRow(watchdog_buttons)
+
+        options_layout.addWidget(watchdog_group)
+
+        # 树形视图设置组
+        tree_group = QGroupBox("树形视图")
+        tree_layout = QFormLayout(tree_group)
+
+        self.expand_budget_spinbox = QSpinBox()
+        self.expand_budget_spinbox.setRange(100, 10000000)
+        self.expand_budget_spinbox.setSingleStep(10000)
+        self.expand_budget_spinbox.setValue(self.expand_node_budget)
+        self.expand_budget_spinbox.setSuffix(" 行")
+        self.expand_budget_spinbox.valueChanged.connect(self.on_expand_budget_changed)
+        tree_layout.addRow("“展开全部”最多显示：", self.expand_budget_spinbox)
+
+        self.expand_depth_spinbox = QSpinBox()
+        self.expand_depth_spinbox.setRange(0, 10000)
+        self.expand_depth_spinbox.setSpecialValueText("不限")
+        self.expand_depth_spinbox.setValue(self.expand_max_depth)
+        self.expand_depth_spinbox.valueChanged.connect(self.on_expand_depth_changed)
+        tree_layout.addRow("“展开全部”最大深度：", self.expand_depth_spinbox)
+
+        self.bucket_size_spinbox = QSpinBox()
+        self.bucket_size_spinbox.setRange(10, 100000)
+        self.bucket_size_spinbox.setSingleStep(100)
+        self.bucket_size_spinbox.setValue(self.tree_bucket_size)
+        self.bucket_size_spinbox.setSuffix(" 项")
+        self.bucket_size_spinbox.setToolTip("数组元素超过该数量时按下标分组显示，每层最多显示这么多行")
+        self.bucket_size_spinbox.valueChanged.connect(self.on_bucket_size_changed)
+        tree_layout.addRow("大数组分组大小：", self.bucket_size_spinbox)
+
+        options_layout.addWidget(tree_group)
+
+        # 会话设置组
+        session_group = QGroupBox("会话")
+        session_layout = QFormLayout(session_group)
+
+        self.restore_session_checkbox = QCheckBox("启动时恢复上次的输入、解析结果和输出")
+        self.restore_session_checkbox.setChecked(self.restore_session_enabled)
+        self.restore_session_checkbox.toggled.connect(self.on_restore_session_toggled)
+        session_layout.addRow(self.restore_session_checkbox)
+
+        self.clear_snapshot_button = QPushButton("清除会话快照")
+        self.clear_snapshot_button.clicked.connect(self.clear_session_snapshot)
+        session_layout.addRow(self.clear_snapshot_button)
+
+        options_layout.addWidget(session_group)
+
+        # 多文档设置组
+        documents_group = QGroupBox("多文档")
+        documents_layout = QFormLayout(documents_group)
+
+        self.memory_budget_spinbox = QSpinBox()
+        self.memory_budget_spinbox.setRange(64, 65536)
+        self.memory_budget_spinbox.setSingleStep(128)
+        self.memory_budget_spinbox.setValue(self.document_lru.budget_bytes // (1024 * 1024))
+        self.memory_budget_spinbox.setSuffix(" MB")
+        self.memory_budget_spinbox.setToolTip("超出预算时，最久未使用的文档只保留原始输入，切换回来时重新解析")
+        self.memory_budget_spinbox.valueChanged.connect(self.on_memory_budget_changed)
+        documents_layout.addRow("解析结果缓存预算：", self.memory_budget_spinbox)
+
+        options_layout.addWidget(documents_group)
+
+        # 大文件处理设置组
+        planner_group = QGroupBox("大文件处理")
+        planner_layout = QFormLayout(planner_group)
+
+        self.memory_limit_spinbox = QSpinBox()
+        self.memory_limit_spinbox.setRange(256, 1024 * 1024)
+        self.memory_limit_spinbox.setSingleStep(512)
+        self.memory_limit_spinbox.setValue(self.memory_limit_mb)
+        self.memory_limit_spinbox.setSuffix(" MB")
+        physical = get_physical_memory()
+        self.memory_limit_spinbox.setToolTip(
+            "格式化前按输入大小和结构样本估算峰值内存，超过上限时依次改用延迟树、流式格式化或直接输出到文件"
+            + (f"（物理内存 {format_size(physical)}）" if physical else ""))
+        self.memory_limit_spinbox.valueChanged.connect(self.on_memory_limit_changed)
+        planner_layout.addRow("内存上限：", self.memory_limit_spinbox)
+
+        self.quick_look_spinbox = QSpinBox()
+        self.quick_look_spinbox.setRange(0, 100000)
+        self.quick_look_spinbox.setSingleStep(100)
+        self.quick_look_spinbox.setValue(self.quick_look_elements)
+        self.quick_look_spinbox.setSuffix(" 个元素")
+        self.quick_look_spinbox.setSpecialValueText("关闭")
+        self.quick_look_spinbox.setToolTip(
+            f"输入超过 {format_size(QUICK_LOOK_THRESHOLD)} 时，美化和排序先显示开头若干个顶层元素，"
+            "完整结果在后台生成后替换预览（保留滚动位置和展开状态）")
+        self.quick_look_spinbox.valueChanged.connect(self.on_quick_look_elements_changed)
+        planner_layout.addRow("快速预览：", self.quick_look_spinbox)
+
+        self.follow_window_spinbox = QSpinBox()
+        self.follow_window_spinbox.setRange(10, 1000000)
+        self.follow_window_spinbox.setSingleStep(1000)
+        self.follow_window_spinbox.setValue(self.follow_window)
+        self.follow_window_spinbox.setSuffix(" 条记录")
+        self.follow_window_spinbox.setToolTip("跟踪文件时输出和树形视图只保留最近的记录，内存占用与运行时长无关")
+        self.follow_window_spinbox.valueChanged.connect(self.on_follow_window_changed)
+        planner_layout.addRow("跟踪窗口：", self.follow_window_spinbox)
+
+        options_layout.addWidget(planner_group)
+
+        schema_group = QGroupBox("JSON Schema")
+        schema_layout = QFormLayout(schema_group)
+
+        self.schema_sample_spinbox = QSpinBox()
+        self.schema_sample_spinbox.setRange(0, 10000000)
+        self.schema_sample_spinbox.setSingleStep(50000)
+        self.schema_sample_spinbox.setValue(self.settings.value('schema/sample_limit', 200000, type=int))
+        self.schema_sample_spinbox.setSpecialValueText("不抽样")
+        self.schema_sample_spinbox.setToolTip("数组元素超过该数量时随机抽样推断类型和取值范围（顶层必需键仍精确计算）")
+        self.schema_sample_spinbox.valueChanged.connect(
+            lambda value: self.settings.setValue('schema/sample_limit', value))
+        schema_layout.addRow("推断抽样上限：", self.schema_sample_spinbox)
+
+        options_layout.addWidget(schema_group)
+        options_layout.addStretch()
+
+    def create_button_area(self):
+        """
+        创建按钮区域
+        """
+        button_layout = QHBoxLayout()
+        button_layout.setSpacing(15)
+
+        # 创建按钮（添加中文标签）
+        self.beautify_btn = QPushButton('🎨 美化格式')
+        self.beautify_btn.setToolTip('格式化 JSON（美化显示）')
+
+        self.sort_btn = QPushButton('🔤 排序格式')
+        self.sort_btn.setToolTip('按键名排序并格式化 JSON')
+
+        self.minify_btn = QPushButton('📦 压缩格式')
+        self.minify_btn.setToolTip('压缩 JSON 为单行')
+
+        self.validate_btn = QPushButton('✅ 验证格式')
+        self.validate_btn.setToolTip('验证 JSON 格式是否正确')
+
+        self.schema_btn = QPushButton('🧬 推断 Schema')
+        self.schema_btn.setToolTip('根据当前 JSON 推断 JSON Schema（类型、必需键、枚举、数值范围）')
+
+        self.schema_validate_btn = QPushButton('📐 Schema 校验')
+        self.schema_validate_btn.setToolTip('按 JSON Schema 校验当前文档，或批量校验目录中的 JSON 文件')
+        schema_menu = QMenu(self.schema_validate_btn)
+        schema_menu.addAction('校验当前文档...', self.validate_with_schema)
+        schema_menu.addAction('批量校验目录...', self.validate_directory_with_schema)
+        self.schema_validate_btn.setMenu(schema_menu)
+
+        self.copy_btn = QPushButton('📋 复制结果')
+        self.copy_btn.setToolTip('复制输出结果到剪贴板')
+
+        self.save_btn = QPushButton('💾 保存结果')
+        self.save_btn.setToolTip('将输出结果保存到文件')
+
+        self.clear_btn = QPushButton('🗑️ 清空内容')
+        self.clear_btn.setToolTip('清空输入和输出内容')
+
+        self.expand_all_btn = QPushButton('📂 展开全部')
+        self.expand_all_btn.setToolTip('展开树形视图中的所有节点')
+
+        self.collapse_all_btn = QPushButton('📁 折叠全部')
+        self.collapse_all_btn.setToolTip('折叠树形视图中的所有节点')
+
+        # 设置按钮样式
+        buttons = [self.beautify_btn, self.sort_btn, self.minify_btn,
+                   self.validate_btn, self.schema_btn, self.schema_validate_btn, self.copy_btn, self.save_btn, self.expand_all_btn,
+                   self.collapse_all_btn, self.clear_btn]
+
+        for i, btn in enumerate(buttons):
+            if i == len(buttons) - 1:  # 清空按钮使用不同颜色
+                btn.setStyleSheet("""
+                    QPushButton {
+                        background-color: #e74c3c;
+                    }
+                    QPushButton:hover {
+                        background-color: #c0392b;
+                    }
+                    QPushButton:pressed {
+                        background-color: #a93226;
+                    }
+                """)
+            elif i == len(buttons) - 3 or i == len(buttons) - 2:  # 展开/折叠按钮使用绿色
+                btn.setStyleSheet("""
+                    QPushButton {
+                        background-color: #27ae60;
+                    }
+                    QPushButton:hover {
+                        background-color: #229954;
+                    }
+                    QPushButton:pressed {
+                        background-color: #1e8449;
+                    }
+                """)
+            button_layout.addWidget(btn)
+
+        # 添加弹性空间
+        button_layout.addStretch()
 
-        self.output_text = QTextEdit()
-        self.output_text.setReadOnly(True)
-        self.output_text.setPlaceholderText(f'格式化后的 {self.current_format} 将显示在此处...')
-        self.output_text.setStyleSheet("QTextEdit { border: none; }")
-        output_container_layout.addWidget(self.output_text)
+        return button_layout
 
-        text_tab_layout.addWidget(self.output_container)
+    def setup_connections(self):
+        """
+        设置信号连接
+        """
+        self.beautify_btn.clicked.connect(self.beautify_format)
+        self.sort_btn.clicked.connect(self.sort_format)
+        self.minify_btn.clicked.connect(self.minify_format)
+        self.validate_btn.clicked.connect(self.validate_format)
+        self.schema_btn.clicked.connect(self.infer_schema)
+        self.tree_search_input.returnPressed.connect(self.find_next_in_tree)
+        self.tree_search_btn.clicked.connect(self.find_next_in_tree)
+        self.tree_path_input.returnPressed.connect(self.go_to_tree_path)
+        self.size_report_btn.clicked.connect(self.show_size_report)
+        self.xpath_input.returnPressed.connect(self.run_xpath_query)
+        self.xpath_btn.clicked.connect(self.run_xpath_query)
+        self.xpath_results.currentCellChanged.connect(lambda row, *_: self.go_to_xpath_hit(row))
+        self.xpath_results.cellDoubleClicked.connect(lambda row, _: self.go_to_xpath_hit(row, show_text=True))
+        self.copy_btn.clicked.connect(self.copy_output)
+        self.save_btn.clicked.connect(self.save_output)
 
-        # 创建树形视图标签页
-        tree_tab = QWidget()
-        tree_tab_layout = QVBoxLayout(tree_tab)
-        tree_tab_layout.setContentsMargins(0, 0, 0, 0)
+        # 树形视图右键菜单（复制子树等）
+        for tree in (self.json_tree, self.xml_tree):
+            tree.setContextMenuPolicy(Qt.CustomContextMenu)
+            tree.customContextMenuRequested.connect(self.show_tree_context_menu)
+        self.expand_all_btn.clicked.connect(self.expand_all_tree)
+        self.collapse_all_btn.clicked.connect(self.collapse_all_tree)
+        self.clear_btn.clicked.connect(self.clear_all)
 
-        self.json_tree = JSONTreeWidget()
-        self.xml_tree = XMLTreeWidget()
+        # 输入变化后在空闲时保存会话快照
+        self.input_text.textChanged.connect(self.schedule_session_snapshot)
+        self.input_text.cursorPositionChanged.connect(self.update_cursor_label)
+
+        # 文档标签页
+        self.document_tabs.currentChanged.connect(self.on_document_tab_changed)
+        self.document_tabs.tabCloseRequested.connect(self.close_document_tab)
+        self.new_document_btn.clicked.connect(lambda: self.new_document())
+        self.output_tab_widget.currentChanged.connect(self.on_output_tab_changed)
+        self.stats_data_btn.clicked.connect(self.profile_current_data)
+        self.stats_file_btn.clicked.connect(lambda: self.profile_file())
+        self.stats_cancel_btn.clicked.connect(self.cancel_profiling)
+        self.json_tree.json_data_changed.connect(self.on_json_data_changed)
+        self.open_file_btn.clicked.connect(lambda: self.open_file())
+        self.batch_format_btn.clicked.connect(lambda: self.batch_format_directory())
+        self.follow_btn.clicked.connect(self.toggle_follow)
+
+        # 为文本编辑器安装事件过滤器以处理滚轮事件
+        self.input_text.installEventFilter(self)
+        self.output_text.installEventFilter(self)
+
+        # 移除实时JSON验证连接
+        # self.input_text.textChanged.connect(self.on_input_text_changed)
+
+    def setup_shortcuts(self):
+        """
+        设置快捷键
+        """
+        # Ctrl+F 搜索快捷键
+        self.search_shortcut = QShortcut(QKeySequence("Ctrl+F"), self)
+        self.search_shortcut.activated.connect(self.show_search_dialog)
+
+        # Ctrl+L 跳转到路径
+        self.go_to_path_shortcut = QShortcut(QKeySequence("Ctrl+L"), self)
+        self.go_to_path_shortcut.activated.connect(self.focus_tree_path_input)
+
+        # Ctrl+G 跳转到输入的指定行
+        self.go_to_line_shortcut = QShortcut(QKeySequence("Ctrl+G"), self)
+        self.go_to_line_shortcut.activated.connect(self.show_go_to_line_dialog)
+
+        # Ctrl+R 搜索替换快捷键
+        self.replace_shortcut = QShortcut(QKeySequence("Ctrl+R"), self)
+        self.replace_shortcut.activated.connect(self.show_replace_dialog)
+
+        # Ctrl+T 新建文档，Ctrl+W 关闭当前文档
+        self.new_document_shortcut = QShortcut(QKeySequence("Ctrl+T"), self)
+        self.new_document_shortcut.activated.connect(lambda: self.new_document())
+        self.close_document_shortcut = QShortcut(QKeySequence("Ctrl+W"), self)
+        self.close_document_shortcut.activated.connect(
+            lambda: self.close_document_tab(self.document_tabs.currentIndex()))
+
+        # Ctrl+O 打开文件
+        self.open_file_shortcut = QShortcut(QKeySequence("Ctrl+O"), self)
+        self.open_file_shortcut.activated.connect(lambda: self.open_file())
+
+    def eventFilter(self, obj, event):
+        """
+        事件过滤器，处理Ctrl+滚轮调整字体大小
+        """
+        if (obj == self.input_text or obj == self.output_text) and event.type() == event.Wheel:
+            if event.modifiers() == Qt.ControlModifier:
+                # Ctrl + 滚轮只调整文本编辑器字体大小
+                delta = event.angleDelta().y()
+                if delta > 0:  # 向上滚动，增大字体
+                    self.increase_text_font_size()
+                    # 添加状态栏提示，帮助用户确认字体变化
+                    self.status_bar.showMessage(f'字体大小已调整为: {self.current_text_font_size}px', 2000)
+                else:  # 向下滚动，减小字体
+                    self.decrease_text_font_size()
+                    # 添加状态栏提示，帮助用户确认字体变化
+                    self.status_bar.showMessage(f'字体大小已调整为: {self.current_text_font_size}px', 2000)
+                return True  # 事件已处理
+        return super().eventFilter(obj, event)
+
+    def on_text_font_size_changed(self, size):
+        """
+        文本编辑器字体大小改变时的处理（立即生效）
+        """
+        self.current_text_font_size = size
+        self.apply_text_font_size()
+        self.save_text_font_settings()
+        self.status_bar.showMessage(f"文本编辑器字体大小已调整为 {size}px", 2000)
+
+    def on_ui_font_size_changed(self, size):
+        """
+        UI元素字体大小改变时的处理（仅更新临时值，需要保存后生效）
+        """
+        self.temp_ui_font_size = size
+        self.status_bar.showMessage(f"界面标签字体大小设置为 {size}px（点击保存按钮生效）", 2000)
+
+    def increase_text_font_size(self):
+        """
+        增大文本编辑器字体大小
+        """
+        if self.current_text_font_size < 999:
+            self.current_text_font_size += 1
+            self.text_font_size_spinbox.setValue(self.current_text_font_size)
+
+    def decrease_text_font_size(self):
+        """
+        减小文本编辑器字体大小
+        """
+        if self.current_text_font_size > 1:
+            self.current_text_font_size -= 1
+            self.text_font_size_spinbox.setValue(self.current_text_font_size)
+
+    def increase_all_font_size(self):
+        """
+        增大所有字体大小
+        """
+        if self.current_text_font_size < self.max_font_size:
+            self.current_text_font_size += 1
+            self.text_font_size_spinbox.setValue(self.current_text_font_size)
+        if self.current_ui_font_size < self.max_font_size:
+            self.current_ui_font_size += 1
+            self.ui_font_size_spinbox.setValue(self.current_ui_font_size)
+
+    def decrease_all_font_size(self):
+        """
+        减小所有字体大小
+        """
+        if self.current_text_font_size > self.min_font_size:
+            self.current_text_font_size -= 1
+            self.text_font_size_spinbox.setValue(self.current_text_font_size)
+        if self.current_ui_font_size > self.min_font_size:
+            self.current_ui_font_size -= 1
+            self.ui_font_size_spinbox.setValue(self.current_ui_font_size)
+
+    def apply_text_font_size(self):
+        """
+        应用字体大小到文本编辑器
+        """
+        font = QFont('Consolas', self.current_text_font_size)
+        if hasattr(self, 'input_text'):
+            self.input_text.setFont(font)
+        if hasattr(self, 'output_text'):
+            self.output_text.setFont(font)
+
+    def apply_ui_font_size(self):
+        """
+        应用字体大小到UI元素（包括选项设置页面内的元素）
+        """
+        # 更新标题标签字体
+        if hasattr(self, 'title_label'):
+            self.title_label.setStyleSheet(f"""
+                QLabel {{
+                    font-size: {self.current_ui_font_size}px;
+                    font-weight: bold;
+                    color: #2c3e50;
+                    padding: 5px;
+                    background-color: #ecf0f1;
+                    border-radius: 3px;
+                    margin-bottom: 5px;
+                }}
+            """)
+
+        # 更新输入输出标签字体
+        if hasattr(self, 'input_label'):
+            self.input_label.setStyleSheet(f"""
+                QLabel {{
+                    font-size: {self.current_ui_font_size}px;
+                    font-weight: bold;
+                    color: #2c3e50;
+                    margin-bottom: 5px;
+                }}
+            """)
+
+        if hasattr(self, 'output_label'):
+            self.output_label.setStyleSheet(f"""
+                QLabel {{
+                    font-size: {self.current_ui_font_size}px;
+                    font-weight: bold;
+                    color: #2c3e50;
+                    margin-bottom: 5px;
+                }}
+            """)
+
+        # 更新选项设置页面内的字体
+        if hasattr(self, 'info_label'):
+            self.info_label.setStyleSheet(f"""
+                QLabel {{
+                    color: #7f8c8d;
+                    font-size: {self.current_ui_font_size}px;
+                    padding: 15px;
+                    background-color: #f8f9fa;
+                    border: 1px solid #dee2e6;
+                    border-radius: 5px;
+                    line-height: 1.5;
+                }}
+            """)
+
+        if hasattr(self, 'save_font_button'):
+            self.save_font_button.setStyleSheet(f"""
+                QPushButton {{
+                    background-color: #007bff;
+                    color: white;
+                    border: none;
+                    padding: 8px 16px;
+                    border-radius: 4px;
+                    font-weight: bold;
+                    font-size: {self.current_ui_font_size}px;
+                }}
+                QPushButton:hover {{
+                    background-color: #0056b3;
+                }}
+                QPushButton:pressed {{
+                    background-color: #004085;
+                }}
+            """)
+
+    def apply_font_size(self):
+        """
+        应用所有字体大小设置
+        """
+        self.apply_text_font_size()
+        self.apply_ui_font_size()
+
+    def save_text_font_settings(self):
+        """
+        保存文本编辑器字体大小设置
+        """
+        self.settings.setValue('text_font_size', self.current_text_font_size)
+
+    def save_font_settings_and_apply(self):
+        """
+        保存所有字体设置并应用UI字体
+        """
+        self.current_ui_font_size = self.temp_ui_font_size
+        self.settings.setValue('text_font_size', self.current_text_font_size)
+        self.settings.setValue('ui_font_size', self.current_ui_font_size)
+        self.apply_ui_font_size()
+        self.status_bar.showMessage(
+            f'字体设置已保存：文本 {self.current_text_font_size}px，界面 {self.current_ui_font_size}px', 3000)
+
+    def on_operation_profiled(self, record):
+        """
+        操作完成后在状态栏显示性能摘要
+        """
+        if not hasattr(self, 'perf_label'):
+            return
+        summary = self.profiler.summarize(record)
+        self.perf_label.setText(summary)
+        details = [f"{record['operation']}  {record['time']}"]
+        for stage in record['stages']:
+            label = OperationProfiler.STAGE_LABELS.get(stage['name'], stage['name'])
+            details.append(f"{label}：{stage['wall_ms']:.1f}ms，峰值 {format_size(stage['peak_bytes'])}，"
+                           f"{format_size(stage['input_size'])} → {format_size(stage['output_size'])}")
+        self.perf_label.setToolTip('\n'.join(details))
+        if record.get('profile'):
+            self.status_bar.showMessage(f"cProfile 分析结果已保存：{record['profile']}", 5000)
+
+    def on_track_memory_toggled(self, checked):
+        """
+        切换是否记录峰值内存
+        """
+        self.profiler.track_memory = checked
+        self.settings.setValue('perf/track_memory', checked)
+
+    def request_profile_next_operation(self):
+        """
+        为下一次操作启用 cProfile 分析
+        """
+        self.profiler.profile_next = True
+        self.status_bar.showMessage('下一次操作将启用 cProfile 分析', 3000)
 
-        # 将两个树形视图都添加到布局中
-        tree_tab_layout.addWidget(self.json_tree)
-        tree_tab_layout.addWidget(self.xml_tree)
+    def open_log_directory(self):
+        """
+        在系统文件管理器中打开日志目录
+        """
+        if self.profiler.log_dir:
+            QDesktopServices.openUrl(QUrl.fromLocalFile(self.profiler.log_dir))
 
-        # 根据当前格式显示对应的树形视图
-        if self.current_format == 'JSON':
-            self.json_tree.show()
-            self.xml_tree.hide()
+    def on_watchdog_toggled(self, checked):
+        """
+        启用或停用界面卡顿监测
+        """
+        if checked:
+            self.stall_watchdog.start()
         else:
-            self.json_tree.hide()
-            self.xml_tree.show()
+            self.stall_watchdog.stop()
+        self.settings.setValue('watchdog/enabled', checked)
+        self.status_bar.showMessage('卡顿监测已启用' if checked else '卡顿监测已停用', 2000)
 
-        # 添加标签页
-        self.output_tab_widget.addTab(text_tab, "📄 文本视图")
-        self.output_tab_widget.addTab(tree_tab, "🌳 树形视图")
+    def on_watchdog_threshold_changed(self, value):
+        """
+        修改卡顿阈值
+        """
+        self.stall_watchdog.threshold_ms = value
+        self.settings.setValue('watchdog/threshold_ms', value)
 
-        right_layout.addWidget(self.output_tab_widget)
+    def show_stall_report(self):
+        """
+        显示卡顿直方图和最近的卡顿调用栈
+        """
+        dialog = StallReportDialog(self.stall_watchdog, self)
+        dialog.exec_()
 
-        # 添加到分割器
-        splitter.addWidget(left_frame)
-        splitter.addWidget(right_frame)
-        splitter.setSizes([600, 600])  # 设置初始比例
+    def show_size_report(self):
+        """
+        显示当前树中体积最大的子树（非模态，可一边查看一边在树中定位）
+        """
+        tree = self.current_tree()
+        if tree.table is None:
+            self.status_bar.showMessage('请先格式化内容，再查看体积排行', 3000)
+            return
+        if self.size_report_dialog is not None:
+            self.size_report_dialog.close()
+        with self.profiler.operation('体积排行'):
+            dialog = SubtreeSizeDialog(tree.table, self)
+        dialog.node_selected.connect(lambda node: self.select_size_report_node(dialog.table, node))
+        self.size_report_dialog = dialog
+        dialog.show()
 
-        # 创建布局并添加分割器
-        layout = QVBoxLayout()
-        layout.addWidget(splitter)
+    def select_size_report_node(self, table, node):
+        """
+        在树形视图中定位体积排行中的节点（数据已变化时忽略）
+        """
+        tree = self.current_tree()
+        if tree.table is not table:
+            self.status_bar.showMessage('数据已变化，请重新打开体积排行', 3000)
+            return
+        self.output_tab_widget.setCurrentIndex(1)
+        tree.select_node(node)
 
-        return layout
+    def export_stall_report(self):
+        """
+        导出卡顿报告
+        """
+        path, _ = QFileDialog.getSaveFileName(
+            self, '导出卡顿报告', f"stall_report_{time.strftime('%Y%m%d_%H%M%S')}.json", 'JSON 文件 (*.json)')
+        if not path:
+            return
+        try:
+            self.stall_watchdog.export_report(path)
+            self.status_bar.showMessage(f'卡顿报告已导出：{path}', 3000)
+        except OSError as e:
+            self.show_message('错误', f'导出失败：\n{str(e)}', QMessageBox.Critical)
 
-    def setup_options_tab(self, options_tab):
+    def on_expand_budget_changed(self, value):
         """
-        设置选项标签页
+        修改“展开全部”的节点预算
         """
-        options_layout = QVBoxLayout(options_tab)
-        options_layout.setContentsMargins(20, 20, 20, 20)
-        options_layout.setSpacing(15)
+        self.expand_node_budget = value
+        self.settings.setValue('tree/expand_budget', value)
 
-        # 字体设置组
-        font_group = QGroupBox("字体设置")
-        font_layout = QFormLayout(font_group)
+    def on_expand_depth_changed(self, value):
+        """
+        修改“展开全部”的最大深度
+        """
+        self.expand_max_depth = value
+        self.settings.setValue('tree/expand_max_depth', value)
 
-        # 定义字体大小范围
-        self.min_font_size = 8
-        self.max_font_size = 32
+    def on_bucket_size_changed(self, value):
+        """
+        修改大数组的分组大小，已显示的树形视图重新分组
+        """
+        self.tree_bucket_size = value
+        self.settings.setValue('tree/bucket_size', value)
+        for tree in (self.json_tree, self.xml_tree):
+            tree.set_bucket_size(value)
 
-        # 文本编辑器字体大小设置
-        self.text_font_size_spinbox = QSpinBox()
-        self.text_font_size_spinbox.setMinimum(1)
-        self.text_font_size_spinbox.setMaximum(999)
-        self.text_font_size_spinbox.setValue(self.current_text_font_size)
-        self.text_font_size_spinbox.setSuffix(" px")
-        self.text_font_size_spinbox.valueChanged.connect(self.on_text_font_size_changed)
+    def start_background_task(self, func, *args, on_finished=None, on_failed=None, on_progress=None):
+        """
+        在共享线程池中执行函数，结果通过回调在 GUI 线程中处理
+        指定 on_progress 时，函数通过 progress 关键字参数收到一个可在后台线程中调用的进度回调
+        """
+        task = BackgroundTask(func, *args)
+        self._background_tasks.add(task)
+        if on_progress is not None:
+            task.kwargs['progress'] = task.signals.progress.emit
+            task.signals.progress.connect(on_progress)
 
-        font_layout.addRow("文本编辑器字体大小：", self.text_font_size_spinbox)
+        def finished(result):
+            self._background_tasks.discard(task)
+            if on_finished is not None:
+                on_finished(result)
 
-        # UI元素字体大小设置
-        self.ui_font_size_spinbox = QSpinBox()
-        self.ui_font_size_spinbox.setMinimum(1)
-        self.ui_font_size_spinbox.setMaximum(999)
-        self.ui_font_size_spinbox.setValue(self.current_ui_font_size)
-        self.ui_font_size_spinbox.setSuffix(" px")
-        self.ui_font_size_spinbox.valueChanged.connect(self.on_ui_font_size_changed)
+        def failed(message):
+            self._background_tasks.discard(task)
+            if on_failed is not None:
+                on_failed(message)
 
-        font_layout.addRow("界面标签字体大小：", self.ui_font_size_spinbox)
+        task.signals.finished.connect(finished)
+        task.signals.failed.connect(failed)
+        self.thread_pool.start(task)
+        return task
 
-        # 保存按钮
-        self.save_font_button = QPushButton("保存字体设置")
-        self.save_font_button.setStyleSheet("""
-            QPushButton {
-                background-color: #007bff;
-                color: white;
-                border: none;
-                padding: 8px 16px;
-                border-radius: 4px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #0056b3;
-            }
-            QPushButton:pressed {
-                background-color: #004085;
-            }
-        """)
-        self.save_font_button.clicked.connect(self.save_font_settings_and_apply)
-        font_layout.addRow(self.save_font_button)
+    def on_restore_session_toggled(self, checked):
+        """
+        切换启动时是否恢复会话
+        """
+        self.restore_session_enabled = checked
+        self.settings.setValue('session/restore', checked)
 
-        # 添加说明标签
-        self.info_label = QLabel(
-            "提示：\n• 使用 Ctrl + 鼠标滚轮 可快速调整文本编辑器字体大小\n• 界面标签字体需要点击保存按钮后生效")
-        self.info_label.setStyleSheet("""
-            QLabel {
-                color: #7f8c8d;
-                font-size: 14px;
-                padding: 15px;
-                background-color: #f8f9fa;
-                border: 1px solid #dee2e6;
-                border-radius: 5px;
-                line-height: 1.5;
-            }
-        """)
-        font_layout.addRow(self.info_label)
+    def schedule_session_snapshot(self):
+        """
+        内容变化后延迟保存快照（持续编辑时只在停顿后保存一次）
+        """
+        self.snapshot_timer.start()
 
-        options_layout.addWidget(font_group)
-        options_layout.addStretch()
+    def collect_session_state(self):
+        """
+        收集需要保存的会话状态：每个文档的标题、格式、输入文本和上次的操作；
+        结果与当前输入一致时再加上输出字符串和节点表（只传递引用，展开和序列化在后台线程进行）
+        """
+        self.store_active_document()
+        documents = []
+        for index in range(self.document_tabs.count()):
+            document = self.document_for_tab(index)
+            if document.pending_input is not None:
+                input_text = document.pending_input
+            else:
+                revision = document.input_document.revision()
+                if revision != document.snapshot_revision:
+                    document.snapshot_input = document.input_document.toPlainText()
+                    document.snapshot_revision = revision
+                input_text = document.snapshot_input
+            fresh = bool(document.output) and (
+                document.pending_input is not None
+                or document.output_revision == document.input_document.revision())
+            documents.append({
+                'title': document.title,
+                'format': document.format,
+                'input': input_text,
+                'operation': document.last_operation,
+                'output': document.output if fresh else None,
+                'tree': (document.table or document.data) if fresh else None,
+            })
+        return {
+            'version': 4,
+            'active': self.document_tabs.currentIndex(),
+            'documents': documents,
+        }
+
+    def save_session_snapshot(self, wait=False):
+        """
+        保存会话快照：GUI 线程只收集字符串和引用，序列化、压缩和写盘在后台线程进行
+        """
+        if self.input_renderer.is_running():
+            # 输入尚未完全载入，稍后再保存
+            self.snapshot_timer.start()
+            return
+        state = self.collect_session_state()
+        if not any(document['input'] for document in state['documents']):
+            self.clear_session_snapshot(silent=True)
+            return
+        if wait:
+            try:
+                write_session_snapshot(self.snapshot_path, state)
+            except Exception as e:
+                self.on_session_snapshot_failed(str(e))
+            return
+        self.start_background_task(write_session_snapshot, self.snapshot_path, state,
+                                   on_failed=self.on_session_snapshot_failed)
 
-    def create_button_area(self):
+    def on_session_snapshot_failed(self, message):
         """
-        创建按钮区域
+        会话快照保存失败：记录日志，不打断当前操作
         """
-        button_layout = QHBoxLayout()
-        button_layout.setSpacing(15)
+        session_logger.warning('保存会话快照失败：%s', message)
 
-        # 创建按钮（添加中文标签）
-        self.beautify_btn = QPushButton('🎨 美化格式')
-        self.beautify_btn.setToolTip('格式化 JSON（美化显示）')
+    def clear_session_snapshot(self, silent=False):
+        """
+        删除会话快照文件
+        """
+        self.snapshot_timer.stop()
+        try:
+            os.remove(self.snapshot_path)
+        except OSError:
+            pass
+        if not silent:
+            self.status_bar.showMessage('会话快照已清除', 2000)
 
-        self.sort_btn = QPushButton('🔤 排序格式')
-        self.sort_btn.setToolTip('按键名排序并格式化 JSON')
+    def restore_session_snapshot(self):
+        """
+        在后台读取会话快照，读取完成后再填充界面
+        """
+        self.status_bar.showMessage('正在恢复上次会话...')
+        self.start_background_task(read_session_snapshot, self.snapshot_path,
+                                   on_finished=self.apply_session_snapshot,
+                                   on_failed=self.on_session_restore_failed)
 
-        self.minify_btn = QPushButton('📦 压缩格式')
-        self.minify_btn.setToolTip('压缩 JSON 为单行')
+    def on_session_restore_failed(self, message):
+        """
+        会话恢复失败
+        """
+        self.status_bar.showMessage(f'无法恢复上次会话：{message}', 5000)
 
-        self.validate_btn = QPushButton('✅ 验证格式')
-        self.validate_btn.setToolTip('验证 JSON 格式是否正确')
+    def apply_session_snapshot(self, state):
+        """
+        按快照重建文档标签页；非活动文档的输入延迟到激活时再载入，
+        保存了输出和节点表的文档直接显示，不重新解析；结果缺失或已过期时才在激活时按上次的操作重新解析
+        """
+        if not isinstance(state, dict) or not isinstance(state.get('documents'), list):
+            return
+        # 用户在恢复完成前已经开始使用时，不覆盖其内容
+        if len(self.documents) != 1 or self.active_document.input_size() > 0:
+            return
+        saved_documents = [saved for saved in state['documents'] if isinstance(saved, dict)]
+        active_index = state.get('active', 0)
+        if not isinstance(active_index, int):
+            active_index = 0
+        if not saved_documents:
+            return
 
-        self.copy_btn = QPushButton('📋 复制结果')
-        self.copy_btn.setToolTip('复制输出结果到剪贴板')
+        with self.profiler.operation('恢复会话'):
+            placeholder = self.active_document
+            restored = []
+            for saved in saved_documents:
+                document = self.new_document(saved.get('title'), saved.get('format'), activate=False)
+                document.pending_input = saved.get('input') or ''
+                document.last_operation = saved.get('operation')
+                output = saved.get('output')
+                table = saved.get('tree')
+                if isinstance(output, str) and output:
+                    document.output = output
+                    if isinstance(table, NodeTable) and table.format_type == document.format:
+                        document.table = table
+                        document.data = table.values[0]
+                    document.output_revision = Document.RESULT_OF_PENDING_INPUT
+                else:
+                    document.evicted = document.last_operation is not None
+                restored.append(document)
+            # 先切换到要激活的文档，再关闭占位的空文档，避免其他文档的输入被提前载入
+            active_index = max(0, min(active_index, len(restored) - 1))
+            self.document_tabs.setCurrentIndex(self.tab_index_of(restored[active_index]))
+            self.close_document_tab(self.tab_index_of(placeholder), confirm=False)
+        self.status_bar.showMessage(f'已恢复上次会话（{len(restored)} 个文档）')
+
+    def on_input_render_finished(self, renderer):
+        """
+        输入区加载完成后恢复可编辑状态
+        """
+        renderer.document.setUndoRedoEnabled(True)
+        if renderer.document is self.input_text.document():
+            self.input_text.setReadOnly(False)
+        # 恢复的结果对应完整载入后的输入
+        for document in self.documents:
+            if (document.input_document is renderer.document
+                    and document.output_revision == Document.RESULT_OF_PENDING_INPUT):
+                document.output_revision = renderer.document.revision()
+        if self.opening_file is not None:
+            self.status_bar.showMessage(f'文件已载入：{self.opening_file}（{renderer.loaded} 个字符）')
+            self.opening_file = None
+
+    def on_input_render_failed(self, renderer, error):
+        """
+        输入区加载失败（如压缩文件损坏），保留已载入的部分并恢复可编辑状态
+        """
+        path = self.opening_file
+        self.opening_file = None
+        self.on_input_render_finished(renderer)
+        self.status_bar.showMessage('文件读取失败')
+        self.show_message('错误', f'读取文件失败：{path}\n{str(error)}', QMessageBox.Critical)
+
+    def open_file(self, path=None):
+        """
+        打开文件到新的文档标签页
+        按文件头识别 gzip/bz2/xz/zip 压缩，边读边解压分块载入，不在内存中拼接完整的解压结果
+        """
+        if path is None:
+            path, _ = QFileDialog.getOpenFileName(
+                self, '打开文件', '',
+                'JSON/XML 文件 (*.json *.jsonl *.ndjson *.xml *.gz *.bz2 *.xz *.zip);;所有文件 (*)')
+            if not path:
+                return
 
-        self.clear_btn = QPushButton('🗑️ 清空内容')
-        self.clear_btn.setToolTip('清空输入和输出内容')
+        try:
+            compression = detect_compression(path)
+            format_type = guess_text_format(path)
+            file_size = os.path.getsize(path)
+        except (OSError, ValueError, EOFError, zlib.error, lzma.LZMAError, zipfile.BadZipFile) as e:
+            self.show_message('错误', f'打开文件失败：\n{str(e)}', QMessageBox.Critical)
+            return
 
-        self.expand_all_btn = QPushButton('📂 展开全部')
-        self.expand_all_btn.setToolTip('展开树形视图中的所有节点')
+        # 载入输入视图本身就会超过内存上限时，只能不载入界面直接格式化到文件
+        plan = ProcessingPlan.for_opening(file_size, compression is not None, self.memory_limit_mb * 1024 * 1024)
+        if plan.strategy == ProcessingPlan.FILE:
+            self.format_file_without_loading(path, format_type, plan)
+            return
 
-        self.collapse_all_btn = QPushButton('📁 折叠全部')
-        self.collapse_all_btn.setToolTip('折叠树形视图中的所有节点')
+        # 渲染器同一时间只服务一个文档，先完成正在进行的载入
+        self.input_renderer.finish_now()
+        previous = self.active_document
+        self.new_document(os.path.basename(path), format_type)
+        # 替换未使用过的空白文档
+        if previous is not None and previous.input_size() == 0 and not previous.output:
+            self.close_document_tab(self.tab_index_of(previous), confirm=False)
 
-        # 设置按钮样式
-        buttons = [self.beautify_btn, self.sort_btn, self.minify_btn,
-                   self.validate_btn, self.copy_btn, self.expand_all_btn,
-                   self.collapse_all_btn, self.clear_btn]
+        self.opening_file = path
+        description = f'{compression} 压缩，边读边解压' if compression else format_size(file_size)
+        self.status_bar.showMessage(f'正在打开 {path}（{description}）...')
+        self.input_text.setUndoRedoEnabled(False)
+        self.input_text.setReadOnly(True)
+        self.input_renderer.render_chunks(iter_file_text(path, ProgressiveTextRenderer.CHUNK_SIZE))
 
-        for i, btn in enumerate(buttons):
-            if i == len(buttons) - 1:  # 清空按钮使用不同颜色
-                btn.setStyleSheet("""
-                    QPushButton {
-                        background-color: #e74c3c;
-                    }
-                    QPushButton:hover {
-                        background-color: #c0392b;
-                    }
-                    QPushButton:pressed {
-                        background-color: #a93226;
-                    }
-                """)
-            elif i == len(buttons) - 3 or i == len(buttons) - 2:  # 展开/折叠按钮使用绿色
-                btn.setStyleSheet("""
-                    QPushButton {
-                        background-color: #27ae60;
-                    }
-                    QPushButton:hover {
-                        background-color: #229954;
-                    }
-                    QPushButton:pressed {
-                        background-color: #1e8449;
-                    }
-                """)
-            button_layout.addWidget(btn)
+    def create_text_document(self, undo_enabled=True):
+        """
+        创建文档使用的文本文档对象
+        """
+        text_document = QTextDocument(self)
+        text_document.setDefaultFont(QFont('Consolas', self.current_text_font_size))
+        text_document.setUndoRedoEnabled(undo_enabled)
+        return text_document
 
-        # 添加弹性空间
-        button_layout.addStretch()
+    def new_document(self, title=None, format_type=None, activate=True):
+        """
+        新建文档标签页
+        """
+        document = Document(title or f'文档 {Document._next_id}', format_type or self.current_format)
+        document.input_document = self.create_text_document()
+        document.line_index = LineIndex(document.input_document)
+        self.documents.append(document)
+        self.document_lru.add(document)
 
-        return button_layout
+        index = self.document_tabs.addTab(document.title)
+        self.document_tabs.setTabData(index, document.doc_id)
+        self.update_document_tab(document)
+        if activate:
+            self.document_tabs.setCurrentIndex(index)
+            if self.active_document is not document:
+                self.activate_document(document)
+        return document
 
-    def setup_connections(self):
+    def document_for_tab(self, index):
         """
-        设置信号连接
+        根据标签索引获取文档
         """
-        self.beautify_btn.clicked.connect(self.beautify_format)
-        self.sort_btn.clicked.connect(self.sort_format)
-        self.minify_btn.clicked.connect(self.minify_format)
-        self.validate_btn.clicked.connect(self.validate_format)
-        self.copy_btn.clicked.connect(self.copy_output)
-        self.expand_all_btn.clicked.connect(self.expand_all_tree)
-        self.collapse_all_btn.clicked.connect(self.collapse_all_tree)
-        self.clear_btn.clicked.connect(self.clear_all)
+        doc_id = self.document_tabs.tabData(index)
+        for document in self.documents:
+            if document.doc_id == doc_id:
+                return document
+        return None
 
-        # 为文本编辑器安装事件过滤器以处理滚轮事件
-        self.input_text.installEventFilter(self)
-        self.output_text.installEventFilter(self)
+    def tab_index_of(self, document):
+        """
+        获取文档所在的标签索引
+        """
+        for index in range(self.document_tabs.count()):
+            if self.document_tabs.tabData(index) == document.doc_id:
+                return index
+        return -1
 
-        # 移除实时JSON验证连接
-        # self.input_text.textChanged.connect(self.on_input_text_changed)
+    def update_document_tab(self, document):
+        """
+        更新标签标题和提示（显示格式和缓存状态）
+        """
+        index = self.tab_index_of(document)
+        if index < 0:
+            return
+        self.document_tabs.setTabText(index, f'{document.title} [{document.format}]')
+        state = '缓存已释放，切换到此文档时重新解析' if document.evicted else '已缓存解析结果' \
+            if document.has_cache() else '未解析'
+        self.document_tabs.setTabToolTip(index, f'{document.title}\n格式：{document.format}\n状态：{state}')
 
-    def setup_shortcuts(self):
+    def on_document_tab_changed(self, index):
         """
-        设置快捷键
+        切换文档标签页
         """
-        # Ctrl+F 搜索快捷键
-        self.search_shortcut = QShortcut(QKeySequence("Ctrl+F"), self)
-        self.search_shortcut.activated.connect(self.show_search_dialog)
+        if index < 0:
+            return
+        document = self.document_for_tab(index)
+        if document is not None:
+            self.activate_document(document)
 
-        # Ctrl+R 搜索替换快捷键
-        self.replace_shortcut = QShortcut(QKeySequence("Ctrl+R"), self)
-        self.replace_shortcut.activated.connect(self.show_replace_dialog)
+    def store_active_document(self):
+        """
+        把当前视图中的结果记录到活动文档
+        """
+        document = self.active_document
+        if document is None:
+            return
+        document.format = self.current_format
+        document.output = self.output_content
+        tree = self.current_tree()
+        document.data = tree.json_data if tree is self.json_tree else tree.xml_root
+        document.table = tree.table if document.data is not None else None
 
-    def eventFilter(self, obj, event):
+    def activate_document(self, document):
         """
-        事件过滤器，处理Ctrl+滚轮调整字体大小
+        把文档载入共用的输入、输出和树形视图
         """
-        if (obj == self.input_text or obj == self.output_text) and event.type() == event.Wheel:
-            if event.modifiers() == Qt.ControlModifier:
-                # Ctrl + 滚轮只调整文本编辑器字体大小
-                delta = event.angleDelta().y()
-                if delta > 0:  # 向上滚动，增大字体
-                    self.increase_text_font_size()
-                    # 添加状态栏提示，帮助用户确认字体变化
-                    self.status_bar.showMessage(f'字体大小已调整为: {self.current_text_font_size}px', 2000)
-                else:  # 向下滚动，减小字体
-                    self.decrease_text_font_size()
-                    # 添加状态栏提示，帮助用户确认字体变化
-                    self.status_bar.showMessage(f'字体大小已调整为: {self.current_text_font_size}px', 2000)
-                return True  # 事件已处理
-        return super().eventFilter(obj, event)
+        previous = self.active_document
+        if previous is document:
+            return
+        if previous is not None and previous is self.follow_document:
+            self.stop_following()
+        if previous is not None:
+            # 未载入完的输入继续在后台追加到原文档；未渲染完的输出在切换回来时重新渲染
+            if self.output_renderer.is_running():
+                self.output_renderer.cancel()
+                previous.output_document = None
+            self.store_active_document()
+            self.update_document_tab(previous)
+        if self.expand_job is not None:
+            self.expand_job.cancel()
+
+        self.active_document = document
+        self.document_lru.touch(document)
+
+        if document.format != self.current_format:
+            self.format_combo.blockSignals(True)
+            self.format_combo.setCurrentText(document.format)
+            self.format_combo.blockSignals(False)
+            self.apply_format_mode(document.format)
+
+        # 输入：切换文本文档对象，无需复制文本
+        self.input_text.setDocument(document.input_document)
+        self.input_markers.clear()
+        self.update_cursor_label()
+        if document.pending_input is not None:
+            # 渲染器同一时间只服务一个文档，先把上一个文档剩余的内容写完
+            self.input_renderer.finish_now()
+            text = document.pending_input
+            document.pending_input = None
+            self.input_text.setUndoRedoEnabled(False)
+            self.input_renderer.render(text)
+            if not self.input_renderer.is_running():
+                self.on_input_render_finished(self.input_renderer)
+        self.input_text.setReadOnly(
+            self.input_renderer.is_running()
+            and self.input_renderer.document is document.input_document
+        )
+
+        # 重新渲染输出时会把当前视图的结果记录回文档，因此先切换输出内容和树形视图
+        self.output_content = document.output
+        # 树形视图：直接使用缓存的解析结果
+        self.json_tree.populate_tree(None)
+        self.xml_tree.populate_tree(None)
+        if document.data is not None:
+            with self.profiler.stage('populate'):
+                self.current_tree().populate_tree(document.data, document.table)
+
+        # 输出：已有渲染文档时直接切换，否则按需重新渲染
+        self.output_renderer.cancel()
+        self.render_label.hide()
+        if document.output_document is None:
+            document.output_document = self.create_text_document(undo_enabled=False)
+            self.output_text.setDocument(document.output_document)
+            if document.output:
+                self.set_output_text(document.output, new_result=False)
+        else:
+            self.output_text.setDocument(document.output_document)
+        self.output_markers.clear()
+        # 字体调整只作用于当时显示的文档，切换后同步一次
+        document.input_document.setDefaultFont(self.input_text.font())
+        document.output_document.setDefaultFont(self.output_text.font())
 
-    def on_text_font_size_changed(self, size):
+        if document.evicted and document.last_operation:
+            QTimer.singleShot(0, lambda: self.rerun_document_operation(document))
+        self.enforce_document_budget()
+        self.update_document_tab(document)
+
+    def rerun_document_operation(self, document):
         """
-        文本编辑器字体大小改变时的处理（立即生效）
+        缓存被释放的文档重新执行上次的操作
         """
-        self.current_text_font_size = size
-        self.apply_text_font_size()
-        self.save_text_font_settings()
-        self.status_bar.showMessage(f"文本编辑器字体大小已调整为 {size}px", 2000)
+        if document is not self.active_document or not document.evicted:
+            return
+        if self.input_renderer.is_running():
+            # 输入尚未完全载入，载入完成后再解析
+            QTimer.singleShot(100, lambda: self.rerun_document_operation(document))
+            return
+        document.evicted = False
+        operations = {
+            'beautify': self.beautify_format,
+            'sort': self.sort_format,
+            'minify': self.minify_format,
+            'schema': self.infer_schema,
+        }
+        operation = operations.get(document.last_operation)
+        if operation is not None:
+            self.status_bar.showMessage(f'正在重新解析 {document.title}...')
+            operation()
+
+    def close_document_tab(self, index, confirm=True):
+        """
+        关闭文档标签页（关闭最后一个时自动新建空文档）
+        """
+        document = self.document_for_tab(index)
+        if document is None:
+            return
+        if confirm and document.input_size() > 0:
+            reply = QMessageBox.question(self, '关闭文档', f'确定要关闭“{document.title}”吗？',
+                                         QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            if reply != QMessageBox.Yes:
+                return
+
+        if self.input_renderer.document is document.input_document:
+            self.input_renderer.cancel()
+            self.opening_file = None
+        if document is self.active_document:
+            self.output_renderer.cancel()
+            # 先解除引用，切换时不再把视图内容存回即将关闭的文档
+            self.active_document = None
+        self.documents.remove(document)
+        self.document_lru.remove(document)
+        self.document_tabs.removeTab(index)
+        if not self.documents:
+            self.new_document()
+        elif self.active_document is None:
+            self.activate_document(self.document_for_tab(self.document_tabs.currentIndex()))
+        self.schedule_session_snapshot()
 
-    def on_ui_font_size_changed(self, size):
+    def on_memory_budget_changed(self, value):
         """
-        UI元素字体大小改变时的处理（仅更新临时值，需要保存后生效）
+        修改文档缓存的内存预算
         """
-        self.temp_ui_font_size = size
-        self.status_bar.showMessage(f"界面标签字体大小设置为 {size}px（点击保存按钮生效）", 2000)
+        self.document_lru.budget_bytes = value * 1024 * 1024
+        self.settings.setValue('documents/memory_budget_mb', value)
+        self.enforce_document_budget()
 
-    def increase_text_font_size(self):
+    def on_memory_limit_changed(self, value):
         """
-        增大文本编辑器字体大小
+        修改处理策略使用的内存上限
         """
-        if self.current_text_font_size < 999:
-            self.current_text_font_size += 1
-            self.text_font_size_spinbox.setValue(self.current_text_font_size)
+        self.memory_limit_mb = value
+        self.settings.setValue('planner/memory_limit_mb', value)
 
-    def decrease_text_font_size(self):
+    def on_quick_look_elements_changed(self, value):
         """
-        减小文本编辑器字体大小
+        修改快速预览的顶层元素数
         """
-        if self.current_text_font_size > 1:
-            self.current_text_font_size -= 1
-            self.text_font_size_spinbox.setValue(self.current_text_font_size)
+        self.quick_look_elements = value
+        self.settings.setValue('preview/elements', value)
 
-    def increase_all_font_size(self):
+    def on_follow_window_changed(self, value):
         """
-        增大所有字体大小
+        修改跟踪模式的窗口大小
         """
-        if self.current_text_font_size < self.max_font_size:
-            self.current_text_font_size += 1
-            self.text_font_size_spinbox.setValue(self.current_text_font_size)
-        if self.current_ui_font_size < self.max_font_size:
-            self.current_ui_font_size += 1
-            self.ui_font_size_spinbox.setValue(self.current_ui_font_size)
+        self.follow_window = value
+        self.settings.setValue('follow/window', value)
+        if self.follower is not None:
+            self.follower.set_window(value)
 
-    def decrease_all_font_size(self):
+    def enforce_document_budget(self):
         """
-        减小所有字体大小
+        超出内存预算时释放最久未使用文档的缓存
         """
-        if self.current_text_font_size > self.min_font_size:
-            self.current_text_font_size -= 1
-            self.text_font_size_spinbox.setValue(self.current_text_font_size)
-        if self.current_ui_font_size > self.min_font_size:
-            self.current_ui_font_size -= 1
-            self.ui_font_size_spinbox.setValue(self.current_ui_font_size)
+        if self.active_document is None:
+            return
+        self.store_active_document()
+        for document in self.document_lru.enforce(self.active_document):
+            self.update_document_tab(document)
 
-    def apply_text_font_size(self):
+    def closeEvent(self, event):
         """
-        应用字体大小到文本编辑器
+        关闭窗口时保存未写入的会话快照并停止后台线程
         """
-        font = QFont('Consolas', self.current_text_font_size)
-        if hasattr(self, 'input_text'):
-            self.input_text.setFont(font)
-        if hasattr(self, 'output_text'):
-            self.output_text.setFont(font)
+        self.stall_watchdog.stop()
+        if self.snapshot_timer.isActive():
+            self.snapshot_timer.stop()
+            self.save_session_snapshot(wait=True)
+        self.thread_pool.waitForDone(3000)
+        shutdown_process_pool()
+        super().closeEvent(event)
 
-    def apply_ui_font_size(self):
+    def set_output_text(self, text, new_result=True):
         """
-        应用字体大小到UI元素（包括选项设置页面内的元素）
+        将结果写入输出文本视图：保存完整字符串，首屏立即显示，其余部分渐进加载
+        当前策略限制了显示长度时只显示开头部分，复制和保存仍使用完整字符串
+        new_result 为 False 时只是重新显示文档已有的结果，不改变结果对应的输入修订号
         """
-        # 更新标题标签字体
-        if hasattr(self, 'title_label'):
-            self.title_label.setStyleSheet(f"""
-                QLabel {{
-                    font-size: {self.current_ui_font_size}px;
-                    font-weight: bold;
-                    color: #2c3e50;
-                    padding: 5px;
-                    background-color: #ecf0f1;
-                    border-radius: 3px;
-                    margin-bottom: 5px;
-                }}
-            """)
-
-        # 更新输入输出标签字体
-        if hasattr(self, 'input_label'):
-            self.input_label.setStyleSheet(f"""
-                QLabel {{
-                    font-size: {self.current_ui_font_size}px;
-                    font-weight: bold;
-                    color: #2c3e50;
-                    margin-bottom: 5px;
-                }}
-            """)
+        self.output_content = text
+        if new_result and self.active_document is not None:
+            self.active_document.output_revision = self.input_text.document().revision()
+        self.schedule_session_snapshot()
+        limit = self.active_plan.preview_chars if self.active_plan is not None else None
+        if limit is not None and len(text) > limit:
+            end = text.rfind('\n', 0, limit)
+            shown = text[:end if end > 0 else limit]
+            text = (f'{shown}\n\n…… 输出共 {format_size(len(self.output_content))}，'
+                    f'为控制内存只显示开头 {format_size(len(shown))}；复制和保存使用完整结果')
+        with self.profiler.stage('render', input_size=len(text)) as stage:
+            self.output_renderer.render(text)
+            stage['output_size'] = self.output_renderer.loaded
+        if self.output_renderer.is_running():
+            self.on_render_progress(self.output_renderer)
+        self.enforce_document_budget()
 
-        if hasattr(self, 'output_label'):
-            self.output_label.setStyleSheet(f"""
-                QLabel {{
-                    font-size: {self.current_ui_font_size}px;
-                    font-weight: bold;
-                    color: #2c3e50;
-                    margin-bottom: 5px;
-                }}
-            """)
-
-        # 更新选项设置页面内的字体
-        if hasattr(self, 'info_label'):
-            self.info_label.setStyleSheet(f"""
-                QLabel {{
-                    color: #7f8c8d;
-                    font-size: {self.current_ui_font_size}px;
-                    padding: 15px;
-                    background-color: #f8f9fa;
-                    border: 1px solid #dee2e6;
-                    border-radius: 5px;
-                    line-height: 1.5;
-                }}
-            """)
-
-        if hasattr(self, 'save_font_button'):
-            self.save_font_button.setStyleSheet(f"""
-                QPushButton {{
-                    background-color: #007bff;
-                    color: white;
-                    border: none;
-                    padding: 8px 16px;
-                    border-radius: 4px;
-                    font-weight: bold;
-                    font-size: {self.current_ui_font_size}px;
-                }}
-                QPushButton:hover {{
-                    background-color: #0056b3;
-                }}
-                QPushButton:pressed {{
-                    background-color: #004085;
-                }}
-            """)
-
-    def apply_font_size(self):
+    def clear_output(self):
         """
-        应用所有字体大小设置
+        清空输出文本视图
         """
-        self.apply_text_font_size()
-        self.apply_ui_font_size()
+        self.output_renderer.cancel()
+        self.output_content = ''
+        self.output_text.clear()
+        self.render_label.hide()
 
-    def save_text_font_settings(self):
+    def on_render_progress(self, renderer):
         """
-        保存文本编辑器字体大小设置
+        显示输出加载进度
         """
-        self.settings.setValue('text_font_size', self.current_text_font_size)
+        percent = renderer.loaded * 100 // max(renderer.total, 1)
+        self.render_label.setText(f'输出加载中 {percent}%（{format_size(renderer.loaded)}/{format_size(renderer.total)}）')
+        self.render_label.show()
 
-    def save_font_settings_and_apply(self):
+    def on_render_finished(self, renderer):
         """
-        保存所有字体设置并应用UI字体
+        输出全部加载完成
         """
-        self.current_ui_font_size = self.temp_ui_font_size
-        self.settings.setValue('text_font_size', self.current_text_font_size)
-        self.settings.setValue('ui_font_size', self.current_ui_font_size)
-        self.apply_ui_font_size()
-        self.status_bar.showMessage(
-            f'字体设置已保存：文本 {self.current_text_font_size}px，界面 {self.current_ui_font_size}px', 3000)
+        self.render_label.hide()
 
     def on_format_changed(self, format_type):
         """
         格式类型改变时的处理方法
         """
+        self.apply_format_mode(format_type)
+
+        # 清空当前内容
+        self.clear_all()
+
+        # 更新状态栏
+        self.status_bar.showMessage(f'已切换到 {format_type} 格式模式')
+
+    def apply_format_mode(self, format_type):
+        """
+        按格式类型更新标签、提示文本和树形视图（不清空内容）
+        """
         self.current_format = format_type
+        if self.active_document is not None:
+            self.active_document.format = format_type
+            self.update_document_tab(self.active_document)
 
         # 更新输入输出标签
         self.input_label.setText(f'输入 {self.current_format}：')
@@ -1082,6 +7129,9 @@ class JSONFormatterApp(QMainWindow):
             self.sort_btn.setToolTip('按元素名排序并格式化 XML')
             self.minify_btn.setToolTip('压缩 XML 为单行')
             self.validate_btn.setToolTip('验证 XML 格式是否正确')
+        # Schema 推断只适用于 JSON
+        self.schema_btn.setEnabled(format_type == 'JSON')
+        self.schema_validate_btn.setEnabled(format_type == 'JSON')
 
         # 切换树形视图显示
         if format_type == 'JSON':
@@ -1090,39 +7140,304 @@ class JSONFormatterApp(QMainWindow):
         else:  # XML
             self.json_tree.hide()
             self.xml_tree.show()
+        self.xpath_panel.setVisible(format_type == 'XML')
+        self.update_tree_path_placeholder(format_type)
 
-        # 清空当前内容
-        self.clear_all()
-
-        # 更新状态栏
-        self.status_bar.showMessage(f'已切换到 {format_type} 格式模式')
+    def record_document_operation(self, operation):
+        """
+        记录活动文档最近一次生成输出的操作（缓存被释放后据此重新生成）
+        """
+        if self.active_document is not None:
+            self.active_document.last_operation = operation
+            self.active_document.evicted = False
 
     def beautify_format(self):
         """
         根据当前格式类型美化格式
         """
+        self.record_document_operation('beautify')
         if self.current_format == 'JSON':
-            self.beautify_json()
+            self.run_planned_operation('beautify', self.beautify_json)
         else:  # XML
-            self.beautify_xml()
+            self.run_planned_operation('beautify', self.beautify_xml)
 
     def sort_format(self):
         """
         根据当前格式类型排序格式
         """
+        self.record_document_operation('sort')
         if self.current_format == 'JSON':
-            self.sort_json()
+            self.run_planned_operation('sort', self.sort_json)
         else:  # XML
-            self.sort_xml()
+            self.run_planned_operation('sort', self.sort_xml)
 
     def minify_format(self):
         """
         根据当前格式类型压缩格式
         """
+        self.record_document_operation('minify')
         if self.current_format == 'JSON':
-            self.minify_json()
+            self.run_planned_operation('minify', self.minify_json)
         else:  # XML
-            self.minify_xml()
+            self.run_planned_operation('minify', self.minify_xml)
+
+    def plan_operation(self, mode):
+        """
+        按输入大小和开头的结构样本估算各策略的峰值内存，选择不超过上限的策略
+        输入很小时（最坏情况也不超过上限）不采样，直接完整处理
+        """
+        limit = self.memory_limit_mb * 1024 * 1024
+        document = self.input_text.document()
+        chars = document.characterCount() - 1
+        if chars * ProcessingPlan.WORST_BYTES_PER_CHAR <= limit:
+            return ProcessingPlan(ProcessingPlan.EAGER, {}, limit, reason=f'输入 {format_size(chars)}')
+        sample = self.input_text_prefix(ProcessingPlan.SAMPLE_CHARS)
+        if self.current_format == 'JSON':
+            estimate = sample_json_structure(sample, chars)
+        else:
+            estimate = sample_xml_structure(sample, chars)
+        return ProcessingPlan.for_operation(estimate, self.current_format, mode, limit)
+
+    def input_text_prefix(self, count):
+        """
+        输入开头最多 count 个字符（不取出完整文本）
+        """
+        document = self.input_text.document()
+        cursor = QTextCursor(document)
+        cursor.setPosition(min(document.characterCount() - 1, count), QTextCursor.KeepAnchor)
+        return cursor.selectedText().replace('\u2029', '\n')
+
+    def show_plan(self, plan):
+        """
+        在状态栏显示所选策略，提示中列出各策略的峰值内存估计
+        """
+        self.plan_label.setText(f'策略：{ProcessingPlan.NAMES[plan.strategy]}')
+        self.plan_label.setToolTip(plan.details() if plan.peaks else plan.summary())
+        self.plan_label.show()
+        if plan.strategy != ProcessingPlan.EAGER:
+            self.status_bar.showMessage(plan.summary())
+
+    def run_planned_operation(self, mode, handler):
+        """
+        按所选策略执行美化/排序/压缩：完整处理和延迟树使用原有的处理函数（延迟树只显示输出的开头），
+        流式格式化不构建对象树，文件到文件直接把结果写入用户选择的文件
+        """
+        plan = self.plan_operation(mode)
+        if plan.strategy == ProcessingPlan.FILE:
+            # 结果不留在界面中，缓存释放后也无需重新执行
+            if self.active_document is not None:
+                self.active_document.last_operation = None
+            self.show_plan(plan)
+            self.format_input_to_file(mode)
+            return
+        # 新的操作开始后，本文档之前仍在后台进行的完整处理结果作废，跟踪也随之停止
+        if self.active_document is not None:
+            self.active_document.quick_look_task = None
+        if self.follower is not None:
+            self.stop_following()
+        if (plan.strategy != ProcessingPlan.STREAM and mode != 'minify' and self.quick_look_elements
+                and self.input_text.document().characterCount() > QUICK_LOOK_THRESHOLD):
+            self.show_plan(plan)
+            self.quick_look_format(mode, plan, handler)
+            return
+        self.active_plan = plan
+        try:
+            if plan.strategy == ProcessingPlan.STREAM:
+                self.stream_format_json(mode)
+            else:
+                handler()
+        finally:
+            self.active_plan = None
+        self.show_plan(plan)
+
+    def quick_look_format(self, mode, plan, handler):
+        """
+        大输入的快速预览：立即格式化并显示开头的前 N 个顶层元素，完整的解析、格式化和节点表构建在后台进行，
+        完成后替换预览，保留输出视图的滚动位置和树形视图的展开状态；输入无效时改为同步处理以定位错误
+        完成时已切换到其他文档的，结果保存到原文档，切换回来时显示
+        """
+        format_type = self.current_format
+        tree = self.json_tree if format_type == 'JSON' else self.xml_tree
+        started = time.perf_counter()
+        prefix = self.input_text_prefix(QUICK_LOOK_PREFIX_CHARS)
+        if format_type == 'JSON':
+            preview = build_json_preview(prefix, self.quick_look_elements)
+            if preview is not None:
+                preview_text = dump_json_pretty(preview, sort_keys=(mode == 'sort'))
+        else:
+            preview = build_xml_preview(prefix, self.quick_look_elements)
+            if preview is not None:
+                if mode == 'sort':
+                    sort_xml_element(preview)
+                preview_text = prettify_xml(preview)
+        del prefix
+        if preview is not None:
+            self.set_output_text(preview_text)
+            tree.populate_tree(preview)
+            self.status_bar.showMessage(
+                f'快速预览：前 {len(preview)} 个顶层元素（{(time.perf_counter() - started) * 1000:.0f}ms），'
+                f'正在后台解析完整数据...')
+        else:
+            self.status_bar.showMessage('正在后台解析完整数据...')
+        # 预览只是结果的开头部分（或仍是上次的结果），完整结果完成前不保存到会话快照
+        self.active_document.output_revision = None
+
+        token = object()
+        document = self.active_document
+        document.quick_look_task = token
+        revision = document.input_document.revision()
+
+        def is_valid():
+            return (document.quick_look_task is token and document.format == format_type
+                    and document.input_document.revision() == revision)
+
+        def finished(result):
+            if not is_valid():
+                return
+            document.quick_look_task = None
+            data, formatted, table = result
+            if self.active_document is not document:
+                # 已切换到其他文档：替换原文档缓存的预览，输出在切换回来时重新渲染，树形视图按解析结果重建
+                document.data = data
+                document.table = table
+                document.output = formatted
+                document.output_revision = revision
+                document.output_document = None
+                document.evicted = False
+                self.enforce_document_budget()
+                self.update_document_tab(document)
+                return
+            tree_state = tree.save_view_state()
+            scroll = self.output_text.verticalScrollBar().value()
+            shown = self.output_renderer.loaded
+            self.active_plan = plan
+            try:
+                self.set_output_text(formatted)
+            finally:
+                self.active_plan = None
+            # 预览是完整输出的开头部分，先加载到同样的长度再恢复滚动位置
+            self.output_renderer.load_until(shown)
+            self.output_text.verticalScrollBar().setValue(scroll)
+            tree.populate_tree(data, table)
+            tree.restore_view_state(tree_state)
+            self.status_bar.showMessage(
+                f'{format_type} 格式化完成（后台 {time.perf_counter() - started:.1f} 秒）')
+
+        def failed(message):
+            if not is_valid():
+                return
+            document.quick_look_task = None
+            if self.active_document is not document:
+                # 切换回来时重新执行操作，由原有流程报告错误
+                document.evict()
+                self.update_document_tab(document)
+                return
+            # 同步重新处理一次，由原有流程报告并高亮错误位置
+            self.clear_output()
+            tree.populate_tree(None)
+            self.active_plan = plan
+            try:
+                handler()
+            finally:
+                self.active_plan = None
+
+        self.start_background_task(parse_and_format, self.input_text.toPlainText(), format_type, mode,
+                                   on_finished=finished, on_failed=failed)
+
+    def stream_format_json(self, mode):
+        """
+        流式美化或压缩 JSON：逐个词法单元重排，不构建对象树和树形视图
+        """
+        with self.profiler.operation('流式格式化 JSON'):
+            text = self.input_text.toPlainText()
+            try:
+                with self.profiler.stage('serialize', input_size=len(text)) as stage:
+                    formatted = ''.join(iter_json_reformat(iter_text_chunks(text, 1024 * 1024),
+                                                           indent=4 if mode == 'beautify' else None))
+                    stage['output_size'] = len(formatted)
+            except ValueError as e:
+                self.show_message('JSON 格式错误', f'输入的 JSON 无效：\n{str(e)}', QMessageBox.Critical)
+                return
+            del text
+            self.clear_input_error_highlighting()
+            self.set_output_text(formatted)
+            self.json_tree.populate_tree(None)
+
+    def choose_output_file(self, title):
+        """
+        选择格式化结果的保存位置（可选压缩格式），取消时返回 None
+        """
+        extension = 'json' if self.current_format == 'JSON' else 'xml'
+        filters = [f'{self.current_format} 文件 (*.{extension})']
+        for compression, compressed_extension in COMPRESSION_EXTENSIONS.items():
+            filters.append(f'{compression} 压缩 (*.{extension}{compressed_extension})')
+        filters.append('所有文件 (*)')
+        path, selected_filter = QFileDialog.getSaveFileName(
+            self, title, f'output.{extension}', ';;'.join(filters))
+        if not path:
+            return None
+
+        # 选择了压缩类型但文件名没有对应扩展名时自动补上
+        for compression, compressed_extension in COMPRESSION_EXTENSIONS.items():
+            if selected_filter.startswith(f'{compression} ') and compression_for_path(path) is None:
+                path += compressed_extension
+        return path
+
+    def format_input_to_file(self, mode):
+        """
+        文件到文件：把输入格式化后直接写入文件（后台执行），不生成输出视图和树形视图
+        """
+        output = self.choose_output_file('格式化结果过大，请选择保存位置')
+        if output is None:
+            self.status_bar.showMessage('已取消：结果过大，未在界面中生成')
+            return
+        # 释放之前的结果，给文件到文件处理腾出内存
+        self.clear_output()
+        self.json_tree.populate_tree(None)
+        self.xml_tree.populate_tree(None)
+        self.start_file_format(format_text_to_file, self.input_text.toPlainText(), output,
+                               self.current_format, mode)
+
+    def start_file_format(self, func, source, output, format_type, mode):
+        """
+        在后台把格式化结果写入文件，完成后在状态栏报告
+        """
+        self.status_bar.showMessage(f'正在格式化到文件 {output}...')
+        started = time.perf_counter()
+
+        def finished(size):
+            self.status_bar.showMessage(
+                f'结果已保存：{output}（{format_size(size)}，{time.perf_counter() - started:.1f} 秒）')
+
+        def failed(message):
+            self.status_bar.showMessage('格式化到文件失败')
+            self.show_message('错误', f'格式化到文件失败：\n{message}', QMessageBox.Critical)
+
+        self.start_background_task(func, source, output, format_type, mode,
+                                   on_finished=finished, on_failed=failed)
+
+    def format_file_without_loading(self, path, format_type, plan):
+        """
+        文件过大、无法载入输入视图时：选择处理方式和保存位置，直接从文件流式格式化到文件
+        """
+        reply = QMessageBox.question(
+            self, '文件过大',
+            f'{plan.reason}。\n\n是否不载入界面，直接把格式化结果保存到另一个文件？',
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+        if reply != QMessageBox.Yes:
+            self.status_bar.showMessage(f'未打开 {path}：{plan.reason}')
+            return
+        modes = {'美化': 'beautify', '压缩': 'minify', '排序（需要完整解析）': 'sort'}
+        name, ok = QInputDialog.getItem(self, '格式化到文件', '处理方式：', list(modes), 0, False)
+        if not ok:
+            return
+        output = self.choose_output_file('保存格式化结果')
+        if output is None:
+            return
+        if os.path.abspath(output) == os.path.abspath(path):
+            self.show_message('错误', '输出文件不能与输入文件相同', QMessageBox.Critical)
+            return
+        self.start_file_format(format_file_to_file, path, output, format_type, modes[name])
 
     def validate_format(self):
         """
@@ -1147,14 +7462,18 @@ class JSONFormatterApp(QMainWindow):
         获取并解析输入的 JSON
         """
         try:
-            input_text = self.input_text.toPlainText().strip()
+            raw_text = self.input_text.toPlainText()
+            input_text = raw_text.strip()
             if not input_text:
                 self.show_message('警告', '请先输入 JSON 数据！', QMessageBox.Warning)
                 return None
 
-            json_data = json.loads(input_text)
+            with self.profiler.stage('parse', input_size=len(input_text)):
+                json_data = json.loads(input_text)
+            self.clear_input_error_highlighting()
             return json_data
         except json.JSONDecodeError as e:
+            self.highlight_input_error(raw_text, e.lineno, e.colno - 1)
             self.show_message('JSON 格式错误', f'输入的 JSON 无效：\n{str(e)}', QMessageBox.Critical)
             return None
         except Exception as e:
@@ -1166,224 +7485,1005 @@ class JSONFormatterApp(QMainWindow):
         获取并解析输入的 XML
         """
         try:
-            input_text = self.input_text.toPlainText().strip()
+            raw_text = self.input_text.toPlainText()
+            input_text = raw_text.strip()
             if not input_text:
                 self.show_message('警告', '请先输入 XML 数据！', QMessageBox.Warning)
                 return None
 
             # 解析XML
-            xml_root = ET.fromstring(input_text)
+            with self.profiler.stage('parse', input_size=len(input_text)):
+                xml_root = ET.fromstring(input_text)
+            self.clear_input_error_highlighting()
             return xml_root
         except ET.ParseError as e:
+            self.highlight_input_error(raw_text, *e.position)
             self.show_message('XML 格式错误', f'输入的 XML 无效：\n{str(e)}', QMessageBox.Critical)
             return None
         except ExpatError as e:
+            self.highlight_input_error(raw_text, e.lineno, e.offset)
             self.show_message('XML 解析错误', f'XML 解析失败：\n{str(e)}', QMessageBox.Critical)
             return None
         except Exception as e:
             self.show_message('错误', f'处理 XML 时发生错误：\n{str(e)}', QMessageBox.Critical)
             return None
 
+    def submit_parallel_json_format(self, mode):
+        """
+        输入较大且有多个 CPU 时，把顶层数组按元素分段提交到进程池格式化（主进程同时解析，用于树形视图），
+        否则返回 None
+        """
+        if ((os.cpu_count() or 1) < 2
+                or self.input_text.document().characterCount() < PARALLEL_FORMAT_THRESHOLD):
+            return None
+        return submit_json_array_format(self.input_text.toPlainText(), mode)
+
+    def collect_parallel_json_format(self, futures, mode):
+        """
+        取回分段格式化的结果，未提交或无法并行处理时返回 None（改为整体格式化）
+        """
+        if futures is None:
+            return None
+        return collect_json_array_format(futures, mode)
+
+    def cancel_parallel_json_format(self, futures):
+        """
+        输入无效时取消尚未开始的分段任务
+        """
+        for future in futures or ():
+            future.cancel()
+
     def beautify_json(self):
         """
         美化 JSON 格式
         """
-        json_data = self.get_input_json()
-        if json_data is not None:
-            try:
-                formatted_json = json.dumps(json_data, indent=4, ensure_ascii=False, separators=(',', ': '))
-                # 更新文本视图
-                self.output_text.setPlainText(formatted_json)
-                # 更新树形视图
-                self.json_tree.populate_tree(json_data)
-                self.status_bar.showMessage('JSON 格式化完成')
-            except Exception as e:
-                self.show_message('错误', f'格式化失败：\n{str(e)}', QMessageBox.Critical)
+        with self.profiler.operation('美化 JSON'):
+            futures = self.submit_parallel_json_format('beautify')
+            json_data = self.get_input_json()
+            if json_data is None:
+                self.cancel_parallel_json_format(futures)
+            else:
+                try:
+                    with self.profiler.stage('serialize') as stage:
+                        formatted_json = self.collect_parallel_json_format(futures, 'beautify')
+                        if formatted_json is None:
+                            formatted_json = dump_json_pretty(json_data)
+                        stage['output_size'] = len(formatted_json)
+                    # 更新文本视图
+                    self.set_output_text(formatted_json)
+                    # 更新树形视图
+                    with self.profiler.stage('populate'):
+                        self.json_tree.populate_tree(json_data)
+                    self.status_bar.showMessage('JSON 格式化完成')
+                except Exception as e:
+                    self.show_message('错误', f'格式化失败：\n{str(e)}', QMessageBox.Critical)
 
     def beautify_xml(self):
         """
         美化 XML 格式
         """
-        xml_root = self.get_input_xml()
-        if xml_root is not None:
-            try:
-                # 将ElementTree转换为字符串
-                rough_string = ET.tostring(xml_root, encoding='unicode')
-                # 使用minidom美化格式
-                reparsed = minidom.parseString(rough_string)
-                formatted_xml = reparsed.toprettyxml(indent="    ")
-                # 移除空行
-                lines = [line for line in formatted_xml.split('\n') if line.strip()]
-                formatted_xml = '\n'.join(lines)
-                # 更新文本视图
-                self.output_text.setPlainText(formatted_xml)
-                # 更新XML树形视图
-                self.xml_tree.populate_tree(xml_root)
-                self.status_bar.showMessage('XML 格式化完成')
-            except Exception as e:
-                self.show_message('错误', f'格式化失败：\n{str(e)}', QMessageBox.Critical)
+        with self.profiler.operation('美化 XML'):
+            xml_root = self.get_input_xml()
+            if xml_root is not None:
+                try:
+                    with self.profiler.stage('serialize') as stage:
+                        formatted_xml = prettify_xml(xml_root)
+                        stage['output_size'] = len(formatted_xml)
+                    # 更新文本视图
+                    self.set_output_text(formatted_xml)
+                    # 更新XML树形视图
+                    with self.profiler.stage('populate'):
+                        self.xml_tree.populate_tree(xml_root)
+                    self.status_bar.showMessage('XML 格式化完成')
+                except Exception as e:
+                    self.show_message('错误', f'格式化失败：\n{str(e)}', QMessageBox.Critical)
 
     def sort_json(self):
         """
         排序并美化 JSON
         """
-        json_data = self.get_input_json()
-        if json_data is not None:
+        with self.profiler.operation('排序 JSON'):
+            futures = self.submit_parallel_json_format('sort')
+            json_data = self.get_input_json()
+            if json_data is None:
+                self.cancel_parallel_json_format(futures)
+            else:
+                try:
+                    with self.profiler.stage('serialize') as stage:
+                        formatted_json = self.collect_parallel_json_format(futures, 'sort')
+                        if formatted_json is None:
+                            formatted_json = dump_json_pretty(json_data, sort_keys=True)
+                        stage['output_size'] = len(formatted_json)
+                    # 更新文本视图
+                    self.set_output_text(formatted_json)
+                    # 更新树形视图（排序后的数据）
+                    with self.profiler.stage('populate'):
+                        self.json_tree.populate_tree(json_data)
+                    self.status_bar.showMessage('JSON 排序并格式化完成')
+                except Exception as e:
+                    self.show_message('错误', f'排序失败：\n{str(e)}', QMessageBox.Critical)
+
+    def sort_xml(self):
+        """
+        排序并美化 XML（按属性和子元素名称排序）
+        """
+        with self.profiler.operation('排序 XML'):
+            xml_root = self.get_input_xml()
+            if xml_root is not None:
+                try:
+                    with self.profiler.stage('serialize') as stage:
+                        # 递归排序XML元素
+                        sort_xml_element(xml_root)
+                        # 格式化输出
+                        formatted_xml = prettify_xml(xml_root)
+                        stage['output_size'] = len(formatted_xml)
+                    # 更新文本视图
+                    self.set_output_text(formatted_xml)
+                    # 更新XML树形视图
+                    with self.profiler.stage('populate'):
+                        self.xml_tree.populate_tree(xml_root)
+                    self.status_bar.showMessage('XML 排序并格式化完成')
+                except Exception as e:
+                    self.show_message('错误', f'排序失败：\n{str(e)}', QMessageBox.Critical)
+
+    def minify_json(self):
+        """
+        压缩 JSON 为单行
+        """
+        with self.profiler.operation('压缩 JSON'):
+            # 压缩不需要树形视图：并行处理成功时各分段都已解析过，无需再整体解析
+            futures = self.submit_parallel_json_format('minify')
+            if futures is not None:
+                with self.profiler.stage('serialize') as stage:
+                    minified_json = self.collect_parallel_json_format(futures, 'minify')
+                    stage['output_size'] = len(minified_json or '')
+                if minified_json is not None:
+                    self.clear_input_error_highlighting()
+                    self.set_output_text(minified_json)
+                    self.status_bar.showMessage('JSON 压缩完成')
+                    return
+            json_data = self.get_input_json()
+            if json_data is not None:
+                try:
+                    with self.profiler.stage('serialize') as stage:
+                        minified_json = json.dumps(json_data, ensure_ascii=False, separators=(',', ':'))
+                        stage['output_size'] = len(minified_json)
+                    self.set_output_text(minified_json)
+                    self.status_bar.showMessage('JSON 压缩完成')
+                except Exception as e:
+                    self.show_message('错误', f'压缩失败：\n{str(e)}', QMessageBox.Critical)
+
+    def minify_xml(self):
+        """
+        压缩 XML 为单行（移除空白和换行）
+        """
+        with self.profiler.operation('压缩 XML'):
+            xml_root = self.get_input_xml()
+            if xml_root is not None:
+                try:
+                    with self.profiler.stage('serialize') as stage:
+                        minified_xml = minify_xml_element(xml_root)
+                        stage['output_size'] = len(minified_xml)
+                    self.set_output_text(minified_xml)
+                    self.status_bar.showMessage('XML 压缩完成')
+                except Exception as e:
+                    self.show_message('错误', f'压缩失败：\n{str(e)}', QMessageBox.Critical)
+
+    def infer_schema(self):
+        """
+        推断当前 JSON 的 Schema：解析后在后台推断（大数组分块并行、可抽样），结果显示在输出区
+        """
+        if self.current_format != 'JSON':
+            self.show_message('提示', 'Schema 推断只适用于 JSON', QMessageBox.Information)
+            return
+        self.record_document_operation('schema')
+        with self.profiler.operation('推断 Schema'):
+            json_data = self.get_input_json()
+        if json_data is None:
+            return
+
+        document = self.active_document
+        revision = document.input_document.revision()
+        sample_limit = self.schema_sample_spinbox.value()
+        self.schema_btn.setEnabled(False)
+        self.status_bar.showMessage('正在推断 Schema...')
+        started = time.perf_counter()
+
+        def finished(result):
+            self.schema_btn.setEnabled(self.current_format == 'JSON')
+            # 推断期间切换了文档时丢弃结果
+            if document is not self.active_document:
+                return
+            schema, notes = result
+            with self.profiler.operation('推断 Schema（输出）') as record:
+                record['stages'].append({'name': 'infer', 'input_size': 0, 'output_size': 0,
+                                         'wall_ms': (time.perf_counter() - started) * 1000, 'peak_bytes': 0})
+                with self.profiler.stage('serialize') as stage:
+                    schema_text = dump_json_pretty(schema)
+                    stage['output_size'] = len(schema_text)
+                self.set_output_text(schema_text)
+                # 推断期间输入可能已被修改，结果对应开始推断时的输入
+                document.output_revision = revision
+                with self.profiler.stage('populate'):
+                    self.json_tree.populate_tree(schema)
+            message = f'Schema 推断完成，用时 {time.perf_counter() - started:.1f} 秒'
+            self.status_bar.showMessage(f'{message}（{notes}）' if notes else message)
+
+        def failed(message):
+            self.schema_btn.setEnabled(self.current_format == 'JSON')
+            self.status_bar.showMessage('Schema 推断失败')
+            self.show_message('错误', f'Schema 推断失败：\n{message}', QMessageBox.Critical)
+
+        self.start_background_task(infer_json_schema, json_data, sample_limit,
+                                   on_finished=finished, on_failed=failed)
+
+    def choose_schema_file(self):
+        """
+        选择 Schema 文件（默认位置为上次使用的 Schema），返回 (路径, 内容)，取消或无效时返回 (None, None)
+        """
+        last_path = self.settings.value('schema/last_path', '', type=str)
+        path, _ = QFileDialog.getOpenFileName(
+            self, '选择 JSON Schema', last_path, 'JSON Schema (*.json *.schema.json);;所有文件 (*)')
+        if not path:
+            return None, None
+        try:
+            with open_text_input(path) as f:
+                schema_text = f.read()
+            get_schema_validator(schema_text)
+        except (OSError, ValueError, EOFError) as e:
+            self.show_message('错误', f'无法加载 Schema：\n{str(e)}', QMessageBox.Critical)
+            return None, None
+        self.settings.setValue('schema/last_path', path)
+        return path, schema_text
+
+    def validate_with_schema(self, schema_path=None):
+        """
+        按 Schema 校验当前 JSON：在后台执行，违反项列在输出区并在树形视图中标红
+        """
+        if self.current_format != 'JSON':
+            self.show_message('提示', 'Schema 校验只适用于 JSON', QMessageBox.Information)
+            return
+        if schema_path:
             try:
-                formatted_json = json.dumps(json_data, indent=4, ensure_ascii=False,
-                                            separators=(',', ': '), sort_keys=True)
-                # 更新文本视图
-                self.output_text.setPlainText(formatted_json)
-                # 更新树形视图（排序后的数据）
+                with open_text_input(schema_path) as f:
+                    schema_text = f.read()
+            except OSError as e:
+                self.show_message('错误', f'无法加载 Schema：\n{str(e)}', QMessageBox.Critical)
+                return
+        else:
+            schema_path, schema_text = self.choose_schema_file()
+            if schema_path is None:
+                return
+        with self.profiler.operation('Schema 校验'):
+            json_data = self.get_input_json()
+        if json_data is None:
+            return
+        try:
+            validator = get_schema_validator(schema_text)
+        except ValueError as e:
+            self.show_message('错误', f'无法加载 Schema：\n{str(e)}', QMessageBox.Critical)
+            return
+
+        document = self.active_document
+        self.schema_validate_btn.setEnabled(False)
+        self.status_bar.showMessage('正在按 Schema 校验...')
+        started = time.perf_counter()
+
+        def finished(violations):
+            self.schema_validate_btn.setEnabled(self.current_format == 'JSON')
+            if document is not self.active_document:
+                return
+            elapsed = time.perf_counter() - started
+            name = os.path.basename(schema_path)
+            if not violations:
+                self.set_output_text(f'符合 Schema：{name} ✅')
                 self.json_tree.populate_tree(json_data)
-                self.status_bar.showMessage('JSON 排序并格式化完成')
-            except Exception as e:
-                self.show_message('错误', f'排序失败：\n{str(e)}', QMessageBox.Critical)
+                self.status_bar.showMessage(f'Schema 校验通过（{elapsed:.2f} 秒）')
+                return
+            shown = violations[:1000]
+            lines = [f'不符合 Schema：{name}，共 {len(violations)} 处违反', '']
+            lines.extend(f'{pointer or "/"}：{message}' for pointer, message in shown)
+            if len(violations) > len(shown):
+                lines.append(f'……另有 {len(violations) - len(shown)} 处')
+            self.set_output_text('\n'.join(lines))
+            self.json_tree.populate_tree(json_data)
+            marked = self.json_tree.mark_violations(shown)
+            self.output_tab_widget.setCurrentIndex(1)
+            self.status_bar.showMessage(
+                f'Schema 校验未通过：{len(violations)} 处违反，树形视图中已标出 {marked} 个节点（{elapsed:.2f} 秒）')
+
+        def failed(message):
+            self.schema_validate_btn.setEnabled(self.current_format == 'JSON')
+            self.status_bar.showMessage('Schema 校验失败')
+            self.show_message('错误', f'Schema 校验失败：\n{message}', QMessageBox.Critical)
+
+        self.start_background_task(validator.validate, json_data, on_finished=finished, on_failed=failed)
+
+    def validate_directory_with_schema(self, schema_path=None, directory=None):
+        """
+        按 Schema 批量校验目录中的 JSON 文件（含压缩文件），多核时使用进程池，报告显示在输出区
+        """
+        if schema_path:
+            try:
+                with open_text_input(schema_path) as f:
+                    schema_text = f.read()
+            except OSError as e:
+                self.show_message('错误', f'无法加载 Schema：\n{str(e)}', QMessageBox.Critical)
+                return
+        else:
+            schema_path, schema_text = self.choose_schema_file()
+            if schema_path is None:
+                return
+        if directory is None:
+            directory = QFileDialog.getExistingDirectory(self, '选择要校验的目录', os.path.dirname(schema_path))
+            if not directory:
+                return
+
+        self.schema_validate_btn.setEnabled(False)
+        self.status_bar.showMessage('正在批量校验...')
+        started = time.perf_counter()
+
+        def progress(state):
+            done, total = state
+            self.status_bar.showMessage(f'正在批量校验：{done}/{total} 个文件')
+
+        def finished(results):
+            self.schema_validate_btn.setEnabled(self.current_format == 'JSON')
+            self.set_output_text(format_schema_report(results, directory))
+            invalid = sum(1 for result in results if result[1] or result[3])
+            self.status_bar.showMessage(
+                f'批量校验完成：{len(results)} 个文件，{invalid} 个未通过（{time.perf_counter() - started:.1f} 秒）')
+
+        def failed(message):
+            self.schema_validate_btn.setEnabled(self.current_format == 'JSON')
+            self.status_bar.showMessage('批量校验失败')
+            self.show_message('错误', f'批量校验失败：\n{message}', QMessageBox.Critical)
+
+        self.start_background_task(validate_directory_against_schema, directory, schema_text, schema_path,
+                                   on_finished=finished, on_failed=failed, on_progress=progress)
+
+    def batch_format_directory(self, directory=None, mode=None, format_type=None, use_cache=None):
+        """
+        原地格式化目录中的 JSON/XML 文件：未指定参数时弹出对话框选择，在后台执行，报告显示在输出区
+        """
+        if directory is None:
+            dialog = BatchFormatDialog(self.settings.value('batch/directory', '', type=str),
+                                       self.settings.value('batch/mode', 'beautify', type=str),
+                                       self.settings.value('batch/format', '', type=str) or None,
+                                       self.settings.value('batch/use_cache', True, type=bool), self)
+            if dialog.exec_() != QDialog.Accepted:
+                return
+            directory, mode, format_type, use_cache = dialog.options()
+            self.settings.setValue('batch/directory', directory)
+            self.settings.setValue('batch/mode', mode)
+            self.settings.setValue('batch/format', format_type or '')
+            self.settings.setValue('batch/use_cache', use_cache)
+        mode = mode or 'beautify'
+        cache_path = get_format_cache_path() if use_cache is not False else None
+
+        self.batch_format_btn.setEnabled(False)
+        self.status_bar.showMessage('正在批量格式化...')
+        started = time.perf_counter()
+
+        def progress(state):
+            done, total = state
+            self.status_bar.showMessage(f'正在批量格式化：{done}/{total} 个文件')
+
+        def finished(results):
+            self.batch_format_btn.setEnabled(True)
+            elapsed = time.perf_counter() - started
+            self.set_output_text(format_batch_report(results, directory, mode, elapsed))
+            changed = sum(1 for _, status, _ in results if status == 'formatted')
+            failures = sum(1 for _, status, _ in results if status == 'failed')
+            self.status_bar.showMessage(
+                f'批量格式化完成：{len(results)} 个文件，格式化 {changed} 个，失败 {failures} 个（{elapsed:.1f} 秒）')
+
+        def failed(message):
+            self.batch_format_btn.setEnabled(True)
+            self.status_bar.showMessage('批量格式化失败')
+            self.show_message('错误', f'批量格式化失败：\n{message}', QMessageBox.Critical)
+
+        self.start_background_task(format_directory, directory, mode, format_type, cache_path,
+                                   on_finished=finished, on_failed=failed, on_progress=progress)
+
+    def find_next_in_tree(self):
+        """
+        在当前树形视图中查找下一个键名或值包含查找文本的节点（查找文本或数据变化时重新查找）
+        """
+        text = self.tree_search_input.text()
+        tree = self.current_tree()
+        if not text or tree.table is None:
+            return
+        key = (text, tree.table)
+        if key != self.tree_search_key:
+            with self.profiler.operation('树内查找'):
+                with self.profiler.stage('search', input_size=len(tree.table)):
+                    self.tree_search_hits = tree.search_nodes(text)
+            self.tree_search_key = key
+        hits = self.tree_search_hits
+        if not hits:
+            self.status_bar.showMessage(f'树中未找到“{text}”', 3000)
+            return
 
-    def sort_xml(self):
+        # 从当前节点之后（按文档顺序）继续
+        current = tree.current_node()
+        position = 0
+        if current in hits:
+            position = (hits.index(current) + 1) % len(hits)
+        tree.select_node(hits[position])
+        self.status_bar.showMessage(f'树中查找“{text}”：第 {position + 1} / {len(hits)} 个', 3000)
+
+    def update_tree_path_placeholder(self, format_type):
+        """
+        路径输入框的提示随格式变化
+        """
+        if format_type == 'JSON':
+            self.tree_path_input.setPlaceholderText('JSON Pointer，例如 /items/0/name')
+        else:
+            self.tree_path_input.setPlaceholderText('XML 路径，例如 /root/item[2]/@id')
+
+    def focus_tree_path_input(self):
         """
-        排序并美化 XML（按属性和子元素名称排序）
+        切换到树形视图并把焦点放到路径输入框，预先填入当前选中节点的路径
         """
-        xml_root = self.get_input_xml()
-        if xml_root is not None:
-            try:
-                # 递归排序XML元素
-                self._sort_xml_element(xml_root)
-                # 格式化输出
-                rough_string = ET.tostring(xml_root, encoding='unicode')
-                reparsed = minidom.parseString(rough_string)
-                formatted_xml = reparsed.toprettyxml(indent="    ")
-                # 移除空行
-                lines = [line for line in formatted_xml.split('\n') if line.strip()]
-                formatted_xml = '\n'.join(lines)
-                # 更新文本视图
-                self.output_text.setPlainText(formatted_xml)
-                # 更新XML树形视图
-                self.xml_tree.populate_tree(xml_root)
-                self.status_bar.showMessage('XML 排序并格式化完成')
-            except Exception as e:
-                self.show_message('错误', f'排序失败：\n{str(e)}', QMessageBox.Critical)
+        self.output_tab_widget.setCurrentIndex(1)
+        path = self.current_tree().get_selected_path()
+        if path is not None:
+            self.tree_path_input.setText(path)
+        self.tree_path_input.setFocus()
+        self.tree_path_input.selectAll()
 
-    def _sort_xml_element(self, element):
+    def go_to_tree_path(self):
         """
-        递归排序XML元素的属性和子元素
+        选中并显示路径输入框中的路径对应的节点
         """
-        # 排序属性
-        if element.attrib:
-            sorted_attrib = dict(sorted(element.attrib.items()))
-            element.clear()
-            element.attrib.update(sorted_attrib)
-
-        # 排序子元素
-        children = list(element)
-        if children:
-            # 按标签名排序子元素
-            children.sort(key=lambda x: x.tag)
-            element[:] = children
-            # 递归排序每个子元素
-            for child in children:
-                self._sort_xml_element(child)
+        path = self.tree_path_input.text()
+        tree = self.current_tree()
+        if tree.table is None:
+            self.status_bar.showMessage('请先格式化内容，再按路径定位', 3000)
+            return
+        try:
+            node = tree.go_to_path(path)
+        except ValueError as e:
+            self.status_bar.showMessage(str(e), 5000)
+            return
+        if tree.table.visible_node(node) != node:
+            self.status_bar.showMessage(f'节点过深，已定位到可显示的最深祖先（第 {MAX_VIEW_DEPTH} 层）', 5000)
+        else:
+            self.status_bar.showMessage(f'已定位到 {path.strip() or "根节点"}', 3000)
+        tree.setFocus()
 
-    def minify_json(self):
+    def run_xpath_query(self):
         """
-        压缩 JSON 为单行
+        在当前 XML 上执行 XPath 查询（未格式化时先解析输入），命中结果列在查询面板中
         """
-        json_data = self.get_input_json()
-        if json_data is not None:
-            try:
-                minified_json = json.dumps(json_data, ensure_ascii=False, separators=(',', ':'))
-                self.output_text.setPlainText(minified_json)
-                self.status_bar.showMessage('JSON 压缩完成')
-            except Exception as e:
-                self.show_message('错误', f'压缩失败：\n{str(e)}', QMessageBox.Critical)
+        try:
+            query = compile_xpath(self.xpath_input.text())
+        except ValueError as e:
+            self.show_message('XPath 错误', str(e), QMessageBox.Warning)
+            return
 
-    def minify_xml(self):
+        with self.profiler.operation('XPath 查询'):
+            if self.xml_tree.xml_root is None:
+                xml_root = self.get_input_xml()
+                if xml_root is None:
+                    return
+                with self.profiler.stage('populate'):
+                    self.xml_tree.populate_tree(xml_root)
+
+            index = self.xml_tree.get_element_index()
+            building = not index.built
+            started = time.perf_counter()
+            hits = index.query(query)
+            elapsed = (time.perf_counter() - started) * 1000
+
+        self.xpath_hits = hits
+        self.xpath_hits_root = index.root
+        shown = hits[:self.XPATH_RESULT_LIMIT]
+        self.xpath_results.blockSignals(True)
+        self.xpath_results.setRowCount(len(shown))
+        for row, (element, attribute) in enumerate(shown):
+            if attribute is None:
+                path = index.element_path(element)
+                value = (element.text or '').strip()
+            else:
+                path = f'{index.element_path(element)}/@{attribute}'
+                value = element.attrib[attribute]
+            for column, text in enumerate((path, value[:200])):
+                item = QTableWidgetItem(text)
+                item.setToolTip(text)
+                self.xpath_results.setItem(row, column, item)
+        self.xpath_results.blockSignals(False)
+        self.xpath_results.setVisible(bool(hits))
+
+        message = f'XPath 命中 {len(hits)} 个结果（{elapsed:.1f}ms{"，含构建索引" if building else ""}）'
+        if len(hits) > len(shown):
+            message += f'，列出前 {len(shown)} 个'
+        self.status_bar.showMessage(message)
+        if hits:
+            self.xpath_results.blockSignals(True)
+            self.xpath_results.setCurrentCell(0, 0)
+            self.xpath_results.blockSignals(False)
+            self.go_to_xpath_hit(0)
+
+    def go_to_xpath_hit(self, row, show_text=False):
+        """
+        定位 XPath 命中结果：选中树节点，并在文本视图中选中对应的开始标签
+        """
+        if row < 0 or row >= min(len(self.xpath_hits), self.XPATH_RESULT_LIMIT):
+            return
+        if self.xml_tree.xml_root is not self.xpath_hits_root:
+            self.status_bar.showMessage('XML 已重新解析，请重新执行查询', 3000)
+            return
+        element, attribute = self.xpath_hits[row]
+        self.xml_tree.select_element(element, attribute)
+
+        if not self.output_content:
+            return
+        spans = self.xml_output_spans()
+        if spans is None:
+            self.status_bar.showMessage('输出文本不是当前 XML 树的序列化结果（如压缩结果、预览或已过期），无法在文本中定位', 5000)
+            return
+        self.select_output_range(*spans[element])
+        if show_text:
+            self.output_tab_widget.setCurrentIndex(0)
+
+    def xml_output_spans(self):
         """
-        压缩 XML 为单行（移除空白和换行）
+        当前输出文本中各元素开始标签的位置（按根元素和输出字符串缓存），输出不对应当前 XML 树时返回 None
         """
-        xml_root = self.get_input_xml()
-        if xml_root is not None:
-            try:
-                # 移除所有元素的空白文本
-                self._remove_xml_whitespace(xml_root)
-                # 转换为字符串，不添加缩进
-                minified_xml = ET.tostring(xml_root, encoding='unicode')
-                # 移除多余的空白字符
-                minified_xml = ' '.join(minified_xml.split())
-                self.output_text.setPlainText(minified_xml)
-                self.status_bar.showMessage('XML 压缩完成')
-            except Exception as e:
-                self.show_message('错误', f'压缩失败：\n{str(e)}', QMessageBox.Critical)
+        root = self.xml_tree.xml_root
+        text = self.output_content
+        cached = self.xml_output_spans_cache
+        if cached is None or cached[0] is not root or cached[1] is not text:
+            spans = map_xml_start_tags(text, root) if root is not None else None
+            cached = self.xml_output_spans_cache = (root, text, spans)
+        return cached[2]
 
-    def _remove_xml_whitespace(self, element):
+    def select_output_range(self, start, end):
         """
-        递归移除XML元素中的空白文本
+        在输出文本视图中选中 [start, end)（字符串下标），必要时先完成渐进加载
         """
-        if element.text:
-            element.text = element.text.strip() or None
-        if element.tail:
-            element.tail = element.tail.strip() or None
-        for child in element:
-            self._remove_xml_whitespace(child)
+        # QTextDocument 按 UTF-16 计位置
+        start16 = len(self.output_content[:start].encode('utf-16-le')) // 2
+        end16 = start16 + len(self.output_content[start:end].encode('utf-16-le')) // 2
+        if end16 >= self.output_text.document().characterCount() and self.output_renderer.is_running():
+            self.output_renderer.finish_now()
+        cursor = self.output_text.textCursor()
+        cursor.setPosition(min(start16, self.output_text.document().characterCount() - 1))
+        cursor.setPosition(min(end16, self.output_text.document().characterCount() - 1), QTextCursor.KeepAnchor)
+        self.output_text.setTextCursor(cursor)
+        self.output_text.ensureCursorVisible()
 
     def validate_json(self):
         """
         验证 JSON 格式
         """
-        input_text = self.input_text.toPlainText().strip()
+        raw_text = self.input_text.toPlainText()
+        input_text = raw_text.strip()
         if not input_text:
             self.show_message('警告', '请先输入 JSON 数据！', QMessageBox.Warning)
             return
 
-        try:
-            json.loads(input_text)
-            self.show_message('验证结果', 'JSON 格式正确！✅', QMessageBox.Information)
-            self.status_bar.showMessage('JSON 格式验证通过')
-        except json.JSONDecodeError as e:
-            self.show_message('验证结果', f'JSON 格式错误：\n{str(e)}', QMessageBox.Critical)
-            self.status_bar.showMessage('JSON 格式验证失败')
-        except Exception as e:
-            self.show_message('错误', f'验证时发生错误：\n{str(e)}', QMessageBox.Critical)
+        with self.profiler.operation('验证 JSON'):
+            try:
+                with self.profiler.stage('parse', input_size=len(input_text)):
+                    json.loads(input_text)
+                self.clear_input_error_highlighting()
+                self.show_message('验证结果', 'JSON 格式正确！✅', QMessageBox.Information)
+                self.status_bar.showMessage('JSON 格式验证通过')
+            except json.JSONDecodeError as e:
+                self.highlight_input_error(raw_text, e.lineno, e.colno - 1)
+                self.show_message('验证结果', f'JSON 格式错误：\n{str(e)}', QMessageBox.Critical)
+                self.status_bar.showMessage('JSON 格式验证失败')
+            except Exception as e:
+                self.show_message('错误', f'验证时发生错误：\n{str(e)}', QMessageBox.Critical)
 
     def validate_xml(self):
         """
         验证 XML 格式
         """
-        input_text = self.input_text.toPlainText().strip()
+        raw_text = self.input_text.toPlainText()
+        input_text = raw_text.strip()
         if not input_text:
             self.show_message('警告', '请先输入 XML 数据！', QMessageBox.Warning)
             return
 
+        with self.profiler.operation('验证 XML'):
+            try:
+                with self.profiler.stage('parse', input_size=len(input_text)):
+                    ET.fromstring(input_text)
+                self.clear_input_error_highlighting()
+                self.show_message('验证结果', 'XML 格式正确！✅', QMessageBox.Information)
+                self.status_bar.showMessage('XML 格式验证通过')
+            except ET.ParseError as e:
+                self.highlight_input_error(raw_text, *e.position)
+                self.show_message('验证结果', f'XML 格式错误：\n{str(e)}', QMessageBox.Critical)
+                self.status_bar.showMessage('XML 格式验证失败')
+            except ExpatError as e:
+                self.highlight_input_error(raw_text, e.lineno, e.offset)
+                self.show_message('验证结果', f'XML 解析错误：\n{str(e)}', QMessageBox.Critical)
+                self.status_bar.showMessage('XML 格式验证失败')
+            except Exception as e:
+                self.show_message('错误', f'验证时发生错误：\n{str(e)}', QMessageBox.Critical)
+
+    def toggle_follow(self):
+        """
+        开始跟踪选择的文件，正在跟踪时停止
+        """
+        if self.follower is not None:
+            self.stop_following()
+            return
+        path, _ = QFileDialog.getOpenFileName(
+            self, '跟踪文件', '', 'JSON Lines / 日志 (*.jsonl *.ndjson *.log *.json);;所有文件 (*)')
+        if path:
+            self.start_following(path)
+
+    def start_following(self, path):
+        """
+        在新文档中跟踪 JSON Lines 文件：先显示末尾已有的记录，之后只追加新写入的完整行
+        """
         try:
-            ET.fromstring(input_text)
-            self.show_message('验证结果', 'XML 格式正确！✅', QMessageBox.Information)
-            self.status_bar.showMessage('XML 格式验证通过')
-        except ET.ParseError as e:
-            self.show_message('验证结果', f'XML 格式错误：\n{str(e)}', QMessageBox.Critical)
-            self.status_bar.showMessage('XML 格式验证失败')
-        except ExpatError as e:
-            self.show_message('验证结果', f'XML 解析错误：\n{str(e)}', QMessageBox.Critical)
-            self.status_bar.showMessage('XML 格式验证失败')
-        except Exception as e:
-            self.show_message('错误', f'验证时发生错误：\n{str(e)}', QMessageBox.Critical)
+            follower = FileFollower(path, self.follow_window, self)
+        except OSError as e:
+            self.show_message('错误', f'无法跟踪文件：\n{str(e)}', QMessageBox.Critical)
+            return
+        self.input_renderer.finish_now()
+        previous = self.active_document
+        self.new_document(f'📡 {os.path.basename(path)}', 'JSON')
+        if previous is not None and previous.input_size() == 0 and not previous.output:
+            self.close_document_tab(self.tab_index_of(previous), confirm=False)
+
+        self.input_text.setReadOnly(True)
+        self.follower = follower
+        self.follow_document = self.active_document
+        self.follow_tree_dropped = 0
+        follower.records_read.connect(self.on_follow_records)
+        follower.rotated.connect(self.on_follow_rotated)
+        self.follow_btn.setText('⏹ 停止跟踪')
+        self.status_bar.showMessage(f'正在跟踪 {path}')
+        follower.start()
+
+    def stop_following(self):
+        """
+        停止跟踪，窗口中的记录保留为文档的输出
+        """
+        follower = self.follower
+        if follower is None:
+            return
+        follower.stop()
+        follower.deleteLater()
+        self.follower = None
+        self.follow_document = None
+        self.follow_tree_timer.stop()
+        self.output_content = follower.text()
+        self.refresh_follow_tree(follower)
+        if not self.input_renderer.is_running():
+            self.input_text.setReadOnly(False)
+        self.follow_btn.setText('📡 跟踪文件')
+        self.status_bar.showMessage(f'已停止跟踪 {follower.path}（共读取 {follower.total} 条记录）')
+
+    def on_follow_records(self, entries, removed):
+        """
+        把新记录追加到输出末尾（原来停在末尾时继续跟随滚动），移出窗口的旧记录从开头删除
+        """
+        bar = self.output_text.verticalScrollBar()
+        at_bottom = bar.value() >= bar.maximum() - 4
+        document = self.output_text.document()
+        cursor = QTextCursor(document)
+        cursor.beginEditBlock()
+        if removed:
+            cursor.setPosition(min(removed, document.characterCount() - 1), QTextCursor.KeepAnchor)
+            cursor.removeSelectedText()
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(''.join(entry[1] + '\n' for entry in entries))
+        cursor.endEditBlock()
+        if at_bottom:
+            bar.setValue(bar.maximum())
+
+        follower = self.follower
+        if not self.follow_tree_timer.isActive():
+            self.follow_tree_timer.start()
+        errors = f'，{follower.errors} 行无法解析' if follower.errors else ''
+        self.status_bar.showMessage(
+            f'正在跟踪 {follower.path}：共 {follower.total} 条记录，窗口中 {len(follower.records)} 条{errors}')
+
+    def on_follow_rotated(self):
+        """
+        文件被截断或替换后从头读取
+        """
+        self.status_bar.showMessage(f'{self.follower.path} 已被截断或替换，从头开始读取', 5000)
+
+    def refresh_follow_tree(self, follower=None):
+        """
+        用窗口中的记录重建树形视图（最多每秒一次），展开状态按移出窗口的记录数换算下标后保留
+        """
+        follower = follower or self.follower
+        if follower is None:
+            return
+        tree = self.json_tree
+        state = tree.save_view_state()
+        shift = follower.dropped - self.follow_tree_dropped
+        self.follow_tree_dropped = follower.dropped
+        if state is not None and shift:
+            expanded = (shift_json_pointer(path, shift) for path in state['expanded'])
+            state['expanded'] = [path for path in expanded if path is not None]
+            if state['current'] is not None:
+                state['current'] = shift_json_pointer(state['current'], shift)
+        tree.populate_tree(follower.values())
+        tree.restore_view_state(state)
 
     def copy_output(self):
         """
         复制输出内容到剪贴板
         """
-        output_text = self.output_text.toPlainText().strip()
-        if not output_text:
+        if self.follower is not None:
+            self.output_content = self.follower.text()
+        # 直接使用完整结果字符串，不从文本视图回读，也不产生额外副本
+        if not self.output_content or self.output_content.isspace():
             self.show_message('警告', '没有可复制的内容！', QMessageBox.Warning)
             return
 
         try:
             clipboard = QApplication.clipboard()
-            clipboard.setText(output_text)
+            clipboard.setText(self.output_content)
             self.show_message('成功', '内容已复制到剪贴板！📋', QMessageBox.Information)
             self.status_bar.showMessage('内容已复制到剪贴板')
         except Exception as e:
             self.show_message('错误', f'复制失败：\n{str(e)}', QMessageBox.Critical)
 
+    def save_output(self):
+        """
+        将输出结果保存到文件
+        """
+        if self.follower is not None:
+            self.output_content = self.follower.text()
+        if not self.output_content or self.output_content.isspace():
+            self.show_message('警告', '没有可保存的内容！', QMessageBox.Warning)
+            return
+
+        path = self.choose_output_file('保存结果')
+        if path is None:
+            return
+
+        try:
+            write_text_file(path, self.output_content, compression=compression_for_path(path))
+            self.status_bar.showMessage(f'结果已保存：{path}（{format_size(os.path.getsize(path))}）')
+        except OSError as e:
+            self.show_message('错误', f'保存失败：\n{str(e)}', QMessageBox.Critical)
+
+    def show_tree_context_menu(self, position):
+        """
+        树形视图右键菜单
+        """
+        tree = self.sender()
+        node = tree.node_at(position)
+        if node < 0:
+            return
+
+        menu = QMenu(self)
+        copy_subtree_action = menu.addAction('复制子树')
+        copy_key_action = menu.addAction('复制键名')
+        copy_value_action = menu.addAction('复制显示值')
+        copy_path_action = menu.addAction('复制 JSON Pointer' if tree is self.json_tree else '复制路径')
+        table_action = None
+        if tree is self.json_tree and tree.node_text(node, 2) == 'Array':
+            table_action = menu.addAction('在表格视图中查看')
+        action = menu.exec_(tree.viewport().mapToGlobal(position))
+
+        if action == copy_subtree_action:
+            try:
+                text = tree.get_subtree_text(node)
+            except Exception as e:
+                self.show_message('错误', f'复制子树失败：\n{str(e)}', QMessageBox.Critical)
+                return
+            QApplication.clipboard().setText(text)
+            self.status_bar.showMessage(f'子树已复制到剪贴板（{format_size(len(text.encode("utf-8")))}）', 3000)
+        elif action == copy_key_action:
+            QApplication.clipboard().setText(tree.node_text(node, 0))
+            self.status_bar.showMessage('键名已复制到剪贴板', 2000)
+        elif action == copy_value_action:
+            QApplication.clipboard().setText(tree.node_text(node, 1))
+            self.status_bar.showMessage('显示值已复制到剪贴板', 2000)
+        elif action == copy_path_action:
+            path = tree.table.node_path(node)
+            QApplication.clipboard().setText(path)
+            self.status_bar.showMessage(f'路径已复制到剪贴板：{path or "（根节点）"}', 3000)
+        elif action is not None and action == table_action:
+            self.show_table_for(tree.get_item_value(node))
+
+    def on_json_data_changed(self):
+        """
+        JSON 数据变化后表格视图失效，表格标签页可见时立即重建
+        """
+        self.table_pending_source = None
+        if self.output_tab_widget.currentIndex() == self.table_tab_index:
+            self.refresh_table_view()
+        elif self.table_source is not None:
+            self.table_source = None
+            self.table_model.set_table(None)
+
+    def on_output_tab_changed(self, index):
+        """
+        切换到表格标签页时按需构建列式数据
+        """
+        if index == self.table_tab_index:
+            self.refresh_table_view()
+
+    def show_table_for(self, value):
+        """
+        在表格视图中显示指定的数组（树形视图右键菜单）
+        """
+        self.table_pending_source = value
+        if self.output_tab_widget.currentIndex() == self.table_tab_index:
+            self.refresh_table_view()
+        else:
+            self.output_tab_widget.setCurrentIndex(self.table_tab_index)
+
+    def refresh_table_view(self):
+        """
+        为当前 JSON 数据（或右键选择的数组）构建列式数据，在后台线程中完成
+        """
+        source = self.table_pending_source
+        if source is None and self.current_format == 'JSON':
+            source = self.json_tree.json_data
+        if source is self.table_source:
+            return
+
+        self.table_source = source
+        self.table_model.set_table(None)
+        if not ColumnarTable.is_record_array(source):
+            if self.current_format != 'JSON':
+                self.table_info_label.setText('表格视图仅适用于 JSON 对象数组')
+            elif source is None:
+                self.table_info_label.setText('表格视图用于显示对象数组（[{...}, {...}, ...]）')
+            else:
+                self.table_info_label.setText('当前数据不是对象数组，可在树形视图中右键数组节点选择“在表格视图中查看”')
+            return
+
+        self.table_build_generation += 1
+        generation = self.table_build_generation
+        self.table_info_label.setText(f'正在构建表格（{len(source)} 行）...')
+        started = time.perf_counter()
+
+        def finished(table):
+            # 构建期间数据已切换时丢弃结果
+            if generation != self.table_build_generation or source is not self.table_source:
+                return
+            self.table_model.set_table(table)
+            self.table_view.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+            elapsed = (time.perf_counter() - started) * 1000
+            info = (f'{table.row_count} 行 × {len(table.columns)} 列，'
+                    f'列存储 {format_size(table.memory_size())}，构建 {elapsed:.0f}ms')
+            if table.truncated_columns:
+                info += f'（另有 {table.truncated_columns} 列未显示）'
+            self.table_info_label.setText(info + '；点击列标题排序')
+
+        def failed(message):
+            if generation == self.table_build_generation:
+                self.table_info_label.setText(f'构建表格失败：{message}')
+
+        self.start_background_task(ColumnarTable, source, on_finished=finished, on_failed=failed)
+
+    def profile_current_data(self):
+        """
+        在后台统计当前已解析的对象数组
+        """
+        source = self.table_pending_source
+        if source is None and self.current_format == 'JSON':
+            source = self.json_tree.json_data
+        if not ColumnarTable.is_record_array(source):
+            self.show_message('提示', '列统计需要对象数组：请先格式化 JSON 数组，或在树形视图中右键数组节点选择“在表格视图中查看”',
+                              QMessageBox.Information)
+            return
+        self.start_profiling(profile_records, source, '当前数据')
+
+    def profile_file(self, path=None):
+        """
+        在后台流式统计 JSON 文件（支持 gzip/bz2/xz/zip 压缩）中的顶层数组
+        """
+        if path is None:
+            path, _ = QFileDialog.getOpenFileName(
+                self, '统计文件', '', 'JSON 文件 (*.json *.gz *.bz2 *.xz *.zip);;所有文件 (*)')
+            if not path:
+                return
+        self.start_profiling(profile_json_file, path, os.path.basename(path))
+
+    def start_profiling(self, func, source, description):
+        """
+        启动统计任务（同一时间只运行一个）
+        """
+        self.cancel_profiling()
+        cancel_event = threading.Event()
+        self.stats_cancel_event = cancel_event
+        self.stats_data_btn.setEnabled(False)
+        self.stats_file_btn.setEnabled(False)
+        self.stats_cancel_btn.setEnabled(True)
+        self.stats_info_label.setText(f'正在统计 {description}...')
+        started = time.perf_counter()
+
+        def progress(rows):
+            if cancel_event is self.stats_cancel_event:
+                self.stats_info_label.setText(f'正在统计 {description}：已处理 {rows} 条记录...')
+
+        def done():
+            if cancel_event is self.stats_cancel_event:
+                self.stats_cancel_event = None
+                self.stats_data_btn.setEnabled(True)
+                self.stats_file_btn.setEnabled(True)
+                self.stats_cancel_btn.setEnabled(False)
+
+        def finished(profiler):
+            if cancel_event is not self.stats_cancel_event:
+                return
+            done()
+            self.show_profile(profiler)
+            elapsed = time.perf_counter() - started
+            info = f'{description}：{profiler.rows} 条记录，{len(profiler.columns)} 个键，用时 {elapsed:.1f} 秒'
+            if profiler.non_records:
+                info += f'（{profiler.non_records} 个元素不是对象）'
+            if profiler.skipped_columns:
+                info += f'（另有 {len(profiler.skipped_columns)} 个键未统计）'
+            self.stats_info_label.setText(info)
+
+        def failed(message):
+            if cancel_event is not self.stats_cancel_event:
+                return
+            done()
+            self.stats_info_label.setText(f'统计失败：{message}')
+
+        self.start_background_task(func, source, cancel_event.is_set,
+                                   on_finished=finished, on_failed=failed, on_progress=progress)
+
+    def cancel_profiling(self):
+        """
+        取消正在进行的统计任务
+        """
+        if self.stats_cancel_event is None:
+            return
+        self.stats_cancel_event.set()
+        self.stats_cancel_event = None
+        self.stats_data_btn.setEnabled(True)
+        self.stats_file_btn.setEnabled(True)
+        self.stats_cancel_btn.setEnabled(False)
+        self.stats_info_label.setText('统计已取消')
+
+    def show_profile(self, profiler):
+        """
+        把列统计结果填入表格
+        """
+        def format_number(value):
+            if value is None:
+                return ''
+            if isinstance(value, float):
+                return f'{value:.6g}'
+            return str(value)
+
+        def format_value(value):
+            text = f'"{value}"' if isinstance(value, str) else json.dumps(value)
+            return text if len(text) <= 40 else text[:37] + '...'
+
+        rows = profiler.summary_rows()
+        self.stats_table.setRowCount(len(rows))
+        for row, summary in enumerate(rows):
+            distinct = f"≈{summary['distinct']}" if summary['distinct_estimated'] else str(summary['distinct'])
+            cells = [
+                summary['key'],
+                ', '.join(f'{name} {count}' for name, count in summary['types'].items()),
+                str(summary['count'] - summary['nulls']),
+                str(summary['nulls']),
+                str(summary['missing']),
+                format_number(summary['min']),
+                format_number(summary['max']),
+                format_number(summary['mean']),
+                distinct,
+                ', '.join(f'{format_value(value)} ×{count}' for value, count in summary['top']),
+            ]
+            for column, text in enumerate(cells):
+                item = QTableWidgetItem(text)
+                item.setToolTip(text)
+                self.stats_table.setItem(row, column, item)
+
     def clear_all(self):
         """
         清空所有内容
@@ -1391,35 +8491,65 @@ class JSONFormatterApp(QMainWindow):
         reply = QMessageBox.question(self, '确认清空', '确定要清空所有内容吗？',
                                      QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes:
+            self.stop_following()
             self.input_text.clear()
-            self.output_text.clear()
-            self.json_tree.clear()
+            self.clear_output()
+            self.json_tree.populate_tree(None)
+            self.xml_tree.populate_tree(None)
             self.status_bar.showMessage('内容已清空')
 
+    def current_tree(self):
+        """
+        当前格式对应的树形视图
+        """
+        return self.json_tree if self.current_format == 'JSON' else self.xml_tree
+
     def expand_all_tree(self):
         """
-        展开树形视图中的所有节点
+        分批展开树形视图中的节点（再次点击可停止）
         """
-        if self.current_format == 'JSON':
-            self.json_tree.expandAll()
-        else:
-            self.xml_tree.expandAll()
-        self.status_bar.showMessage('已展开所有节点')
+        if self.expand_job is not None and self.expand_job.is_running():
+            self.expand_job.cancel()
+            return
+
+        tree = self.current_tree()
+        self.expand_job = TreeExpandJob(tree, self.expand_node_budget, self.expand_max_depth)
+        self.expand_job.on_progress = self.on_expand_progress
+        self.expand_job.on_finished = self.on_expand_finished
+        self.expand_all_btn.setText('⏹ 停止展开')
+        self.progress_bar.setRange(0, self.expand_node_budget)
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self.expand_job.start()
+
+    def on_expand_progress(self, job):
+        """
+        更新展开进度
+        """
+        self.progress_bar.setValue(min(job.revealed, job.node_budget))
+        self.status_bar.showMessage(f'正在展开节点：已显示 {job.revealed} 行')
+
+    def on_expand_finished(self, job):
+        """
+        展开任务结束
+        """
+        self.expand_all_btn.setText('📂 展开全部')
+        self.progress_bar.hide()
+        messages = {
+            'done': f'已展开所有节点（共 {job.revealed} 行）',
+            'budget': f'已展开 {job.revealed} 行，达到节点上限（可在选项设置中调整）',
+            'depth': f'已展开到第 {job.max_depth or MAX_VIEW_DEPTH} 层（共 {job.revealed} 行）',
+            'cancelled': f'已停止展开（已显示 {job.revealed} 行）',
+        }
+        self.status_bar.showMessage(messages.get(job.stop_reason, messages['done']))
 
     def collapse_all_tree(self):
         """
-        折叠树形视图中的所有节点
+        折叠树形视图中的所有节点（保持根节点展开）
         """
-        if self.current_format == 'JSON':
-            self.json_tree.collapseAll()
-            # 保持根节点展开
-            if self.json_tree.topLevelItemCount() > 0:
-                self.json_tree.expandToDepth(0)
-        else:
-            self.xml_tree.collapseAll()
-            # 保持根节点展开
-            if self.xml_tree.topLevelItemCount() > 0:
-                self.xml_tree.expandToDepth(0)
+        if self.expand_job is not None:
+            self.expand_job.cancel()
+        collapse_tree_view(self.current_tree())
         self.status_bar.showMessage('已折叠所有节点')
 
     def show_message(self, title, message, icon=QMessageBox.Information):
@@ -1430,7 +8560,9 @@ class JSONFormatterApp(QMainWindow):
         msg_box.setWindowTitle(title)
         msg_box.setText(message)
         msg_box.setIcon(icon)
-        msg_box.exec_()
+        # 等待用户关闭对话框的时间不计入操作耗时
+        with self.profiler.suspended():
+            msg_box.exec_()
 
     def show_search_dialog(self):
         """
@@ -1439,6 +8571,10 @@ class JSONFormatterApp(QMainWindow):
         # 确定当前焦点的文本框
         if self.input_text.hasFocus():
             self.show_embedded_search(self.input_text, self.input_container, 'input')
+        elif self.current_tree().hasFocus():
+            # 树形视图中查找键名或值
+            self.tree_search_input.setFocus()
+            self.tree_search_input.selectAll()
         elif self.output_text.hasFocus():
             self.show_embedded_search(self.output_text, self.output_container, 'output')
         else:
@@ -1517,65 +8653,90 @@ class JSONFormatterApp(QMainWindow):
     # def validate_json_input(self):
     #     pass
 
-    def highlight_json_error(self, error):
+    def input_line_index(self):
         """
-        高亮显示JSON错误位置
+        当前输入文档的行首位置索引
         """
-        try:
-            # 保存当前光标位置
-            current_cursor = self.input_text.textCursor()
-            current_position = current_cursor.position()
-
-            text = self.input_text.toPlainText()
-            lines = text.split('\n')
+        return self.active_document.line_index
 
-            if error.lineno <= len(lines):
-                # 计算错误位置的字符索引
-                char_pos = 0
-                for i in range(error.lineno - 1):
-                    char_pos += len(lines[i]) + 1  # +1 for newline character
-
-                error_char_pos = char_pos + error.colno - 1
-
-                # 创建新的光标用于高亮，不影响用户当前光标位置
-                highlight_cursor = self.input_text.textCursor()
+    def update_cursor_label(self):
+        """
+        在状态栏显示输入框光标所在的行号和列号
+        """
+        if self.active_document is None:
+            return
+        line, column = self.input_line_index().line_column(self.input_text.textCursor().position())
+        self.cursor_label.setText(f'行 {line}，列 {column}')
 
-                # 选择错误字符或单词
-                if error_char_pos < len(text):
-                    highlight_cursor.setPosition(error_char_pos)
-                    highlight_cursor.setPosition(min(error_char_pos + 1, len(text)), QTextCursor.KeepAnchor)
+    def go_to_line(self, line, column=1):
+        """
+        把输入框光标移到指定的行和列（均从 1 计）
+        """
+        position = self.input_line_index().position(line, column)
+        cursor = self.input_text.textCursor()
+        cursor.setPosition(position)
+        self.input_text.setTextCursor(cursor)
+        self.input_text.ensureCursorVisible()
+        self.input_text.setFocus()
 
-                    # 应用错误格式
-                    highlight_cursor.setCharFormat(self.json_error_format)
+    def show_go_to_line_dialog(self):
+        """
+        输入“行号”或“行号:列号”后跳转
+        """
+        index = self.input_line_index()
+        line, column = index.line_column(self.input_text.textCursor().position())
+        with self.profiler.suspended():
+            text, accepted = QInputDialog.getText(
+                self, '跳转到行', f'行号[:列号]（共 {index.line_count()} 行）：', text=f'{line}:{column}')
+        if not accepted:
+            return
+        match = re.fullmatch(r'\s*(\d+)\s*(?:[:：,，]\s*(\d+)\s*)?', text)
+        if match is None:
+            self.status_bar.showMessage(f'无效的行号：{text}', 3000)
+            return
+        self.go_to_line(int(match.group(1)), int(match.group(2) or 1))
 
-                    # 恢复用户原来的光标位置
-                    current_cursor.setPosition(current_position)
-                    self.input_text.setTextCursor(current_cursor)
+    def highlight_input_error(self, raw_text, line, column):
+        """
+        高亮显示解析错误的位置
+        line（从 1 计）和 column（从 0 计，按字符）是相对去掉首尾空白后的文本的位置，
+        先加上被去掉的开头空白，再经行首索引换算为文档位置
+        """
+        self.clear_input_error_highlighting()
+        try:
+            lead = len(raw_text) - len(raw_text.lstrip())
+            lead_lines = raw_text.count('\n', 0, lead)
+            if line == 1:
+                column += lead - (raw_text.rfind('\n', 0, lead) + 1)
+            line += lead_lines
+
+            # 行内的列号按字符计，换算为 UTF-16 单元只需看这一行的文本
+            index = self.input_line_index()
+            start = index.position(line)
+            block_text = self.input_text.document().findBlock(start).text()
+            position = min(start + utf16_length(block_text[:column]), index.length)
+            end = min(position + 1, index.length)
+            if position == end and position > 0:
+                # 错误位于文本末尾时高亮最后一个字符
+                position -= 1
+
+            self.input_markers.set_layer('error', [(position, end)], self.json_error_format)
+            self.status_bar.showMessage(f'错误位置：第 {line} 行，第 {column + 1} 列（Ctrl+G 跳转）')
         except Exception:
             # 如果高亮失败，不影响程序运行
             pass
 
-    def clear_json_error_highlighting(self):
+    def clear_input_error_highlighting(self):
         """
-        清除JSON错误高亮
+        清除上一次的解析错误高亮（只移除标记层，不改动文档）
         """
-        try:
-            # 保存当前光标位置
-            current_cursor = self.input_text.textCursor()
-            current_position = current_cursor.position()
-
-            # 创建新光标用于清除格式
-            clear_cursor = self.input_text.textCursor()
-            clear_cursor.select(QTextCursor.Document)
-            clear_cursor.setCharFormat(self.json_normal_format)
-            clear_cursor.clearSelection()
-
-            # 恢复用户原来的光标位置
-            current_cursor.setPosition(current_position)
-            self.input_text.setTextCursor(current_cursor)
-        except Exception:
-            # 如果清除失败，不影响程序运行
-            pass
+        self.input_markers.clear_layer('error')
+
+    def text_markers(self, text_edit):
+        """
+        输入框或输出框的标记层
+        """
+        return self.input_markers if text_edit is self.input_text else self.output_markers
 
 
 class EmbeddedSearchWidget(QWidget):
@@ -1678,6 +8839,13 @@ class EmbeddedSearchWidget(QWidget):
         self.search_input.setFocus()
         self.search_input.selectAll()
 
+    def hideEvent(self, event):
+        """
+        关闭搜索时移除命中标记
+        """
+        self.parent_window.text_markers(self.target_widget).clear_layer('search')
+        super().hideEvent(event)
+
     def on_search_text_changed(self):
         """
         搜索文本改变时重置搜索位置
@@ -1723,35 +8891,37 @@ class EmbeddedSearchWidget(QWidget):
         if self.whole_word.isChecked():
             flags |= QTextDocument.FindWholeWords
 
-        # 从当前位置开始搜索
-        if forward:
-            start_cursor = cursor
-        else:
-            start_cursor = cursor
-            start_cursor.setPosition(cursor.selectionStart())
-
-        found_cursor = document.find(search_text, start_cursor, QTextDocument.FindFlags(flags))
-
-        if found_cursor.isNull():
-            # 如果没找到，从文档开头/结尾重新搜索
+        with self.parent_window.profiler.stage('search', input_size=document.characterCount()):
+            # 从当前位置开始搜索
             if forward:
-                start_position = 0
+                start_cursor = cursor
             else:
-                start_position = document.characterCount() - 1
-            start_cursor = QTextCursor(document)
-            start_cursor.setPosition(start_position)
+                start_cursor = cursor
+                start_cursor.setPosition(cursor.selectionStart())
+
             found_cursor = document.find(search_text, start_cursor, QTextDocument.FindFlags(flags))
 
+            if found_cursor.isNull():
+                # 如果没找到，从文档开头/结尾重新搜索
+                if forward:
+                    start_position = 0
+                else:
+                    start_position = document.characterCount() - 1
+                start_cursor = QTextCursor(document)
+                start_cursor.setPosition(start_position)
+                found_cursor = document.find(search_text, start_cursor, QTextDocument.FindFlags(flags))
+
         if not found_cursor.isNull():
             # 找到了，设置红色高亮显示
             self.target_widget.setTextCursor(found_cursor)
 
-            # 设置选中文本的现代化高亮样式
+            # 设置选中文本的现代化高亮样式（叠加标记，不修改文档格式）
             format = QTextCharFormat()
             format.setBackground(QColor(52, 152, 219))  # 现代蓝色背景
             format.setForeground(QColor(255, 255, 255))  # 白色文字
             format.setFontWeight(QFont.Bold)  # 加粗字体
-            found_cursor.setCharFormat(format)
+            self.parent_window.text_markers(self.target_widget).set_layer(
+                'search', [(found_cursor.selectionStart(), found_cursor.selectionEnd())], format)
 
             self.parent_window.status_bar.showMessage(f"找到匹配项", 2000)
         else:
@@ -1884,6 +9054,13 @@ class EmbeddedReplaceWidget(QWidget):
         self.search_input.setFocus()
         self.search_input.selectAll()
 
+    def hideEvent(self, event):
+        """
+        关闭搜索时移除命中标记
+        """
+        self.parent_window.text_markers(self.target_widget).clear_layer('search')
+        super().hideEvent(event)
+
     def on_search_text_changed(self):
         """
         搜索文本改变时重置搜索位置
@@ -1929,29 +9106,31 @@ class EmbeddedReplaceWidget(QWidget):
         if self.whole_word.isChecked():
             flags |= QTextDocument.FindWholeWords
 
-        # 从当前位置开始搜索 - 修复参数类型
-        found_cursor = document.find(search_text, cursor, QTextDocument.FindFlags(flags))
+        with self.parent_window.profiler.stage('search', input_size=document.characterCount()):
+            # 从当前位置开始搜索 - 修复参数类型
+            found_cursor = document.find(search_text, cursor, QTextDocument.FindFlags(flags))
 
-        if found_cursor.isNull():
-            # 如果没找到，从文档开头/结尾重新搜索（循环搜索）
-            if forward:
-                start_position = 0
-            else:
-                start_position = document.characterCount() - 1
-            start_cursor = QTextCursor(document)
-            start_cursor.setPosition(start_position)
-            found_cursor = document.find(search_text, start_cursor, QTextDocument.FindFlags(flags))
+            if found_cursor.isNull():
+                # 如果没找到，从文档开头/结尾重新搜索（循环搜索）
+                if forward:
+                    start_position = 0
+                else:
+                    start_position = document.characterCount() - 1
+                start_cursor = QTextCursor(document)
+                start_cursor.setPosition(start_position)
+                found_cursor = document.find(search_text, start_cursor, QTextDocument.FindFlags(flags))
 
         if not found_cursor.isNull():
             # 找到了，设置红色字体和加深背景高亮显示
             self.target_widget.setTextCursor(found_cursor)
 
-            # 设置选中文本的现代化高亮样式
+            # 设置选中文本的现代化高亮样式（叠加标记，不修改文档格式）
             format = QTextCharFormat()
             format.setBackground(QColor(52, 152, 219))  # 现代蓝色背景
             format.setForeground(QColor(255, 255, 255))  # 白色文字
             format.setFontWeight(QFont.Bold)  # 加粗字体
-            found_cursor.setCharFormat(format)
+            self.parent_window.text_markers(self.target_widget).set_layer(
+                'search', [(found_cursor.selectionStart(), found_cursor.selectionEnd())], format)
 
             self.parent_window.status_bar.showMessage(f"找到匹配项", 2000)
             return True
@@ -1983,7 +9162,9 @@ class EmbeddedReplaceWidget(QWidget):
                 match = (selected_text.lower() == search_text.lower())
 
             if match:
-                cursor.insertText(replace_text)
+                with self.parent_window.profiler.stage('replace', input_size=len(selected_text)) as stage:
+                    cursor.insertText(replace_text)
+                    stage['output_size'] = len(replace_text)
                 self.parent_window.status_bar.showMessage("已替换一处", 2000)
                 # 查找下一个
                 self.find_next()
@@ -2029,18 +9210,20 @@ class EmbeddedReplaceWidget(QWidget):
         replace_count = 0
 
         # 开始替换
-        cursor.beginEditBlock()
-        try:
-            while True:
-                found_cursor = document.find(search_text, cursor, QTextDocument.FindFlags(flags))
-                if found_cursor.isNull():
-                    break
-
-                found_cursor.insertText(replace_text)
-                replace_count += 1
-                cursor = found_cursor
-        finally:
-            cursor.endEditBlock()
+        with self.parent_window.profiler.stage('replace', input_size=document.characterCount()) as stage:
+            cursor.beginEditBlock()
+            try:
+                while True:
+                    found_cursor = document.find(search_text, cursor, QTextDocument.FindFlags(flags))
+                    if found_cursor.isNull():
+                        break
+
+                    found_cursor.insertText(replace_text)
+                    replace_count += 1
+                    cursor = found_cursor
+            finally:
+                cursor.endEditBlock()
+            stage['output_size'] = document.characterCount()
 
         self.parent_window.status_bar.showMessage(f"已替换 {replace_count} 处", 3000)
 
@@ -2063,21 +9246,658 @@ class EmbeddedReplaceWidget(QWidget):
             return text1 == text2
 
 
+class StallReportDialog(QDialog):
+    """
+    卡顿统计对话框
+    """
+
+    def __init__(self, watchdog, parent=None):
+        super().__init__(parent)
+        self.watchdog = watchdog
+        self.init_ui()
+
+    def init_ui(self):
+        """
+        初始化卡顿统计界面
+        """
+        self.setWindowTitle('界面卡顿统计')
+        self.resize(900, 600)
+
+        layout = QVBoxLayout(self)
+
+        self.report_text = QTextEdit()
+        self.report_text.setReadOnly(True)
+        self.report_text.setLineWrapMode(QTextEdit.NoWrap)
+        self.report_text.setFont(QFont('Consolas', 10))
+        layout.addWidget(self.report_text)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Close)
+        self.refresh_btn = buttons.addButton('刷新', QDialogButtonBox.ActionRole)
+        self.clear_btn = buttons.addButton('清空记录', QDialogButtonBox.ResetRole)
+        self.refresh_btn.clicked.connect(self.refresh)
+        self.clear_btn.clicked.connect(self.clear_records)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+        self.refresh()
+
+    def refresh(self):
+        """
+        刷新报告内容
+        """
+        self.report_text.setPlainText(self.watchdog.format_report())
+
+    def clear_records(self):
+        """
+        清空卡顿记录
+        """
+        self.watchdog.clear()
+        self.refresh()
+
+
+class SubtreeSizeDialog(QDialog):
+    """
+    体积排行对话框：树中序列化字节数最大的前 N 个子树，单击定位到树形视图
+    """
+
+    # 选中某一行时发出对应的节点编号
+    node_selected = pyqtSignal(int)
+
+    def __init__(self, table, parent=None, limit=50):
+        super().__init__(parent)
+        self.table = table
+        self.nodes = []
+        self.init_ui(limit)
+
+    def init_ui(self, limit):
+        """
+        初始化体积排行界面
+        """
+        self.setWindowTitle('体积排行')
+        self.resize(900, 600)
+
+        layout = QVBoxLayout(self)
+
+        bar = QHBoxLayout()
+        bar.addWidget(QLabel('显示前'))
+        self.limit_spinbox = QSpinBox()
+        self.limit_spinbox.setRange(1, 10000)
+        self.limit_spinbox.setValue(limit)
+        self.limit_spinbox.setSuffix(' 项')
+        self.limit_spinbox.valueChanged.connect(self.refresh)
+        bar.addWidget(self.limit_spinbox)
+        bar.addStretch(1)
+        self.summary_label = QLabel()
+        bar.addWidget(self.summary_label)
+        layout.addLayout(bar)
+
+        self.result_table = QTableWidget(0, 4)
+        self.result_table.setHorizontalHeaderLabels(['路径', '大小', '占比', '节点数'])
+        self.result_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.result_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.result_table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.result_table.verticalHeader().setVisible(False)
+        header = self.result_table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.Stretch)
+        for column in range(1, 4):
+            header.setSectionResizeMode(column, QHeaderView.ResizeToContents)
+        self.result_table.setToolTip('单击定位到树形视图')
+        self.result_table.cellClicked.connect(self.on_cell_clicked)
+        layout.addWidget(self.result_table)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Close)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+        self.refresh()
+
+    def refresh(self):
+        """
+        按当前的 N 重新排行
+        """
+        table = self.table
+        total = max(table.byte_sizes[0], 1)
+        self.nodes = table.heaviest(self.limit_spinbox.value())
+        self.summary_label.setText(f'文档共 {format_size(table.byte_sizes[0])}，{len(table)} 个节点')
+        self.result_table.setRowCount(len(self.nodes))
+        for row, node in enumerate(self.nodes):
+            size = table.byte_sizes[node]
+            cells = (table.node_path(node), format_size(size), f'{size / total:.1%}', str(table.sizes[node]))
+            for column, text in enumerate(cells):
+                item = QTableWidgetItem(text)
+                if column:
+                    item.setTextAlignment(int(Qt.AlignRight | Qt.AlignVCenter))
+                if column == 1:
+                    item.setBackground(NodeTreeModel.heat_color(size / total))
+                self.result_table.setItem(row, column, item)
+
+    def on_cell_clicked(self, row, column):
+        """
+        单击某一行时通知主窗口定位节点
+        """
+        if 0 <= row < len(self.nodes):
+            self.node_selected.emit(self.nodes[row])
+
+
+class BatchFormatDialog(QDialog):
+    """
+    批量格式化对话框：选择目录、处理方式和文件格式，确认后由主窗口在后台原地格式化
+    """
+
+    def __init__(self, directory='', mode='beautify', format_type=None, use_cache=True, parent=None):
+        super().__init__(parent)
+        self.init_ui(directory, mode, format_type, use_cache)
+
+    def init_ui(self, directory, mode, format_type, use_cache):
+        """
+        初始化批量格式化界面
+        """
+        self.setWindowTitle('批量格式化')
+        self.resize(600, 0)
+
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+
+        directory_layout = QHBoxLayout()
+        self.directory_input = QLineEdit(directory)
+        self.directory_input.setPlaceholderText('要原地格式化的目录')
+        self.directory_input.textChanged.connect(self.update_ok_button)
+        directory_layout.addWidget(self.directory_input, 1)
+        browse_btn = QPushButton('浏览...')
+        browse_btn.clicked.connect(self.browse_directory)
+        directory_layout.addWidget(browse_btn)
+        form.addRow('目录：', directory_layout)
+
+        self.mode_combo = QComboBox()
+        for value, name in BATCH_FORMAT_MODE_NAMES.items():
+            self.mode_combo.addItem(name, value)
+        self.mode_combo.setCurrentIndex(max(0, self.mode_combo.findData(mode)))
+        form.addRow('处理方式：', self.mode_combo)
+
+        self.format_combo = QComboBox()
+        self.format_combo.addItem('JSON 和 XML', None)
+        self.format_combo.addItem('只处理 JSON（.json/.geojson）', 'JSON')
+        self.format_combo.addItem('只处理 XML（.xml）', 'XML')
+        self.format_combo.setCurrentIndex(max(0, self.format_combo.findData(format_type)))
+        form.addRow('文件：', self.format_combo)
+
+        self.cache_checkbox = QCheckBox('跳过自上次处理后未改动的文件')
+        self.cache_checkbox.setChecked(use_cache)
+        self.cache_checkbox.setToolTip('按文件时间戳、大小和内容哈希判断，取消勾选时重新检查所有文件')
+        form.addRow('', self.cache_checkbox)
+        layout.addLayout(form)
+
+        note = QLabel('文件会被原地改写（先写临时文件再替换，失败时原文件不变），压缩文件不参与处理。')
+        note.setWordWrap(True)
+        note.setStyleSheet("QLabel { color: #7f8c8d; }")
+        layout.addWidget(note)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        self.ok_btn = buttons.button(QDialogButtonBox.Ok)
+        self.ok_btn.setText('开始格式化')
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+        self.update_ok_button()
+
+    def browse_directory(self):
+        """
+        选择目录
+        """
+        directory = QFileDialog.getExistingDirectory(self, '选择要格式化的目录', self.directory_input.text())
+        if directory:
+            self.directory_input.setText(directory)
+
+    def update_ok_button(self):
+        """
+        只有目录存在时才能开始
+        """
+        self.ok_btn.setEnabled(os.path.isdir(self.directory_input.text().strip()))
+
+    def options(self):
+        """
+        返回 (目录, 处理方式, 文件格式, 是否使用缓存)
+        """
+        return (self.directory_input.text().strip(), self.mode_combo.currentData(),
+                self.format_combo.currentData(), self.cache_checkbox.isChecked())
+
+
+# Qt 自身的命令行选项中需要带一个参数的选项（如 -style fusion），交给 QApplication 处理
+QT_VALUE_OPTIONS = {
+    '-style', '-stylesheet', '-platform', '-platformpluginpath', '-platformtheme', '-plugin',
+    '-qmljsdebugger', '-session', '-display', '-geometry', '-title', '-qwindowgeometry',
+    '-qwindowicon', '-qwindowtitle', '-dialogs',
+}
+
+
+def split_qt_arguments(argv):
+    """
+    把命令行参数拆分为 (本程序的参数, Qt 的带值选项)，避免选项的值被当作输入文件
+    """
+    own = []
+    qt = []
+    index = 0
+    while index < len(argv):
+        arg = argv[index]
+        if arg in QT_VALUE_OPTIONS and index + 1 < len(argv):
+            qt.extend(argv[index:index + 2])
+            index += 2
+            continue
+        own.append(arg)
+        index += 1
+    return own, qt
+
+
+def build_arg_parser():
+    """
+    命令行参数：不指定处理方式时启动图形界面
+    """
+    parser = argparse.ArgumentParser(
+        description='离线 JSON/XML 格式化工具（不指定处理方式时启动图形界面）')
+    parser.add_argument('input', nargs='?',
+                        help='输入文件，按文件头自动识别 gzip/bz2/xz/zip 压缩并边读边解压')
+    parser.add_argument('-o', '--output',
+                        help='输出文件（默认输出到标准输出），以 .gz/.bz2/.xz/.zip 结尾时压缩保存')
+    parser.add_argument('--format', choices=['JSON', 'XML'], type=str.upper,
+                        help='数据格式（默认按扩展名或内容判断）')
+    mode_group = parser.add_mutually_exclusive_group()
+    mode_group.add_argument('--beautify', dest='mode', action='store_const', const='beautify',
+                            help='美化格式（JSON 流式处理，内存占用与文件大小无关）')
+    mode_group.add_argument('--minify', dest='mode', action='store_const', const='minify',
+                            help='压缩格式（JSON 流式处理）')
+    mode_group.add_argument('--sort', dest='mode', action='store_const', const='sort',
+                            help='排序并美化（需要完整解析）')
+    mode_group.add_argument('--validate', dest='mode', action='store_const', const='validate',
+                            help='只验证格式，不输出内容')
+    parser.add_argument('--benchmark', choices=['walkers', 'nodes', 'parallel'],
+                        help='运行性能基准测试并输出结果（walkers：树构建、XML 排序和空白清理在不同嵌套深度下的耗时；'
+                             'nodes：节点表每个节点占用的字节数；parallel：顶层数组分段并行格式化在不同进程数下的加速比）')
+    parser.add_argument('--schema',
+                        help='按 JSON Schema 校验输入文件；输入为目录时批量校验其中的所有 JSON 文件（隐含 --validate）')
+    parser.add_argument('--in-place', action='store_true',
+                        help='原地格式化：输入为目录时递归处理其中的 .json/.geojson/.xml 文件（多核时并行），'
+                             '结果先写临时文件再替换原文件；自上次处理后未改动的文件直接跳过')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='原地格式化时不使用也不更新缓存，重新检查所有文件')
+    return parser
+
+
+def iter_formatted_file(path, format_type, mode):
+    """
+    流式读取（自动解压）并格式化文件，逐块产生输出文本
+    JSON 美化/压缩/验证按词法单元流式处理；排序和 XML 美化/压缩需要完整的树
+    """
+    if format_type == 'JSON':
+        if mode == 'sort':
+            with open_text_input(path) as f:
+                text = f.read()
+            # 大的顶层数组按元素分段并行排序
+            if (os.cpu_count() or 1) > 1 and len(text) > PARALLEL_FORMAT_THRESHOLD:
+                formatted = format_json_array_parallel(text, 'sort')
+                if formatted is not None:
+                    yield formatted
+                    return
+            yield dump_json_pretty(json.loads(text), sort_keys=True)
+            return
+        indent = 4 if mode == 'beautify' else None
+        formatted = iter_json_reformat(iter_file_text(path), indent=indent)
+        if mode == 'validate':
+            for _ in formatted:
+                pass
+            return
+        yield from formatted
+        return
+
+    with open_binary_input(path) as stream:
+        if mode == 'validate':
+            # 边解析边释放已处理的元素，内存占用与文件大小无关
+            for _, element in ET.iterparse(stream):
+                element.clear()
+            return
+        xml_root = ET.parse(stream).getroot()
+    yield format_xml_tree(xml_root, mode)
+
+
+def run_cli(args):
+    """
+    命令行模式：不创建界面，处理单个文件，返回进程退出码
+    """
+    if not args.input:
+        print('错误：命令行模式需要指定输入文件', file=sys.stderr)
+        return 2
+    if args.schema:
+        return run_schema_cli(args)
+    if args.in_place or os.path.isdir(args.input):
+        return run_batch_format_cli(args)
+
+    started = time.perf_counter()
+    try:
+        format_type = args.format or guess_text_format(args.input)
+        pieces = iter_formatted_file(args.input, format_type, args.mode)
+        if args.output:
+            write_pieces_to_file(pieces, args.output)
+        else:
+            for piece in pieces:
+                sys.stdout.write(piece)
+            if args.mode != 'validate':
+                sys.stdout.write('\n')
+            sys.stdout.flush()
+    except (OSError, ValueError, EOFError, zlib.error, lzma.LZMAError,
+            zipfile.BadZipFile, ET.ParseError) as e:
+        print(f'错误：{args.input}：{e}', file=sys.stderr)
+        return 1
+
+    elapsed = time.perf_counter() - started
+    if args.mode == 'validate':
+        print(f'{format_type} 格式正确：{args.input}（{elapsed:.2f} 秒）', file=sys.stderr)
+    elif args.output:
+        print(f'已保存：{args.output}（{format_size(os.path.getsize(args.output))}，{elapsed:.2f} 秒）',
+              file=sys.stderr)
+    return 0
+
+
+def make_nested_json(depth, total_nodes):
+    """
+    基准测试数据：嵌套 depth 层的对象链，每层带若干标量，总节点数约为 total_nodes
+    """
+    width = max(1, total_nodes // depth)
+    value = {}
+    for _ in range(depth):
+        node = {f'k{i}': i for i in range(width - 1)}
+        node['child'] = value
+        value = node
+    return value
+
+
+def make_nested_xml(depth, total_nodes):
+    """
+    基准测试数据：嵌套 depth 层的元素链，每层带若干（逆序的）叶子元素，总元素数约为 total_nodes
+    """
+    width = max(1, total_nodes // depth)
+    root = element = ET.Element('level', id='0', b='1', a='2')
+    for level in range(depth - 1):
+        for i in range(width - 1, 0, -1):
+            ET.SubElement(element, f'k{i}').text = f'  {i}  '
+        element = ET.SubElement(element, 'level', id=str(level + 1))
+        element.tail = '\n    '
+    return root
+
+
+# 以下为改用显式栈之前的递归实现，只作为基准测试的对照（树填充为当时逐项创建 QTreeWidgetItem 的方式）
+
+def _recursive_sort_xml_element(element):
+    """
+    递归排序XML元素的属性和子元素（对照实现）
+    """
+    attrib = element.attrib
+    if len(attrib) > 1:
+        sorted_attrib = sorted(attrib.items())
+        attrib.clear()
+        attrib.update(sorted_attrib)
+    children = list(element)
+    if children:
+        children.sort(key=lambda x: x.tag)
+        element[:] = children
+        for child in children:
+            _recursive_sort_xml_element(child)
+
+
+def _recursive_remove_xml_whitespace(element):
+    """
+    递归移除XML元素中的空白文本（对照实现）
+    """
+    if element.text:
+        element.text = element.text.strip() or None
+    if element.tail:
+        element.tail = element.tail.strip() or None
+    for child in element:
+        _recursive_remove_xml_whitespace(child)
+
+
+def _recursive_format_value(value):
+    """
+    格式化值的显示（对照实现）
+    """
+    if value is None:
+        return "null"
+    elif isinstance(value, bool):
+        return "true" if value else "false"
+    elif isinstance(value, str):
+        if len(value) > 100:
+            return f'"{value[:97]}..."'
+        return f'"{value}"'
+    else:
+        return str(value)
+
+
+def _recursive_add_json_items(parent_item, data):
+    """
+    递归添加字典或列表项到树中（对照实现）
+    """
+    entries = data.items() if isinstance(data, dict) else ((f"[{index}]", value) for index, value in enumerate(data))
+    for key, value in entries:
+        if isinstance(value, dict):
+            item = QTreeWidgetItem([str(key), f"{len(value)} 项", "Object"])
+            parent_item.addChild(item)
+            _recursive_add_json_items(item, value)
+        elif isinstance(value, list):
+            item = QTreeWidgetItem([str(key), f"{len(value)} 项", "Array"])
+            parent_item.addChild(item)
+            _recursive_add_json_items(item, value)
+        else:
+            item = QTreeWidgetItem([str(key), _recursive_format_value(value), type(value).__name__])
+            parent_item.addChild(item)
+
+
+def _recursive_add_xml_elements(parent_item, xml_element):
+    """
+    递归添加XML元素到树中（对照实现）
+    """
+    for child in xml_element:
+        child_text = child.text.strip() if child.text else ""
+        child_item = QTreeWidgetItem([child.tag, child_text, "Element"])
+        parent_item.addChild(child_item)
+        if child.attrib:
+            for attr_name, attr_value in child.attrib.items():
+                attr_item = QTreeWidgetItem([f"@{attr_name}", attr_value, "Attribute"])
+                child_item.addChild(attr_item)
+        if len(child) > 0:
+            _recursive_add_xml_elements(child_item, child)
+
+
+def _recursive_json_tree(json_data):
+    """
+    递归填充 JSON 树（对照实现）
+    """
+    _recursive_add_json_items(QTreeWidgetItem(["根节点", "", "Object"]), json_data)
+
+
+def _recursive_xml_tree(xml_root):
+    """
+    递归填充 XML 树（对照实现）
+    """
+    _recursive_add_xml_elements(QTreeWidgetItem([xml_root.tag, "", "Element"]), xml_root)
+
+
+def run_walker_benchmark(depths=(10, 100, 500, 100000), total_nodes=100000):
+    """
+    树遍历基准：在不同嵌套深度下构建树（节点表）、排序 XML、清理空白的耗时（毫秒），
+    每项与改用显式栈之前的递归实现对照；递归实现超出递归深度限制时记为 RecursionError
+    """
+    walkers = (
+        ('JSON 树', NodeTable.from_json, _recursive_json_tree, 'json'),
+        ('XML 树', NodeTable.from_xml, _recursive_xml_tree, 'xml'),
+        ('XML 排序', sort_xml_element, _recursive_sort_xml_element, 'xml'),
+        ('清理空白', remove_xml_whitespace, _recursive_remove_xml_whitespace, 'xml'),
+    )
+    columns = ['深度', '节点数']
+    for name, _, _, _ in walkers:
+        columns += [name, '递归']
+    print(' '.join(f'{column:>15}' for column in columns))
+    for depth in depths:
+        cells = [depth, sum(1 for _ in make_nested_xml(depth, total_nodes).iter())]
+        for _, func, reference, kind in walkers:
+            for walker in (func, reference):
+                # 排序和清理空白会修改数据，每次都使用新生成的数据
+                data = make_nested_json(depth, total_nodes) if kind == 'json' else make_nested_xml(depth, total_nodes)
+                started = time.perf_counter()
+                try:
+                    walker(data)
+                except RecursionError:
+                    cells.append('RecursionError')
+                    continue
+                cells.append(f'{(time.perf_counter() - started) * 1000:.1f}')
+        print(' '.join(f'{cell:>15}' for cell in cells))
+    return 0
+
+
+def run_node_store_benchmark(records=50000):
+    """
+    节点表基准：典型对象数组的节点数、构建耗时和每个节点占用的字节数
+    """
+    data = [{'id': i, 'name': f'user{i}', 'email': f'u{i}@example.com', 'active': i % 2 == 0,
+             'score': i * 1.5, 'tags': ['a', 'b'], 'address': {'city': f'c{i % 100}', 'zip': None}}
+            for i in range(records)]
+    started = time.perf_counter()
+    table = NodeTable.from_json(data)
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f'节点数 {len(table)}，构建 {elapsed:.0f}ms，节点表 {format_size(table.memory_size())}，'
+          f'每个节点 {table.memory_size() / len(table):.1f} 字节（键和值引用解析结果中已有的对象）')
+    return 0
+
+
+def run_parallel_format_benchmark(records=200000):
+    """
+    并行格式化基准：顶层对象数组在 1 到 CPU 数个进程下分段美化/压缩/排序的耗时和加速比，并核对输出与整体处理逐字节相同
+    """
+    data = [{'id': i, 'name': f'user{i}', 'email': f'u{i}@example.com', 'active': i % 2 == 0,
+             'score': i * 1.5, 'tags': ['a', 'b[1]'], 'note': '含 "引号" 和 {括号}',
+             'address': {'city': f'c{i % 100}', 'zip': None}}
+            for i in range(records)]
+    text = dump_json_pretty(data)
+    del data
+    cpu_count = os.cpu_count() or 1
+    worker_counts = sorted({1, cpu_count} | {count for count in (2, 4, 8, 16, 32) if count < cpu_count})
+    print(f'输入 {format_size(len(text.encode("utf-8")))}，{records} 个元素，CPU {cpu_count} 个')
+    print(f'{"操作":>8} {"整体":>10} ' + ' '.join(f'{str(count) + " 进程":>14}' for count in worker_counts))
+    serial = {
+        'beautify': lambda: dump_json_pretty(json.loads(text)),
+        'minify': lambda: json.dumps(json.loads(text), ensure_ascii=False, separators=(',', ':')),
+        'sort': lambda: dump_json_pretty(json.loads(text), sort_keys=True),
+    }
+    pools = {count: ProcessPoolExecutor(max_workers=count, mp_context=multiprocessing.get_context('spawn'))
+             for count in worker_counts}
+    try:
+        # 预先启动子进程，计时不含进程启动
+        for count, pool in pools.items():
+            list(pool.map(format_json_array_chunk, ['0'] * count, repeat('minify')))
+        for mode, func in serial.items():
+            started = time.perf_counter()
+            expected = func()
+            baseline = time.perf_counter() - started
+            cells = []
+            for count, pool in pools.items():
+                started = time.perf_counter()
+                output = format_json_array_parallel(text, mode, pool, parts=4 * count)
+                elapsed = time.perf_counter() - started
+                mark = '' if output == expected else '（不一致）'
+                cells.append(f'{elapsed * 1000:>7.0f}ms ×{baseline / elapsed:.1f}{mark}')
+            print(f'{mode:>10} {baseline * 1000:>8.0f}ms ' + ' '.join(f'{cell:>14}' for cell in cells))
+    finally:
+        for pool in pools.values():
+            pool.shutdown()
+    return 0
+
+
+def run_batch_format_cli(args):
+    """
+    命令行原地格式化：输入为目录或单个文件，有文件格式化失败时退出码为 1
+    """
+    if not args.in_place:
+        print('错误：输入为目录时需要指定 --in-place 原地格式化', file=sys.stderr)
+        return 2
+    if args.mode not in BATCH_FORMAT_MODE_NAMES:
+        print('错误：--in-place 需要与 --beautify、--sort 或 --minify 一起使用', file=sys.stderr)
+        return 2
+    if args.output:
+        print('错误：--in-place 不能与 --output 一起使用', file=sys.stderr)
+        return 2
+
+    started = time.perf_counter()
+    cache_path = None if args.no_cache else get_format_cache_path()
+    try:
+        results = format_directory(args.input, args.mode, args.format, cache_path)
+    except OSError as e:
+        print(f'错误：{args.input}：{e}', file=sys.stderr)
+        return 1
+    print(format_batch_report(results, args.input, args.mode, time.perf_counter() - started))
+    return 1 if any(status == 'failed' for _, status, _ in results) else 0
+
+
+def run_schema_cli(args):
+    """
+    命令行 Schema 校验：输入为文件或目录，有违反项时退出码为 1
+    """
+    try:
+        with open_text_input(args.schema) as f:
+            schema_text = f.read()
+        get_schema_validator(schema_text)
+    except (OSError, ValueError, re.error) as e:
+        print(f'错误：无法加载 Schema {args.schema}：{e}', file=sys.stderr)
+        return 2
+
+    started = time.perf_counter()
+    if os.path.isdir(args.input):
+        directory = args.input
+        results = validate_directory_against_schema(directory, schema_text, args.schema)
+    else:
+        directory = os.path.dirname(os.path.abspath(args.input))
+        results = [validate_file_against_schema(os.path.abspath(args.input), schema_text,
+                                                schema_hash(schema_text), max_errors=1000)]
+    print(format_schema_report(results, directory))
+    print(f'用时 {time.perf_counter() - started:.2f} 秒', file=sys.stderr)
+    return 1 if any(result[1] or result[3] for result in results) else 0
+
+
 def main():
     """
     主函数
     """
+    # 打包为可执行文件后，进程池的子进程需要由此进入
+    multiprocessing.freeze_support()
+    # Qt 的选项（如 -style、-platform）不由 argparse 处理，启动图形界面时原样传给 QApplication
+    own_argv, qt_argv = split_qt_arguments(sys.argv[1:])
+    parser = build_arg_parser()
+    args, unknown = parser.parse_known_args(own_argv)
+    qt_argv.extend(unknown)
+    if args.benchmark == 'walkers':
+        sys.exit(run_walker_benchmark())
+    if args.benchmark == 'nodes':
+        sys.exit(run_node_store_benchmark())
+    if args.benchmark == 'parallel':
+        sys.exit(run_parallel_format_benchmark())
+    if args.schema and args.mode is None:
+        args.mode = 'validate'
+    # 命令行模式不创建 QApplication，也需要应用名称来确定数据目录（批量格式化缓存）
+    QApplication.setApplicationName('JSON 格式化工具')
+    QApplication.setOrganizationName('wangjunqi')
+    # 原地格式化和目录输入只能在命令行模式下处理，缺少处理方式时由 run_cli 报错
+    if args.mode is not None or args.in_place or (args.input and os.path.isdir(args.input)):
+        if qt_argv:
+            parser.error(f'无法识别的参数：{" ".join(qt_argv)}')
+        sys.exit(run_cli(args))
+
     # 创建应用程序
-    app = QApplication(sys.argv)
+    app = QApplication(sys.argv[:1] + qt_argv)
 
     # 设置应用程序属性
-    app.setApplicationName('JSON 格式化工具')
     app.setApplicationVersion('1.0')
-    app.setOrganizationName('wangjunqi')
 
     # 创建主窗口
     window = JSONFormatterApp()
     window.show()
+    if args.input:
+        window.open_file(args.input)
 
     # 运行应用程序
     sys.exit(app.exec_())